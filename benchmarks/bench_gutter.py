@@ -0,0 +1,67 @@
+"""Per-keystroke cost of the line-number gutter as the file grows.
+
+Run from the repository root with a display available:
+
+    python benchmarks/bench_gutter.py [keystrokes]
+
+For each file size this types characters and newlines in the middle of
+the file and reports the median time per keystroke (edit plus a full Tk
+update) and the median time of a forced gutter redraw. Both should stay
+flat from 100 lines to 1M lines.
+"""
+import os
+import sys
+import time
+import statistics
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import LineNumberedText
+
+SIZES = (100, 10_000, 100_000, 1_000_000)
+
+def time_keystrokes(root, widget, chars, count):
+    """Median milliseconds to type chars at the cursor and let Tk catch up"""
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        widget.text.insert('insert', chars)
+        root.update()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def time_redraws(root, widget, count):
+    """Median milliseconds for a gutter redraw with the change check bypassed"""
+    samples = []
+    for _ in range(count):
+        widget._gutter_key = None
+        start = time.perf_counter()
+        widget._update_line_numbers()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    root = tk.Tk()
+    root.geometry("900x700")
+    print(f"{'lines':>10} {'char ms':>10} {'newline ms':>12} {'redraw ms':>11}")
+    for size in SIZES:
+        widget = LineNumberedText(root, wrap="word")
+        widget.pack(fill=tk.BOTH, expand=True)
+        widget.text.insert('1.0', "".join(f"value_{i} = compute({i}) + 1\n" for i in range(size)))
+        middle = f"{size // 2}.0"
+        widget.text.mark_set('insert', middle)
+        widget.text.see(middle)
+        root.update()
+
+        char_ms = time_keystrokes(root, widget, "x", count)
+        newline_ms = time_keystrokes(root, widget, "\n", count)
+        redraw_ms = time_redraws(root, widget, count)
+        print(f"{size:>10} {char_ms:>10.3f} {newline_ms:>12.3f} {redraw_ms:>11.3f}")
+
+        widget.destroy()
+        root.update()
+    root.destroy()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Throughput of the embedded terminal's output path.
+
+Run from the repository root:
+
+    python benchmarks/bench_terminal.py [megabytes] [--tk]
+
+A child process writes the given amount of line-oriented output (default
+10 MB) to a pipe. The "pipeline" rows time reading and decoding it, once
+a character at a time (the old reader) and once in os.read chunks through
+_TerminalDecoder and _AnsiParser. With --tk and a display available, the
+"tk" row runs the same output through a RealTerminal, flood mode
+included; its last column is the worst main-loop stall in ms.
+"""
+import os
+import sys
+import time
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import RealTerminal, _TerminalDecoder, _AnsiParser, _TerminalIO
+
+WRITER = (
+    "import sys\n"
+    "block = ''.join('build step %07d: compiled module ok\\n' % i for i in range(2000)).encode()\n"
+    "out = sys.stdout.buffer\n"
+    "for _ in range(int(sys.argv[1]) // len(block)):\n"
+    "    out.write(block)\n"
+    "out.flush()\n"
+)
+
+def spawn(size, text):
+    """Start the writer on a pipe"""
+    return subprocess.Popen([sys.executable, "-c", WRITER, str(size)], stdout=subprocess.PIPE,
+                            text=text, encoding="utf-8" if text else None, bufsize=1 if text else -1)
+
+def read_by_char(size):
+    """The previous reader: one text-mode read(1) per character"""
+    proc = spawn(size, text=True)
+    total = 0
+    while True:
+        char = proc.stdout.read(1)
+        if not char:
+            break
+        total += len(char)
+    proc.wait()
+    return total, total  # one read and one after() callback per character
+
+def read_chunked(size):
+    """os.read chunks decoded and ANSI-parsed incrementally, as the terminal I/O thread does"""
+    proc = spawn(size, text=False)
+    fd = proc.stdout.fileno()
+    decoder = _TerminalDecoder("utf-8")
+    parser = _AnsiParser()
+    total = reads = 0
+    while True:
+        data = os.read(fd, _TerminalIO.READ_CHUNK)
+        if not data:
+            break
+        reads += 1
+        total += sum(len(run[0]) for run in parser.feed(decoder.feed(data)) if run)
+    total += sum(len(run[0]) for run in parser.feed(decoder.feed(b"", final=True)) if run)
+    proc.wait()
+    return total, reads
+
+def through_tk(size):
+    """Full path into a RealTerminal widget; returns characters handled and the worst UI stall
+
+    A 10 ms probe runs on the Tk main loop throughout; its worst lateness is how
+    long keyboard and mouse input would have waited. Flood mode records most
+    of the output to disk, so characters are counted as they are queued.
+    """
+    import tkinter as tk
+    root = tk.Tk()
+    root.geometry("900x500")
+    terminal = RealTerminal(root, os.getcwd(), root)
+    terminal.pack(fill=tk.BOTH, expand=True)
+    terminal.shutdown()
+    while terminal._streams:
+        time.sleep(0.01)
+    terminal._encoding = "utf-8"
+    root.update()
+
+    handled = [0]
+    original_queue = terminal._queue
+    def counting_queue(runs):
+        handled[0] += sum(len(run[0]) for run in runs if run)
+        return original_queue(runs)
+    terminal._queue = counting_queue
+
+    stall = [0.0]
+    def probe(due):
+        now = time.perf_counter()
+        stall[0] = max(stall[0], now - due)
+        root.after(10, probe, now + 0.010)
+    root.after(10, probe, time.perf_counter() + 0.010)
+
+    terminal._running = False  # No exit banner when the writer finishes
+    proc = spawn(size, text=False)
+    terminal._watch(proc.stdout.fileno())
+    while terminal._streams or terminal._flush_scheduled:
+        root.update()
+        time.sleep(0.001)
+    proc.wait()
+    root.destroy()
+    return handled[0], round(stall[0] * 1000)
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    size = int(float(args[0]) * 1024 * 1024) if args else 10 * 1024 * 1024
+    runs = [("pipeline read(1)", read_by_char), ("pipeline chunked", read_chunked)]
+    if "--tk" in sys.argv:
+        runs.append(("tk chunked+frames", through_tk))
+    print(f"{'path':<20} {'MB':>8} {'seconds':>9} {'MB/s':>9} {'reads':>14}")
+    for label, func in runs:
+        start = time.perf_counter()
+        total, calls = func(size)
+        elapsed = time.perf_counter() - start
+        mb = total / (1024 * 1024)
+        print(f"{label:<20} {mb:>8.2f} {elapsed:>9.3f} {mb / elapsed:>9.1f} {calls:>14}")
+
+if __name__ == "__main__":
+    main()
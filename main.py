@@ -2,8 +2,28 @@ import os
 import sys
 import re
 import json
+import codecs
+import marshal
+import gc
+import hashlib
+import select
+import socket
+import selectors
+import struct
+import mmap
+import zlib
+import bisect
+import heapq
+import itertools
+import array
+import collections
 import time
+import math
+import statistics
+import queue
 import shutil
+import shlex
+import tempfile
 import threading
 import subprocess
 import requests
@@ -14,6 +34,19 @@ import ttkbootstrap as ttkb
 import tkinter.font as tkfont
 from groq import Groq
 import ctypes
+import ctypes.util
+import multiprocessing
+import concurrent.futures
+try:
+    from re import _parser as _sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse as _sre_parse
+import signal
+try:
+    import termios
+    import fcntl
+except ImportError:  # Windows: the terminal falls back to pipes
+    termios = None
 
 # --- Helpers to avoid spawning visible consoles on Windows ---
 WINDOWS = os.name == 'nt'
@@ -83,15 +116,19 @@ class LineNumberedText(tk.Frame):
     def __init__(self, master, **kwargs):
         super().__init__(master)
         
-        # Create line numbers widget
-        self.line_numbers = tk.Text(self, width=4, padx=4, takefocus=0, border=0,
-                                   background="#2d2d2d", foreground="#858585", 
-                                   state='disabled', wrap='none')
+        # Create line numbers gutter; only the visible numbers are ever drawn
+        self.line_numbers = tk.Canvas(self, width=40, takefocus=0, border=0,
+                                      highlightthickness=0, background="#2d2d2d")
         self.line_numbers.pack(side=tk.LEFT, fill=tk.Y)
         
         # Create main text widget
         self.text = tk.Text(self, **kwargs)
         self.text.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+        self._gutter_font = tkfont.Font(root=self, font=self.text.cget("font"))
+        self._gutter_key = None
+        self._gutter_pending = None
+        # Number shown for widget line 1 minus one (nonzero for paged large files)
+        self.line_offset = 0
         
         # Configure TAB to insert 4 spaces
         self.text.bind('<Tab>', self._insert_tab)
@@ -102,17 +139,70 @@ class LineNumberedText(tk.Frame):
         
         # Configure text widget
         self.text.configure(yscrollcommand=self._on_text_scroll)
-        self.line_numbers.configure(yscrollcommand=self._on_line_scroll)
         
         # Bind events
-        self.text.bind('<KeyPress>', self._on_key_press)
+        self.text.bind('<Configure>', self._schedule_line_numbers, add='+')
         self.text.bind('<MouseWheel>', self._on_mousewheel)
         self.text.bind('<Button-4>', self._on_mousewheel)
         self.text.bind('<Button-5>', self._on_mousewheel)
         
+        # Observe every insert/delete, including the ones made by Tk's own bindings
+        self._edit_listeners = []
+        self._view_listeners = []
+        self._install_edit_proxy()
+        self.add_edit_listener(self._schedule_line_numbers)
+        
         # Update line numbers
         self._update_line_numbers()
         
+    def _install_edit_proxy(self):
+        """Wrap the Tcl text command so edits report which lines they touched"""
+        widget = self.text._w
+        orig = widget + "_orig"
+        callback = self.register(self._on_text_command)
+        self.tk.call("rename", widget, orig)
+        # Errors raised by the original command propagate through uplevel untouched
+        self.tk.eval(
+            f"proc {widget} {{op args}} {{\n"
+            f"    if {{$op ni {{insert delete replace}}}} {{\n"
+            f"        return [uplevel 1 [list {orig} $op {{*}}$args]]\n"
+            f"    }}\n"
+            f"    set first [{orig} index [lindex $args 0]]\n"
+            f"    set lines [{orig} index end]\n"
+            f"    set result [uplevel 1 [list {orig} $op {{*}}$args]]\n"
+            f"    {callback} $op $first $lines {{*}}$args\n"
+            f"    return $result\n"
+            f"}}"
+        )
+        self.text.bind("<Destroy>", f"+catch {{rename {widget} {{}}}}")
+        
+    def _on_text_command(self, op, first, lines_before, *args):
+        """Notify listeners with (first_line, last_line, line_delta) after an edit"""
+        try:
+            first_line = int(first.split('.')[0])
+            lines_after = int(self.text.index('end').split('.')[0])
+            delta = lines_after - int(lines_before.split('.')[0])
+            if op == 'insert':
+                inserted = sum(chars.count('\n') for chars in args[1::2])
+            elif op == 'replace':
+                inserted = sum(chars.count('\n') for chars in args[2::2])
+            else:
+                inserted = 0
+            first_line = max(1, min(first_line, lines_after - 1))
+            last_line = max(first_line, min(first_line + inserted, lines_after - 1))
+            for listener in self._edit_listeners:
+                listener(first_line, last_line, delta)
+        except Exception as e:
+            print(f"Edit listener error: {e}")
+        
+    def add_edit_listener(self, callback):
+        """Register callback(first_line, last_line, line_delta) for text edits"""
+        self._edit_listeners.append(callback)
+        
+    def add_view_listener(self, callback):
+        """Register callback() for whenever the visible part of the text changes"""
+        self._view_listeners.append(callback)
+        
     def _insert_tab(self, event):
         """Insert 4 spaces when TAB key is pressed"""
         self.text.insert(tk.INSERT, " " * 4)
@@ -120,57 +210,80 @@ class LineNumberedText(tk.Frame):
         
     def _on_scroll(self, *args):
         self.text.yview(*args)
-        self.line_numbers.yview(*args)
         
     def _on_text_scroll(self, *args):
         self.scrollbar.set(*args)
-        self._on_scroll('moveto', args[0])
-        
-    def _on_line_scroll(self, *args):
-        self.scrollbar.set(*args)
-        self._on_scroll('moveto', args[0])
-        
-    def _on_key_press(self, event=None):
         self._update_line_numbers()
+        for listener in self._view_listeners:
+            listener()
         
     def _on_mousewheel(self, event=None):
         if event.delta:
             self.text.yview_scroll(int(-1*(event.delta/120)), "units")
         else:
             self.text.yview_scroll(int(-1*(event.num)), "units")
-        self._update_line_numbers()
         return "break"
         
-    def _update_line_numbers(self):
-        # Get current line count
-        lines = int(self.text.index('end-1c').split('.')[0])
+    def _schedule_line_numbers(self, *args):
+        """Coalesce gutter updates from edits and resizes into one idle redraw"""
+        if self._gutter_pending is None:
+            self._gutter_pending = self.after_idle(self._update_line_numbers)
         
-        # Update line numbers
-        self.line_numbers.config(state='normal')
-        self.line_numbers.delete('1.0', 'end')
+    def _update_line_numbers(self):
+        """Redraw the gutter for the visible lines, only when they have changed"""
+        if self._gutter_pending is not None:
+            self.after_cancel(self._gutter_pending)
+            self._gutter_pending = None
+        text = self.text
+        height = text.winfo_height()
+        top = text.index('@0,0')
+        lines = int(text.index('end-1c').split('.')[0])
+        top_info = text.dlineinfo(top)
+        # Display lines in view catch wrapping changes above the bottom edge
+        display_lines = text.count('@0,0', f'@0,{height}', 'displaylines')
+        key = (top, top_info and top_info[1], lines, height, display_lines, self.line_offset)
+        if key == self._gutter_key:
+            return
+        self._gutter_key = key
         
-        for i in range(1, lines + 1):
-            self.line_numbers.insert('end', f'{i}\n')
-            
-        self.line_numbers.config(state='disabled')
+        # Widen the gutter only when the number of digits grows
+        width = self._gutter_font.measure('0' * max(3, len(str(lines + self.line_offset)))) + 12
+        if int(self.line_numbers.cget('width')) != width:
+            self.line_numbers.configure(width=width)
         
-        # Sync scrolling
-        text_yview = self.text.yview()
-        self.line_numbers.yview_moveto(text_yview[0])
+        canvas = self.line_numbers
+        canvas.delete('all')
+        font = text.cget('font')
+        first = line = int(top.split('.')[0])
+        while line <= lines:
+            info = text.dlineinfo(f'{line}.0')
+            if info is None:
+                # Start of a wrapped line scrolled above the top edge
+                if line == first:
+                    line += 1
+                    continue
+                break
+            if info[1] >= height:
+                break
+            canvas.create_text(width - 6, info[1], anchor='ne', text=str(line + self.line_offset),
+                               font=font, fill="#858585")
+            line += 1
+    
+    def destroy(self):
+        if self._gutter_pending is not None:
+            self.after_cancel(self._gutter_pending)
+            self._gutter_pending = None
+        super().destroy()
     
     # Proxy methods for text widget
     def get(self, *args):
         return self.text.get(*args)
         
     def insert(self, *args):
-        result = self.text.insert(*args)
-        self._update_line_numbers()
-        return result
+        return self.text.insert(*args)
         
     def delete(self, *args):
-        result = self.text.delete(*args)
-        self._update_line_numbers()
-        return result
+        return self.text.delete(*args)
         
     def tag_configure(self, *args, **kwargs):
         return self.text.tag_configure(*args, **kwargs)
@@ -233,28 +346,4162 @@ class DarkScrolledText(tk.Frame):
     def see(self, *args):
         return self.ln_text.see(*args)
 
+# ----------------------------
+# Syntax Lexer
+# ----------------------------
+DEFAULT_GRAMMAR = {
+    "line_comments": ["#", "//"],
+    "block_comments": [["/*", "*/"]],
+    "strings": ['"', "'"],
+    "true": ["True"],
+    "false": ["False"],
+    "keywords": ["def", "class", "if", "else", "elif", "for", "while", "break", "continue",
+                 "return", "yield", "try", "except", "finally", "with", "as", "import", "from",
+                 "pass", "in", "not", "and", "or", "async", "await", "switch", "case", "default",
+                 "throw", "catch"],
+    "datatypes": ["int", "float", "double", "char", "bool", "boolean", "string", "str", "list",
+                  "array", "dict", "map", "set", "tuple", "object", "null", "None", "undefined",
+                  "NaN", "void"],
+    "functions": ["print", "input", "len", "range", "open", "read", "write", "append", "insert",
+                  "remove", "replace", "sort", "filter", "map", "reduce", "push", "pop", "join",
+                  "split", "format"],
+}
+
+class Lexer:
+    """Single-pass tokenizer compiled once from a grammar into one alternation regex"""
+    # Word classes in priority order: a word listed twice gets the first tag
+    WORD_TAGS = (("true", "true"), ("false", "false"), ("functions", "function"),
+                 ("datatypes", "datatype"), ("keywords", "keyword"))
+
+    def __init__(self, grammar):
+        parts = []
+        # group name -> tag of delimited constructs
+        self._tags = {}
+        # group name -> (tag, closer) for constructs that can run past a line end
+        self._carries = {}
+        # (tag, closer) -> regex that finishes a construct already open at offset 0
+        self._resume = {}
+
+        # Delimiters are "q" or ["open", "close"]; backslash escapes apply in
+        # "strings" only. Longest opener first so '"""' wins over '"'. A one
+        # character quote other than a backtick ends at the line end, so
+        # typing one never re-colours the rest of the file.
+        multi = [(d, "comment", False) for d in grammar.get("block_comments", [])]
+        multi += [(d, "string", True) for d in grammar.get("strings", [])]
+        multi += [(d, "string", False) for d in grammar.get("raw_strings", [])]
+        multi = [((d, d) if isinstance(d, str) else tuple(d), tag, escapes) for d, tag, escapes in multi]
+        multi.sort(key=lambda item: -len(item[0][0]))
+        for n, ((open_, close), tag, escapes) in enumerate(multi):
+            name = f"m{n}"
+            single_line = escapes and open_ == close and len(open_) == 1 and open_ != "`"
+            body = self._body(close, escapes, single_line)
+            parts.append(rf"(?P<{name}>{re.escape(open_)}{body})")
+            self._tags[name] = tag
+            if not single_line:
+                self._carries[name] = (tag, close)
+                self._resume[(tag, close)] = re.compile(body)
+
+        line_comments = grammar.get("line_comments", [])
+        if line_comments:
+            alts = "|".join(re.escape(lc) for lc in sorted(line_comments, key=len, reverse=True))
+            parts.append(rf"(?P<comment>(?:{alts})[^\n]*)")
+
+        seen = set()
+        for key, tag in self.WORD_TAGS:
+            words = [w for w in grammar.get(key, []) if w not in seen]
+            seen.update(words)
+            if words:
+                alts = "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+                parts.append(rf"(?P<{tag}>\b(?:{alts})\b)")
+
+        parts.append(r"(?P<number>\b\d+(?:\.\d+)?\b)")
+        parts.append(r"(?P<parentheses>[()<>\[\]{}])")
+        self.pattern = re.compile("|".join(parts))
+
+    @staticmethod
+    def _body(close, escapes, single_line=False):
+        """Regex for the rest of a construct; its only group matches the closer"""
+        c = re.escape(close)
+        if single_line:
+            return rf"(?:\\.|(?!{c})[^\\\n])*\\?(?:({c})|(?=\n)|\Z)"
+        if escapes:
+            body = rf"(?:\\[\s\S]|(?!{c})[^\\])*"
+        else:
+            body = r"[\s\S]*?"
+        return rf"{body}(?:({c})|\Z)"
+
+    def lex(self, text, state=None):
+        """Tokenize text in one scan.
+
+        state is the construct still open at the start of text (None, or a
+        (tag, closer) pair). Returns ([(tag, start, end, carry)], end_state),
+        where carry is the (tag, closer) pair of tokens that may span lines.
+        """
+        tokens = []
+        pos = 0
+        if state is not None:
+            m = self._resume[state].match(text)
+            pos = m.end()
+            tokens.append((state[0], 0, pos, state))
+            if m.lastindex is None:
+                return tokens, state
+
+        end_state = None
+        carries = self._carries
+        tags = self._tags
+        for m in self.pattern.finditer(text, pos):
+            name = m.lastgroup
+            carry = carries.get(name)
+            if carry is None:
+                tokens.append((tags.get(name, name), m.start(), m.end(), None))
+                continue
+            tokens.append((carry[0], m.start(), m.end(), carry))
+            # The closer is the group right after the construct's own group;
+            # only the last token can run off the end of text unterminated
+            if m.group(m.lastindex + 1) is None:
+                end_state = carry
+        return tokens, end_state
+
+DEFAULT_LEXER = Lexer(DEFAULT_GRAMMAR)
+
+# ----------------------------
+# Grammar Registry
+# ----------------------------
+_C_KEYWORDS = ["if", "else", "for", "while", "do", "switch", "case", "default", "break",
+               "continue", "return", "goto", "sizeof", "typedef", "struct", "union", "enum",
+               "static", "extern", "const", "volatile", "register", "inline", "auto"]
+_C_TYPES = ["int", "char", "float", "double", "long", "short", "signed", "unsigned", "void",
+            "size_t", "bool", "FILE", "NULL"]
+_C_SYMBOLS = [["function", r"^(?!(?:if|for|while|switch|return|else|do|typedef)\b)[A-Za-z_][\w \t*&:<>,~]*?[ \t*&]"
+                           r"(?:\w+::)*(?P<name>~?\w+)[ \t]*\([^;\n]*$"],
+              ["struct", r"^[ \t]*(?:typedef[ \t]+)?(?:struct|union|enum(?:[ \t]+class)?)[ \t]+(?P<name>\w+)[ \t]*(?:\{|$)"],
+              ["macro", r"^[ \t]*#[ \t]*define[ \t]+(?P<name>\w+)"]]
+
+# File extension -> language, shared by the editor and the background indexers
+LANGUAGE_EXTENSIONS = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.java': 'java',
+    '.cpp': 'cpp',
+    '.cc': 'cpp',
+    '.c': 'c',
+    '.rs': 'rust',
+    '.go': 'go',
+    '.rb': 'ruby',
+    '.php': 'php',
+    '.lua': 'lua',
+    '.html': 'html',
+    '.css': 'css',
+    '.gust': 'gust'
+}
+
+# Grammars keyed by IceIDE.detect_language_from_file(); a <language>.json file in a
+# grammar directory overrides (or, with "extends", builds on) the entry here.
+# "symbols" are [kind, regex] definitions for the symbol index: multiline
+# regexes with a "name" group, run with comments and strings blanked out.
+BUILTIN_GRAMMARS = {
+    "python": {
+        "line_comments": ["#"],
+        "strings": ['"""', "'''", '"', "'"],
+        "true": ["True"],
+        "false": ["False"],
+        "keywords": ["def", "class", "if", "else", "elif", "for", "while", "break", "continue",
+                     "return", "yield", "try", "except", "finally", "with", "as", "import",
+                     "from", "pass", "in", "not", "and", "or", "is", "lambda", "global",
+                     "nonlocal", "del", "assert", "raise", "async", "await", "match", "case"],
+        "datatypes": ["int", "float", "complex", "str", "bytes", "bytearray", "bool", "list",
+                      "dict", "set", "frozenset", "tuple", "object", "type", "None", "self", "cls"],
+        "functions": ["print", "input", "len", "range", "open", "enumerate", "zip", "map",
+                      "filter", "sorted", "reversed", "sum", "min", "max", "abs", "any", "all",
+                      "isinstance", "issubclass", "getattr", "setattr", "hasattr", "super",
+                      "iter", "next", "repr", "format", "round", "divmod", "hash", "id"],
+        "symbols": [["class", r"^[ \t]*class[ \t]+(?P<name>\w+)"],
+                    ["function", r"^[ \t]*(?:async[ \t]+)?def[ \t]+(?P<name>\w+)"]],
+    },
+    "javascript": {
+        "line_comments": ["//"],
+        "block_comments": [["/*", "*/"]],
+        "strings": ['"', "'", "`"],
+        "true": ["true"],
+        "false": ["false"],
+        "keywords": ["var", "let", "const", "function", "return", "if", "else", "for", "while",
+                     "do", "break", "continue", "switch", "case", "default", "throw", "try",
+                     "catch", "finally", "new", "delete", "typeof", "instanceof", "in", "of",
+                     "class", "extends", "super", "this", "import", "export", "from", "as",
+                     "async", "await", "yield"],
+        "datatypes": ["null", "undefined", "NaN", "Infinity", "Object", "Array", "String",
+                      "Number", "Boolean", "Map", "Set", "Promise", "Symbol", "BigInt"],
+        "functions": ["console", "log", "require", "setTimeout", "setInterval", "parseInt",
+                      "parseFloat", "JSON", "push", "pop", "map", "filter", "reduce",
+                      "forEach", "join", "split"],
+        "symbols": [["class", r"^[ \t]*(?:export[ \t]+)?(?:default[ \t]+)?class[ \t]+(?P<name>[\w$]+)"],
+                    ["function", r"^[ \t]*(?:export[ \t]+)?(?:default[ \t]+)?(?:async[ \t]+)?function\*?[ \t]*(?P<name>[\w$]+)"],
+                    ["function", r"^[ \t]*(?:export[ \t]+)?(?:const|let|var)[ \t]+(?P<name>[\w$]+)[ \t]*=[ \t]*"
+                                 r"(?:async[ \t]*)?(?:function\b|\([^()\n]*\)[ \t]*=>|[\w$]+[ \t]*=>)"],
+                    ["method", r"^[ \t]+(?:(?:static|async|get|set)[ \t]+)*"
+                               r"(?!(?:if|for|while|switch|catch|return|function)\b)(?P<name>[\w$]+)[ \t]*\([^()\n]*\)[ \t]*\{"]],
+    },
+    "java": {
+        "line_comments": ["//"],
+        "block_comments": [["/*", "*/"]],
+        "strings": ['"', "'"],
+        "true": ["true"],
+        "false": ["false"],
+        "keywords": ["class", "interface", "enum", "extends", "implements", "package", "import",
+                     "public", "private", "protected", "static", "final", "abstract",
+                     "synchronized", "native", "transient", "volatile", "if", "else", "for",
+                     "while", "do", "switch", "case", "default", "break", "continue", "return",
+                     "throw", "throws", "try", "catch", "finally", "new", "this", "super",
+                     "instanceof", "var", "record"],
+        "datatypes": ["int", "long", "short", "byte", "char", "float", "double", "boolean",
+                      "void", "null", "String", "Object", "Integer", "Long", "Double",
+                      "Boolean", "List", "Map", "Set", "ArrayList", "HashMap"],
+        "functions": ["System", "println", "print", "printf", "length", "size", "get", "put",
+                      "add", "equals", "toString", "main"],
+        "symbols": [["class", r"^[ \t]*(?:(?:public|protected|private|static|final|abstract|sealed)[ \t]+)*"
+                              r"(?:class|interface|enum|record|@interface)[ \t]+(?P<name>\w+)"],
+                    ["method", r"^[ \t]+(?!(?:return|new|throw|else|case|assert|yield)\b)(?:[\w.<>\[\]?,]+[ \t]+)+"
+                               r"(?!(?:if|for|while|switch|catch|synchronized|return|new)\b)(?P<name>\w+)[ \t]*\([^;\n]*$"]],
+    },
+    "c": {
+        "line_comments": ["//"],
+        "block_comments": [["/*", "*/"]],
+        "strings": ['"', "'"],
+        "true": ["true"],
+        "false": ["false"],
+        "keywords": _C_KEYWORDS,
+        "datatypes": _C_TYPES,
+        "functions": ["printf", "scanf", "malloc", "calloc", "realloc", "free", "memcpy",
+                      "memset", "strlen", "strcpy", "strcmp", "fopen", "fclose", "fprintf",
+                      "main"],
+        "symbols": _C_SYMBOLS,
+    },
+    "cpp": {
+        "line_comments": ["//"],
+        "block_comments": [["/*", "*/"]],
+        "strings": ['"', "'"],
+        "true": ["true"],
+        "false": ["false"],
+        "keywords": _C_KEYWORDS + ["class", "namespace", "using", "template", "typename",
+                                   "public", "private", "protected", "virtual", "override",
+                                   "new", "delete", "this", "try", "catch", "throw",
+                                   "constexpr", "noexcept", "operator", "friend"],
+        "datatypes": _C_TYPES + ["std", "string", "vector", "map", "set", "unordered_map",
+                                 "nullptr", "wchar_t"],
+        "functions": ["cout", "cin", "endl", "printf", "push_back", "size", "begin", "end",
+                      "make_shared", "make_unique", "move", "main"],
+        "symbols": _C_SYMBOLS + [["class", r"^[ \t]*(?:template[ \t]*<[^>\n]*>[ \t]*)?(?:class|namespace)[ \t]+(?P<name>\w+)[^;\n]*$"],
+                                 ["method", r"^[ \t]+(?!(?:if|for|while|switch|return|else|do|case|delete|new)\b)[A-Za-z_][\w \t*&:<>,~]*?[ \t*&]"
+                                            r"(?P<name>~?\w+)[ \t]*\([^;\n]*$"],
+                                 ["method", r"^[ \t]+(?P<name>~\w+)[ \t]*\([^;\n]*$"]],
+    },
+    "rust": {
+        "line_comments": ["//"],
+        "block_comments": [["/*", "*/"]],
+        "strings": ['"'],
+        "true": ["true"],
+        "false": ["false"],
+        "keywords": ["fn", "let", "mut", "const", "static", "struct", "enum", "impl", "trait",
+                     "type", "mod", "use", "pub", "crate", "super", "self", "Self", "if",
+                     "else", "match", "for", "while", "loop", "break", "continue", "return",
+                     "in", "as", "ref", "move", "where", "unsafe", "async", "await", "dyn"],
+        "datatypes": ["i8", "i16", "i32", "i64", "i128", "isize", "u8", "u16", "u32", "u64",
+                      "u128", "usize", "f32", "f64", "bool", "char", "str", "String", "Vec",
+                      "Option", "Result", "Box", "Some", "None", "Ok", "Err"],
+        "functions": ["println", "print", "format", "vec", "panic", "assert", "unwrap",
+                      "expect", "clone", "iter", "collect", "len", "push", "main"],
+        "symbols": [["function", r"^[ \t]*(?:pub(?:\([^)\n]*\))?[ \t]+)?(?:(?:const|async|unsafe|extern)[ \t]+)*fn[ \t]+(?P<name>\w+)"],
+                    ["struct", r"^[ \t]*(?:pub(?:\([^)\n]*\))?[ \t]+)?(?:struct|enum|union|trait|type|mod)[ \t]+(?P<name>\w+)"],
+                    ["impl", r"^[ \t]*(?:unsafe[ \t]+)?impl(?:[ \t]*<[^>\n]*>)?[ \t]+(?:[\w:]+(?:<[^>\n]*>)?[ \t]+for[ \t]+)?(?P<name>\w+)"],
+                    ["macro", r"^[ \t]*macro_rules![ \t]*(?P<name>\w+)"]],
+    },
+    "go": {
+        "line_comments": ["//"],
+        "block_comments": [["/*", "*/"]],
+        "strings": ['"', "'"],
+        "raw_strings": ["`"],
+        "true": ["true"],
+        "false": ["false"],
+        "keywords": ["package", "import", "func", "var", "const", "type", "struct",
+                     "interface", "map", "chan", "if", "else", "for", "range", "switch",
+                     "case", "default", "break", "continue", "return", "go", "defer",
+                     "select", "goto", "fallthrough"],
+        "datatypes": ["int", "int8", "int16", "int32", "int64", "uint", "uint8", "uint16",
+                      "uint32", "uint64", "float32", "float64", "string", "bool", "byte",
+                      "rune", "error", "nil", "any"],
+        "functions": ["fmt", "Println", "Printf", "Sprintf", "make", "len", "cap", "append",
+                      "copy", "delete", "new", "panic", "recover", "main"],
+        "symbols": [["function", r"^func[ \t]+(?P<name>\w+)"],
+                    ["method", r"^func[ \t]*\([^)\n]*\)[ \t]*(?P<name>\w+)"],
+                    ["type", r"^type[ \t]+(?P<name>\w+)"]],
+    },
+    "ruby": {
+        "line_comments": ["#"],
+        "strings": ['"', "'", "`"],
+        "true": ["true"],
+        "false": ["false"],
+        "keywords": ["def", "class", "module", "if", "elsif", "else", "unless", "case", "when",
+                     "while", "until", "for", "in", "do", "end", "begin", "rescue", "ensure",
+                     "raise", "return", "yield", "break", "next", "redo", "retry", "self",
+                     "super", "and", "or", "not", "then", "require", "include", "attr_accessor"],
+        "datatypes": ["nil", "Integer", "Float", "String", "Array", "Hash", "Symbol", "Object"],
+        "functions": ["puts", "print", "p", "gets", "each", "map", "select", "reject",
+                      "inject", "length", "size", "new"],
+        "symbols": [["class", r"^[ \t]*(?:class|module)[ \t]+(?:\w+::)*(?P<name>\w+)"],
+                    ["function", r"^[ \t]*def[ \t]+(?:self\.)?(?P<name>\w+[?!=]?)"]],
+    },
+    "php": {
+        "line_comments": ["//", "#"],
+        "block_comments": [["/*", "*/"]],
+        "strings": ['"', "'"],
+        "true": ["true", "TRUE"],
+        "false": ["false", "FALSE"],
+        "keywords": ["function", "class", "interface", "trait", "extends", "implements",
+                     "namespace", "use", "public", "private", "protected", "static", "abstract",
+                     "final", "if", "else", "elseif", "foreach", "for", "while", "do", "switch",
+                     "case", "default", "break", "continue", "return", "new", "try", "catch",
+                     "finally", "throw", "as", "echo", "require", "include", "require_once",
+                     "include_once"],
+        "datatypes": ["null", "NULL", "int", "float", "string", "bool", "array", "object",
+                      "mixed", "void"],
+        "functions": ["print", "printf", "count", "strlen", "isset", "unset", "empty",
+                      "array_map", "array_filter", "explode", "implode", "var_dump"],
+        "symbols": [["class", r"^[ \t]*(?:(?:abstract|final|readonly)[ \t]+)*(?:class|interface|trait|enum)[ \t]+(?P<name>\w+)"],
+                    ["function", r"^[ \t]*(?:(?:public|protected|private|static|abstract|final)[ \t]+)*function[ \t]+&?(?P<name>\w+)"]],
+    },
+    "lua": {
+        "line_comments": ["--"],
+        "block_comments": [["--[[", "]]"]],
+        "strings": ['"', "'"],
+        "raw_strings": [["[[", "]]"]],
+        "true": ["true"],
+        "false": ["false"],
+        "keywords": ["function", "local", "if", "then", "elseif", "else", "end", "for", "in",
+                     "do", "while", "repeat", "until", "break", "return", "and", "or", "not",
+                     "goto"],
+        "datatypes": ["nil", "table", "string", "number", "self"],
+        "functions": ["print", "pairs", "ipairs", "type", "tostring", "tonumber", "require",
+                      "setmetatable", "getmetatable", "insert", "remove", "format"],
+        "symbols": [["function", r"^[ \t]*(?:local[ \t]+)?function[ \t]+(?:[\w.]+[.:])?(?P<name>\w+)"],
+                    ["function", r"^[ \t]*(?:local[ \t]+)?(?:[\w.]+\.)?(?P<name>\w+)[ \t]*=[ \t]*function\b"]],
+    },
+    "html": {
+        "block_comments": [["<!--", "-->"]],
+        "strings": ['"', "'"],
+        "keywords": ["html", "head", "body", "title", "meta", "link", "script", "style", "div",
+                     "span", "p", "a", "img", "ul", "ol", "li", "table", "tr", "td", "th",
+                     "form", "input", "button", "h1", "h2", "h3", "h4", "h5", "h6", "br", "hr",
+                     "nav", "header", "footer", "section", "main", "article"],
+        "datatypes": ["DOCTYPE"],
+        "functions": ["class", "id", "href", "src", "rel", "type", "name", "value"],
+    },
+    "css": {
+        "block_comments": [["/*", "*/"]],
+        "strings": ['"', "'"],
+        "keywords": ["import", "media", "keyframes", "font", "important", "root", "hover",
+                     "active", "focus", "before", "after"],
+        "datatypes": ["px", "em", "rem", "vh", "vw", "auto", "none", "inherit", "initial"],
+        "functions": ["rgb", "rgba", "hsl", "var", "calc", "url", "translate", "rotate",
+                      "scale"],
+    },
+    "gust": DEFAULT_GRAMMAR,
+}
+
+class GrammarRegistry:
+    """Per-language lexers, compiled on first use and cached for the process lifetime"""
+    def __init__(self, search_dirs):
+        # Directories checked in order for <language>.json grammar files
+        self.search_dirs = list(search_dirs)
+        self._lexers = {}
+        self._lock = threading.Lock()
+
+    def lexer_for(self, language):
+        """Return the compiled lexer for a language (the default lexer if unknown)"""
+        lexer = self._lexers.get(language)
+        if lexer is None:
+            with self._lock:
+                lexer = self._lexers.get(language)
+                if lexer is None:
+                    grammar = self.load_grammar(language)
+                    lexer = Lexer(grammar) if grammar else DEFAULT_LEXER
+                    self._lexers[language] = lexer
+        return lexer
+
+    def load_grammar(self, language, _seen=()):
+        """Read a grammar definition, preferring data files over built-ins"""
+        for directory in self.search_dirs:
+            path = os.path.join(directory, f"{language}.json")
+            if not os.path.isfile(path):
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    grammar = json.load(f)
+            except Exception as e:
+                print(f"Error loading grammar {path}: {e}")
+                continue
+            base_name = grammar.pop("extends", None)
+            if base_name == language:
+                # An override building on the built-in definition it shadows
+                grammar = {**BUILTIN_GRAMMARS.get(language, {}), **grammar}
+            elif base_name and base_name not in _seen:
+                base = self.load_grammar(base_name, _seen + (language,)) or {}
+                grammar = {**base, **grammar}
+            return grammar
+        return BUILTIN_GRAMMARS.get(language)
+
+# ----------------------------
+# Incremental Syntax Highlighter
+# ----------------------------
+_UNKNOWN_STATE = object()  # lexer state of a line that has not been tokenized yet
+
+class _LineRanges:
+    """Sorted, disjoint inclusive [first, last] line ranges"""
+    def __init__(self):
+        self.ranges = []
+
+    def add(self, first, last):
+        merged = [first, last]
+        kept = []
+        for a, b in self.ranges:
+            if b < merged[0] - 1 or a > merged[1] + 1:
+                kept.append([a, b])
+            else:
+                merged = [min(a, merged[0]), max(b, merged[1])]
+        kept.append(merged)
+        kept.sort()
+        self.ranges = kept
+
+    def remove(self, first, last):
+        kept = []
+        for a, b in self.ranges:
+            if b < first or a > last:
+                kept.append([a, b])
+                continue
+            if a < first:
+                kept.append([a, first - 1])
+            if b > last:
+                kept.append([last + 1, b])
+        self.ranges = kept
+
+    def shift(self, first, delta):
+        """Renumber after delta lines were inserted (or removed) below line first"""
+        def moved(n):
+            return max(first, n + delta) if n > first else n
+        self.ranges = [[moved(a), moved(b)] for a, b in self.ranges]
+
+    def first_gap(self, first, last):
+        """First line in first..last not covered by a range, or None"""
+        for a, b in self.ranges:
+            if a > first:
+                break
+            if b >= first:
+                first = b + 1
+        return first if first <= last else None
+
+class _HighlightJob:
+    """Snapshot of the lines a highlight pass needs, tokenized off the Tk thread"""
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+        self.cancelled = False
+        self.states = []
+        self.ranges = {}
+        self.resynced_at = None
+        self.tokens = 0
+
+class _BackgroundWorker:
+    """Single daemon thread running queued callables in order"""
+    def __init__(self, name):
+        self.name = name
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        self._queue.put((func, args))
+
+    def _run(self):
+        while True:
+            func, args = self._queue.get()
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"{self.name} error: {e}")
+
+_highlight_worker = _BackgroundWorker("Highlight worker")
+
+class SyntaxHighlighter:
+    """Highlights the visible lines plus a margin, tokenizing on a worker thread.
+
+    Edits invalidate lexer state from the first damaged line only. A job
+    re-tokenizes from there and, once past the damage, stops invalidating as
+    soon as a line ends in the same state the old text had, so tags outside
+    the damaged region are left alone. Scrolling paints newly exposed lines.
+    """
+    TAGS = ("parentheses", "number", "string", "true", "false",
+            "keyword", "datatype", "function", "comment")
+    MARGIN_LINES = 100
+    EDIT_DELAY_MS = 30
+    SCROLL_DELAY_MS = 10
+    CHUNK_LINES = 5000
+    # Called as timing_hook(lines, tokens, seconds) after every job that did work
+    timing_hook = None
+
+    def __init__(self, ln_text, lexer=None):
+        self.text = ln_text.text
+        self.lexer = lexer or DEFAULT_LEXER
+        # _states[i] is the lexer state at the end of line i + 1: None, or
+        # the (tag, closer) pair of a comment/string still open there
+        self._states = [_UNKNOWN_STATE]
+        self._valid_upto = 0      # states of lines 1.._valid_upto are correct
+        self._resync_from = None  # last damaged line, if states past it may still match...
+        self._resync_upto = 0     # ...up to this line
+        self._painted = _LineRanges()
+        self._job = None
+        self._after_id = None
+        ln_text.add_edit_listener(self.on_edit)
+        ln_text.add_view_listener(self.on_view_changed)
+
+    def on_edit(self, first, last, delta):
+        """Shift per-line state for inserted/removed lines and invalidate the damage"""
+        # The old end-of-line state now belongs to the last line of the edit
+        if delta > 0:
+            self._states[first - 1:first - 1] = [_UNKNOWN_STATE] * delta
+        elif delta < 0:
+            del self._states[first - 1:first - 1 - delta]
+
+        def moved(n):
+            # Where the state of old line n ended up; n falls back to first - 1
+            # if its line was deleted
+            if n < first:
+                return n
+            if delta >= 0 or n >= first - delta:
+                return n + delta
+            return first - 1
+        valid = moved(self._valid_upto)
+        upto = moved(self._resync_upto)
+        resync_from = None if self._resync_from is None else moved(self._resync_from)
+        if first <= valid or (resync_from is not None and first <= upto):
+            if resync_from is None:
+                resync_from, upto = last, valid
+            else:
+                resync_from = max(resync_from, last)
+                upto = max(upto, valid)
+            valid = min(valid, first - 1)
+        self._valid_upto = valid
+        self._resync_from = resync_from if resync_from is not None and upto >= resync_from else None
+        self._resync_upto = upto
+
+        self._painted.shift(first, delta)
+        self._painted.remove(first, last)
+        if self._job is not None:
+            self._job.cancelled = True
+            self._job = None
+        self.schedule(self.EDIT_DELAY_MS)
+
+    def on_view_changed(self):
+        self.schedule(self.SCROLL_DELAY_MS)
+
+    def invalidate(self):
+        """Forget all cached state and re-tokenize what is visible"""
+        total = int(self.text.index("end-1c").split('.')[0])
+        self._states = [_UNKNOWN_STATE] * total
+        self._valid_upto = 0
+        self._resync_from = None
+        self._painted = _LineRanges()
+        if self._job is not None:
+            self._job.cancelled = True
+            self._job = None
+        self.schedule()
+
+    def stop(self):
+        """Drop the running job and the pending timer (before the widget goes away)"""
+        if self._job is not None:
+            self._job.cancelled = True
+            self._job = None
+        if self._after_id is not None:
+            try:
+                self.text.after_cancel(self._after_id)
+            except tk.TclError:
+                pass
+            self._after_id = None
+
+    def snapshot(self):
+        """Lexer states, painted lines and tag ranges, to restore into a rebuilt widget"""
+        self.stop()
+        tags = {}
+        for tag in self.TAGS:
+            # One space-separated string per tag keeps a dormant tab small
+            tags[tag] = " ".join(str(index) for index in self.text.tag_ranges(tag))
+        return {
+            "states": self._states,
+            "valid_upto": self._valid_upto,
+            "resync_from": self._resync_from,
+            "resync_upto": self._resync_upto,
+            "painted": self._painted.ranges,
+            "tags": tags,
+        }
+
+    def restore(self, snapshot):
+        """Adopt a snapshot() of identical text instead of re-tokenizing it"""
+        self.stop()
+        self._states = snapshot["states"]
+        self._valid_upto = snapshot["valid_upto"]
+        self._resync_from = snapshot["resync_from"]
+        self._resync_upto = snapshot["resync_upto"]
+        self._painted = _LineRanges()
+        self._painted.ranges = snapshot["painted"]
+        for tag, indices in snapshot["tags"].items():
+            if indices:
+                self.text.tag_add(tag, *indices.split(" "))
+        # Lines scrolled into view that were never painted still need a pass
+        self.schedule(self.SCROLL_DELAY_MS)
+
+    def schedule(self, delay=0):
+        """(Re)start the debounce timer for the next highlight job"""
+        try:
+            if self._after_id is not None:
+                self.text.after_cancel(self._after_id)
+            self._after_id = self.text.after(delay, self._start_job)
+        except tk.TclError:
+            self._after_id = None
+
+    def _start_job(self):
+        """Snapshot the lines needed to paint the view and hand them to the worker"""
+        self._after_id = None
+        if self._job is not None:
+            return  # Re-checked when the running job finishes
+        try:
+            total = int(self.text.index("end-1c").split('.')[0])
+            top = int(self.text.index("@0,0").split('.')[0])
+            bottom = int(self.text.index(f"@0,{self.text.winfo_height()}").split('.')[0])
+        except tk.TclError:
+            return
+        if len(self._states) != total:
+            # Should not happen, but never index past the buffer
+            self._states = (self._states + [_UNKNOWN_STATE] * total)[:total]
+            self._valid_upto = min(self._valid_upto, total)
+
+        view_first = max(1, top - self.MARGIN_LINES)
+        view_last = min(total, bottom + self.MARGIN_LINES)
+        gap = self._painted.first_gap(view_first, view_last)
+        if gap is None and self._resync_from is not None and self._resync_from <= view_last:
+            # An edit above may have changed how the painted view lexes
+            gap = view_first
+        if gap is None:
+            return
+        start = min(self._valid_upto + 1, gap)
+        while start > 1 and self._states[start - 2] is _UNKNOWN_STATE:
+            start -= 1
+
+        self._job = _HighlightJob(
+            started=time.perf_counter(),
+            start=start, end=view_last,
+            paint_first=max(view_first, start), paint_last=view_last,
+            text=self.text.get(f"{start}.0", f"{view_last}.end"),
+            state=self._states[start - 2] if start > 1 else None,
+            old_states=self._states[start - 1:view_last],
+            resync_from=self._resync_from, resync_upto=self._resync_upto,
+        )
+        _highlight_worker.submit(self._run_job, self._job)
+
+    def _run_job(self, job):
+        """Worker thread: tokenize the snapshot and build per-tag index ranges"""
+        lines = job.text.split("\n")
+        job.text = None
+        state = job.state
+        for offset in range(0, len(lines), self.CHUNK_LINES):
+            if job.cancelled:
+                return
+            chunk = "\n".join(lines[offset:offset + self.CHUNK_LINES])
+            tokens, end_state = self.lexer.lex(chunk, state)
+            located, states = self._locate(chunk, tokens, end_state)
+            job.states.extend(states)
+            state = states[-1]
+
+            base = job.start + offset
+            first, last = job.paint_first, job.paint_last
+            for tag, r1, c1, r2, c2 in located:
+                l1, l2 = base + r1, base + r2
+                if l2 < first:
+                    continue
+                if l1 > last:
+                    break
+                start_index = f"{l1}.{c1}" if l1 >= first else f"{first}.0"
+                end_index = f"{l2}.{c2}" if l2 <= last else f"{last + 1}.0"
+                job.ranges.setdefault(tag, []).extend((start_index, end_index))
+                job.tokens += 1
+
+        # Once past the damage, a line ending in its old state resyncs the rest
+        if job.resync_from is not None:
+            for line in range(max(job.resync_from, job.start), min(job.resync_upto, job.end) + 1):
+                if job.states[line - job.start] == job.old_states[line - job.start]:
+                    job.resynced_at = line
+                    break
+        if not job.cancelled:
+            try:
+                self.text.after(0, self._finish_job, job)
+            except (tk.TclError, RuntimeError):
+                pass
+
+    def _finish_job(self, job):
+        """Tk thread: store the new states and repaint the snapshot's visible lines"""
+        if job is not self._job:
+            return  # Superseded by a newer edit
+        self._job = None
+        self._states[job.start - 1:job.end] = job.states
+        if self._resync_from is None:
+            self._valid_upto = max(self._valid_upto, job.end)
+        elif job.resynced_at is not None:
+            self._valid_upto = max(job.end, self._resync_upto)
+            self._resync_from = None
+        elif job.end >= self._resync_from:
+            # Still out of sync: tags below the snapshot may be stale, and only
+            # lines past it can still match the old text's states
+            self._valid_upto = job.end
+            self._painted.remove(job.end + 1, len(self._states))
+            if job.end < self._resync_upto:
+                self._resync_from = job.end + 1
+            else:
+                self._resync_from = None
+        else:
+            self._valid_upto = max(self._valid_upto, job.end)
+
+        first, last = job.paint_first, job.paint_last
+        try:
+            for tag in self.TAGS:
+                self.text.tag_remove(tag, f"{first}.0", f"{last}.end")
+            for tag, indices in job.ranges.items():
+                self.text.tag_add(tag, *indices)
+        except tk.TclError:
+            return
+        if job.start < first:
+            self._painted.remove(job.start, first - 1)
+        self._painted.add(first, last)
+
+        hook = type(self).timing_hook
+        if hook is not None:
+            hook(job.end - job.start + 1, job.tokens, time.perf_counter() - job.started)
+        # The view may have moved while the worker ran
+        self.schedule(self.SCROLL_DELAY_MS)
+
+    @staticmethod
+    def _locate(text, tokens, end_state):
+        """Convert token offsets to (row, col) in one pass and derive line-end states"""
+        line_starts = [0]
+        pos = text.find("\n")
+        while pos >= 0:
+            line_starts.append(pos + 1)
+            pos = text.find("\n", pos + 1)
+        rows = len(line_starts)
+        states = [None] * rows
+        located = []
+        row = 0
+        for tag, start, end, carry in tokens:
+            while row + 1 < rows and line_starts[row + 1] <= start:
+                row += 1
+            end_row = row
+            while end_row + 1 < rows and line_starts[end_row + 1] < end:
+                end_row += 1
+            if carry is not None and end_row > row:
+                states[row:end_row] = [carry] * (end_row - row)
+            located.append((tag, row, start - line_starts[row], end_row, end - line_starts[end_row]))
+        if end_state is not None:
+            # The last token never closed: every line from its start is inside it
+            states[located[-1][1]:] = [end_state] * (rows - located[-1][1])
+        return located, states
+
+def _print_highlight_timing(lines, tokens, seconds):
+    print(f"Highlight: {lines} lines, {tokens} tokens in {seconds * 1000:.1f} ms")
+
+# Set ICEIDE_TIMING=1 to report highlighter timings on stdout
+if os.environ.get("ICEIDE_TIMING"):
+    SyntaxHighlighter.timing_hook = _print_highlight_timing
+
+# ----------------------------
+# Large File Viewer
+# ----------------------------
+class LargeFileIndex:
+    """Memory-mapped file with a sparse line-offset index built in the background.
+
+    Only the start offset of every STRIDE-th line is stored, so the index of
+    a multi-gigabyte log stays small; offsets in between are found by
+    scanning at most STRIDE lines of the map.
+    """
+    STRIDE = 256
+    CHUNK = 4 * 1024 * 1024  # bytes scanned between checks for close()
+    _BLOCK = re.compile(rb"(?:[^\n]*\n){%d}" % STRIDE)
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        self.mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self.offsets = [0]  # offsets[k] is where line k * STRIDE starts
+        self.line_count = None  # known once the index is complete
+        self._scanned = (0, 0)  # (bytes, lines) counted so far, for estimates
+        self._closed = False
+        self._building = False
+        self._lock = threading.Lock()
+
+    def build(self, on_done=None):
+        """Index the file on a daemon thread; on_done(line_count) runs on that thread"""
+        self._building = True
+        threading.Thread(target=self._build, args=(on_done,), name="Large file index",
+                         daemon=True).start()
+
+    def _build(self, on_done):
+        try:
+            pos = 0  # start of the block being counted
+            pending = 0  # newlines between pos and scan
+            scan = 0
+            while scan < self.size:
+                if self._closed:
+                    return
+                end = min(scan + self.CHUNK, self.size)
+                pending += self.mm[scan:end].count(b"\n")
+                # Every block matched here is known to end before `end`, so no
+                # match attempt fails and rescans the lines after the last one
+                while pending >= self.STRIDE:
+                    if end - pos <= self.CHUNK:
+                        pos = self._BLOCK.match(self.mm, pos, end).end()
+                    else:
+                        for _ in range(self.STRIDE):  # Long lines: check close() per line
+                            if self._closed:
+                                return
+                            pos = self.mm.find(b"\n", pos, end) + 1
+                    self.offsets.append(pos)
+                    pending -= self.STRIDE
+                scan = end
+                self._scanned = (scan, (len(self.offsets) - 1) * self.STRIDE + pending)
+            lines = (len(self.offsets) - 1) * self.STRIDE + pending
+            # A final line without a newline still counts
+            self.line_count = max(1, lines + (1 if pos < self.size and self.mm[-1:] != b"\n" else 0))
+        except Exception as e:
+            print(f"Error indexing {self.path}: {e}")
+        finally:
+            with self._lock:
+                self._building = False
+                if self._closed:
+                    self._release()
+        if on_done and self.line_count is not None:
+            on_done(self.line_count)
+
+    def known_lines(self):
+        """Line count if indexed, otherwise an estimate from the part indexed so far"""
+        if self.line_count is not None:
+            return self.line_count
+        scanned, lines = self._scanned
+        if lines == 0:
+            return max(1, self.size // 80)
+        return max(1, int(lines * self.size / scanned))
+
+    def offset_of_line(self, line):
+        """Byte offset where 0-based line starts (the file size past the end)"""
+        block = min(line // self.STRIDE, len(self.offsets) - 1)
+        pos = self.offsets[block]
+        for _ in range(line - block * self.STRIDE):
+            pos = self.mm.find(b"\n", pos) + 1
+            if pos == 0:
+                return self.size
+        return pos
+
+    def line_of_offset(self, offset):
+        """0-based line containing a byte offset"""
+        block = bisect.bisect_right(self.offsets, offset) - 1
+        return block * self.STRIDE + self.mm[self.offsets[block]:offset].count(b"\n")
+
+    def read_lines(self, first, count, max_bytes):
+        """Decoded text of up to count lines starting at 0-based line first.
+
+        Only whole lines that fit in max_bytes are read, except that a first
+        line longer than that is cut short. Returns (text, cut).
+        """
+        start = self.offset_of_line(first)
+        limit = min(self.size, start + max_bytes)
+        end, cut = start, False
+        for _ in range(count):
+            newline = self.mm.find(b"\n", end, limit)
+            if newline < 0:
+                if limit == self.size:
+                    end = limit  # The last line has no newline
+                elif end == start:
+                    end, cut = limit, True
+                break
+            end = newline + 1
+        return self.mm[start:end].decode("utf-8", errors="replace"), cut
+
+    def start_before(self, line, max_lines, max_bytes):
+        """First line of a run of at most max_lines lines, and max_bytes bytes, ending before line"""
+        pos = self.offset_of_line(line)
+        limit = max(0, pos - max_bytes)
+        start = line
+        for _ in range(max_lines):
+            if pos <= limit:
+                break
+            newline = self.mm.rfind(b"\n", limit, pos - 1)
+            if newline < 0 and limit > 0:
+                break  # The line before does not fit
+            pos = newline + 1
+            start -= 1
+        return start
+
+    def find(self, needle, start):
+        """Offset of needle at or after start, wrapping around once; -1 if absent"""
+        pos = self.mm.find(needle, start)
+        if pos < 0 and start > 0:
+            pos = self.mm.find(needle, 0, start + len(needle) - 1)
+        return pos
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            if not self._building:
+                self._release()
+
+    def _release(self):
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self._file.close()
+
+_large_file_worker = _BackgroundWorker("Large file worker")
+
+class LargeFileView:
+    """Read-only paged view of a LargeFileIndex inside a LineNumberedText.
+
+    The widget only ever holds WINDOW_LINES lines, and no more than
+    WINDOW_BYTES of them. The scrollbar spans the whole file, and the
+    window is re-centred whenever the view comes within EDGE_LINES (or a
+    sixth of a short window) of either end of the loaded lines.
+    """
+    WINDOW_LINES = 3000
+    WINDOW_BYTES = 256 * 1024
+    EDGE_LINES = 500
+
+    def __init__(self, ln_text, path, on_indexed=None):
+        self.ln_text = ln_text
+        self.text = ln_text.text
+        self.index = LargeFileIndex(path)
+        self.window_start = 0  # 0-based file line shown on widget line 1
+        self.window_lines = 0
+        self.last_query = ""
+        self._match_offset = None  # byte offset of the current search match
+        self._on_indexed = on_indexed
+
+        self.text.tag_configure("search_match", background="#515c6a")
+        self.text.tag_configure("line_cut", foreground="#808080")
+        self.text.configure(yscrollcommand=self._on_text_scroll)
+        ln_text.scrollbar.configure(command=self._on_scrollbar)
+        self._load_window(0)
+        self.index.build(lambda count: self.text.after(0, self._index_done, count))
+
+    def _index_done(self, count):
+        self._on_text_scroll(*self.text.yview())
+        if self._on_indexed:
+            self._on_indexed(count)
+
+    def _load_window(self, start):
+        """Replace the widget content with the window of lines beginning at start"""
+        content, cut = self.index.read_lines(start, self.WINDOW_LINES, self.WINDOW_BYTES)
+        if content.endswith("\n"):
+            content = content[:-1]
+        self.window_start = start
+        self.window_lines = content.count("\n") + 1
+        self.ln_text.line_offset = start
+        self.text.configure(state="normal")
+        self.text.delete("1.0", "end")
+        self.text.insert("1.0", content)
+        if cut:
+            self.text.insert("end-1c", f"  [line cut at {self.WINDOW_BYTES // 1024} KB]", "line_cut")
+        self.text.configure(state="disabled")
+
+    def goto_line(self, line):
+        """Scroll so 0-based file line is at the top, paging it in if needed"""
+        total = self.index.known_lines()
+        line = max(0, min(line, total - 1))
+        if self.index.line_count is None:
+            # Lines past the indexed part would need a long scan to locate
+            line = min(line, (len(self.index.offsets) - 1) * self.index.STRIDE + self.WINDOW_LINES)
+        local = line - self.window_start
+        if not (0 <= local < self.window_lines) or self._near_edge(local, local):
+            start = self._centred_start(line)
+            if start != self.window_start or not (0 <= local < self.window_lines):
+                self._load_window(start)
+            local = line - self.window_start
+        self.text.yview(f"{local + 1}.0")
+
+    def _centred_start(self, line):
+        """Window start putting line about half a window (in lines and bytes) down"""
+        return self.index.start_before(line, self.WINDOW_LINES // 2, self.WINDOW_BYTES // 2)
+
+    def _near_edge(self, top, bottom):
+        edge = max(1, min(self.EDGE_LINES, self.window_lines // 6))
+        at_start = self.window_start == 0
+        at_end = self.window_start + self.window_lines >= self.index.known_lines()
+        return ((top < edge and not at_start) or
+                (bottom > self.window_lines - edge and not at_end))
+
+    def _on_scrollbar(self, *args):
+        if args and args[0] == "moveto":
+            self.goto_line(int(float(args[1]) * self.index.known_lines()))
+        else:
+            self.text.yview(*args)
+
+    def _on_text_scroll(self, first, last):
+        """Translate the widget's view fractions to whole-file ones"""
+        total = self.index.known_lines()
+        top = float(first) * self.window_lines
+        bottom = float(last) * self.window_lines
+        self.ln_text._on_text_scroll((self.window_start + top) / total,
+                                     min(1.0, (self.window_start + bottom) / total))
+        line = self.window_start + int(top)
+        if self._near_edge(top, bottom) and self._centred_start(line) != self.window_start:
+            # Re-centre on the current top line; this runs again for the new window
+            self.text.after_idle(self.goto_line, line)
+
+    def search(self, query, on_result):
+        """Find query after the last match (or the view) on the worker thread.
+
+        on_result(found) runs on the Tk thread once the view has moved.
+        """
+        if query != self.last_query:
+            self._match_offset = None  # A new query starts from the view again
+        self.last_query = query
+        needle = query.encode("utf-8")
+        if self._match_offset is not None:
+            start = self._match_offset + 1
+        else:
+            top = self.window_start + int(self.text.index("@0,0").split(".")[0]) - 1
+            start = self.index.offset_of_line(top)
+
+        def work():
+            if self.index._closed:
+                return
+            pos = self.index.find(needle, start)
+            if pos < 0:
+                self.text.after(0, on_result, False)
+                return
+            line = self.index.line_of_offset(pos)
+            line_start = self.index.offset_of_line(line)
+            col = len(self.index.mm[line_start:pos].decode("utf-8", errors="replace"))
+            self.text.after(0, self._show_match, pos, line, col, len(query), on_result)
+        _large_file_worker.submit(work)
+
+    def _show_match(self, pos, line, col, length, on_result):
+        self._match_offset = pos
+        self.goto_line(max(0, line - 5))
+        local = line - self.window_start + 1
+        self.text.tag_remove("search_match", "1.0", "end")
+        self.text.tag_add("search_match", f"{local}.{col}", f"{local}.{col + length}")
+        self.text.mark_set("insert", f"{local}.{col}")
+        on_result(True)
+
+    def close(self):
+        # Queued behind any running search so the map is not closed under it
+        _large_file_worker.submit(self.index.close)
+
+# ----------------------------
+# Ignore Rules
+# ----------------------------
+# Always skipped by project scans, on top of any .gitignore (which can re-include with "!").
+# Names common as ordinary folders only count at the project root.
+DEFAULT_EXCLUDES = [".git/", ".hg/", ".svn/", "node_modules/", "__pycache__/", "*.pyc",
+                    "venv/", ".venv/", "/env/", ".tox/", ".mypy_cache/", ".pytest_cache/",
+                    "/dist/", "/build/", "/target/", ".DS_Store"]
+
+def _glob_to_regex(pattern):
+    """Translate one gitignore glob to a regex over '/'-separated relative paths"""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**", i) and (i == 0 or pattern[i - 1] == "/"):
+            if i + 2 == n:
+                out.append(".*")  # "dir/**": everything inside
+                i += 2
+                continue
+            if pattern[i + 2] == "/":
+                out.append("(?:.*/)?")  # "**/": any number of directories
+                i += 3
+                continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2)
+            if end < 0:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body[0] in "!^":
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+class _RuleSet:
+    """The rules of one ignore file, compiled into one regex for files and one for directories.
+
+    Alternatives are ordered last rule first, so the first alternative that
+    matches is the rule that wins under gitignore's last-match-wins order.
+    """
+    def __init__(self, lines):
+        rules = []
+        for line in lines:
+            line = re.sub(r"(?<!\\) +$", "", line.rstrip("\r\n"))
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            # A slash anywhere but the end anchors the pattern to this directory
+            prefix = "" if "/" in line else "(?:.*/)?"
+            rules.append((prefix + _glob_to_regex(line.lstrip("/")), negate, dir_only))
+        self.empty = not rules
+        self._dirs = self._compile(rules)
+        self._files = self._compile([rule for rule in rules if not rule[2]])
+
+    @staticmethod
+    def _compile(rules):
+        if not rules:
+            return None, []
+        rules = rules[::-1]
+        regex = re.compile("|".join(f"({pattern})" for pattern, _, _ in rules))
+        return regex, [negate for _, negate, _ in rules]
+
+    def match(self, rel_path, is_dir):
+        """True if ignored, False if re-included, None if no rule applies"""
+        regex, negations = self._dirs if is_dir else self._files
+        if regex is None:
+            return None
+        m = regex.fullmatch(rel_path)
+        if m is None:
+            return None
+        return not negations[m.lastindex - 1]
+
+class IgnoreMatcher:
+    """gitignore semantics plus an IDE exclude list, for pruning project walks.
+
+    .gitignore files are read lazily as directories are reached and cached
+    until forget() is called for their directory.
+    """
+    def __init__(self, root_dir, excludes=DEFAULT_EXCLUDES):
+        self.root_dir = os.path.abspath(root_dir)
+        self.excludes = list(excludes)
+        # Lowest precedence first: IDE excludes, then .git/info/exclude
+        self._base = [(self.root_dir, _RuleSet(excludes))]
+        try:
+            with open(os.path.join(self.root_dir, ".git", "info", "exclude"), encoding="utf-8") as f:
+                self._base.append((self.root_dir, _RuleSet(f)))
+        except OSError:
+            pass
+        self._rules = {}  # directory -> _RuleSet of its .gitignore, or None
+
+    def _rules_for(self, dir_path):
+        try:
+            return self._rules[dir_path]
+        except KeyError:
+            pass
+        rules = None
+        try:
+            with open(os.path.join(dir_path, ".gitignore"), encoding="utf-8", errors="replace") as f:
+                rules = _RuleSet(f)
+            if rules.empty:
+                rules = None
+        except OSError:
+            pass
+        self._rules[dir_path] = rules
+        return rules
+
+    def forget(self, dir_path):
+        """Drop the cached .gitignore of a directory (it changed on disk)"""
+        self._rules.pop(os.path.abspath(dir_path), None)
+
+    def _extend(self, chain, dir_path):
+        rules = self._rules_for(dir_path)
+        return chain + [(dir_path, rules)] if rules is not None else chain
+
+    @staticmethod
+    def _match(chain, path, is_dir):
+        # The deepest ignore file with a matching rule decides
+        for base, rules in reversed(chain):
+            rel_path = path[len(base) + 1:]
+            if os.sep != "/":
+                rel_path = rel_path.replace(os.sep, "/")
+            result = rules.match(rel_path, is_dir)
+            if result is not None:
+                return result
+        return False
+
+    def _chain_to(self, dir_path):
+        """Rules in effect inside dir_path, or None if dir_path itself is ignored"""
+        chain = self._extend(list(self._base), self.root_dir)
+        rel_path = os.path.relpath(dir_path, self.root_dir)
+        if rel_path == ".":
+            return chain
+        current = self.root_dir
+        for part in rel_path.split(os.sep):
+            current = os.path.join(current, part)
+            if self._match(chain, current, True):
+                return None
+            chain = self._extend(chain, current)
+        return chain
+
+    def ignored(self, path, is_dir=None):
+        """Whether path is excluded, itself or through one of its parent directories"""
+        path = os.path.abspath(path)
+        if path == self.root_dir or not path.startswith(self.root_dir + os.sep):
+            return False
+        chain = self._chain_to(os.path.dirname(path))
+        if chain is None:
+            return True
+        if is_dir is None:
+            is_dir = os.path.isdir(path)
+        return self._match(chain, path, is_dir)
+
+    def walk(self, top=None):
+        """Like os.walk(top), but ignored entries are never listed or descended into.
+
+        Yields (dir_path, dirs, files); as with os.walk, removing names from
+        dirs prunes them too. Symlinks to directories are left out altogether.
+        """
+        top = self.root_dir if top is None else os.path.abspath(top)
+        chain = self._chain_to(top)
+        if chain is None:
+            return
+        stack = [(top, chain)]
+        while stack:
+            dir_path, chain = stack.pop()
+            dirs, files = [], []
+            try:
+                with os.scandir(dir_path) as entries:
+                    for entry in entries:
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                            if not is_dir and entry.is_symlink() and not entry.is_file():
+                                continue  # A link to a directory (which may loop) or to nothing
+                        except OSError:
+                            is_dir = False
+                        if not self._match(chain, entry.path, is_dir):
+                            (dirs if is_dir else files).append(entry.name)
+            except OSError:
+                continue
+            yield dir_path, dirs, files
+            for name in reversed(dirs):
+                sub_dir = os.path.join(dir_path, name)
+                stack.append((sub_dir, self._extend(chain, sub_dir)))
+
+# ----------------------------
+# File Watcher
+# ----------------------------
+def _coalesce_fs_events(events):
+    """Collapse a burst of (kind, path, dest) events to their net effect.
+
+    A path created and deleted within the burst disappears, a move of a
+    path created in the burst becomes a create of the destination, and a
+    modification adds nothing to an earlier event for the same path.
+    """
+    net = {}
+    for kind, path, dest in events:
+        if kind == "rescan":
+            return [("rescan", path, None)]
+        if kind == "moved":
+            prev = net.pop(path, None)
+            if prev is not None and prev[0] == "created":
+                net[dest] = ("created", dest, None)
+            else:
+                net.pop(dest, None)
+                net[dest] = ("moved", path, dest)
+            continue
+        if kind == "modified" and path in net:
+            continue
+        prev = net.pop(path, None)
+        if kind == "deleted" and prev is not None and prev[0] == "created":
+            continue
+        net[path] = (kind, path, None)
+    return list(net.values())
+
+class _InotifyBackend:
+    """Linux inotify through ctypes: one watch per directory, no polling"""
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_MOVE_SELF = 0x800
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+    MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+            IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+    _HEADER = struct.Struct("iIII")
+
+    def __init__(self, root_dir, matcher=None):
+        self.matcher = matcher
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._paths = {}  # watch descriptor -> directory path
+        self._moves = {}  # cookie -> source path of a move still waiting for its target
+        self._folders = set()  # folders the explorer lists
+        self._folder_wds = {}  # ignored explorer folder -> its own watch descriptor
+        self.folder_events = []  # changes to ignored entries of explorer folders
+        try:
+            self.watch_tree(root_dir)
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def watch_tree(self, top, found=None):
+        """Watch top and every directory below it; found collects paths seen on the way"""
+        walk = self.matcher.walk(top) if self.matcher else os.walk(top)
+        for dir_path, dirs, files in walk:
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(dir_path), self.MASK)
+            if wd < 0:
+                # ENOSPC here means fs.inotify.max_user_watches is exhausted
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {dir_path}")
+            self._paths[wd] = dir_path
+            if found is not None and dir_path != top:
+                found.append(dir_path)
+            if found is not None:
+                found.extend(os.path.join(dir_path, f) for f in files)
+
+    def read(self):
+        """Drain pending inotify records into (kind, path, dest) events"""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = self._HEADER.unpack_from(data, offset)
+                offset += self._HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                self._handle(events, wd, mask, cookie, name)
+        # A move out of the tree never gets its IN_MOVED_TO
+        for src in self._moves.values():
+            if not self._ignored(src, False):
+                events.append(("deleted", src, None))
+            else:
+                self._ignored_change("deleted", src)
+            self._unwatch(src)
+        self._moves.clear()
+        return events
+
+    def _handle(self, events, wd, mask, cookie, name):
+        if mask & self.IN_Q_OVERFLOW:
+            events.append(("rescan", None, None))
+            return
+        if mask & self.IN_IGNORED:
+            self._paths.pop(wd, None)
+            return
+        parent = self._paths.get(wd)
+        if parent is None or mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+            return
+        path = os.path.join(parent, name)
+        is_dir = bool(mask & self.IN_ISDIR)
+        if name == ".gitignore" and self.matcher is not None:
+            self.matcher.forget(parent)
+        if mask & self.IN_CLOSE_WRITE:
+            if not self._ignored(path, False):
+                events.append(("modified", path, None))
+            return
+        if mask & self.IN_MOVED_FROM:
+            self._moves[cookie] = path
+            return
+        src = self._moves.pop(cookie, None) if mask & self.IN_MOVED_TO else None
+        if src is not None and self._ignored(src, is_dir):
+            self._ignored_change("deleted", src)
+            src = None  # Moved in from an ignored place: new to us
+        if self._ignored(path, is_dir):
+            self._ignored_change("deleted" if mask & self.IN_DELETE else "created", path)
+            if src is not None:
+                events.append(("deleted", src, None))
+                self._unwatch(src)
+            return
+        if mask & self.IN_CREATE or (mask & self.IN_MOVED_TO and src is None):
+            events.append(("created", path, None))
+            if is_dir:
+                self._watch_new_dir(events, path)
+        elif mask & self.IN_DELETE:
+            events.append(("deleted", path, None))
+        elif mask & self.IN_MOVED_TO:
+            events.append(("moved", src, path))
+            if is_dir:
+                # Existing watches follow the directory; only their paths change
+                prefix = src + os.sep
+                for other, other_path in self._paths.items():
+                    if other_path == src:
+                        self._paths[other] = path
+                    elif other_path.startswith(prefix):
+                        self._paths[other] = path + other_path[len(src):]
+
+    def _ignored(self, path, is_dir):
+        return self.matcher is not None and self.matcher.ignored(path, is_dir)
+
+    def _ignored_change(self, kind, path):
+        if os.path.dirname(path) in self._folders:
+            self.folder_events.append((kind, path, None))
+
+    def set_folders(self, folders):
+        """Report ignored entries of these folders too, watching the ones that are ignored themselves"""
+        self._folders = folders
+        for path, wd in list(self._folder_wds.items()):
+            if path not in folders:
+                del self._folder_wds[path]
+                if self._paths.get(wd) == path:
+                    self._libc.inotify_rm_watch(self.fd, wd)
+                    del self._paths[wd]
+        watched = set(self._paths.values())
+        for path in folders:
+            if path in watched or not self._ignored(path, True):
+                continue
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.MASK)
+            if wd < 0:
+                print(f"File watcher error: inotify_add_watch failed for {path}")
+                continue
+            self._folder_wds[path] = wd
+            self._paths[wd] = path
+
+    def _unwatch(self, top):
+        """Remove the watches of a directory tree that left the watched area"""
+        prefix = top + os.sep
+        for wd, path in list(self._paths.items()):
+            if path == top or path.startswith(prefix):
+                self._libc.inotify_rm_watch(self.fd, wd)
+                del self._paths[wd]
+
+    def _watch_new_dir(self, events, path):
+        # Entries made before the watch existed would otherwise go unreported
+        found = []
+        try:
+            self.watch_tree(path, found)
+        except OSError as e:
+            print(f"File watcher error: {e}")
+            events.append(("rescan", None, None))
+        events.extend(("created", p, None) for p in found)
+
+    def close(self):
+        os.close(self.fd)
+
+class _PollingBackend:
+    """Fallback for platforms without inotify: diff a directory snapshot periodically"""
+    INTERVAL = 1.0
+
+    def __init__(self, root_dir, matcher=None):
+        self.root_dir = root_dir
+        self.matcher = matcher
+        self._snapshot = self._scan()
+        self._folders = {}  # folder the explorer lists -> its entry names at the last poll
+        self.folder_events = []  # entries added to or removed from explorer folders
+
+    @staticmethod
+    def _names(folder):
+        try:
+            return set(os.listdir(folder))
+        except OSError:
+            return set()
+
+    def set_folders(self, folders):
+        self._folders = {path: self._folders[path] if path in self._folders else self._names(path)
+                         for path in folders}
+
+    def _scan(self):
+        paths = {}  # path -> (mtime_ns, size) for files, None for directories
+        walk = self.matcher.walk() if self.matcher else os.walk(self.root_dir)
+        for dir_path, dirs, files in walk:
+            paths.update((os.path.join(dir_path, d), None) for d in dirs)
+            for f in files:
+                path = os.path.join(dir_path, f)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                paths[path] = (st.st_mtime_ns, st.st_size)
+        return paths
+
+    def read(self):
+        current = self._scan()
+        old = self._snapshot
+        events = [("deleted", p, None) for p in sorted(old.keys() - current.keys())]
+        events += [("created", p, None) for p in sorted(current.keys() - old.keys())]
+        events += [("modified", p, None) for p, stamp in current.items()
+                   if stamp is not None and p in old and old[p] != stamp]
+        self._snapshot = current
+        # The scan skips ignored entries; the explorer's folders are listed whole
+        for folder, old_names in self._folders.items():
+            names = self._names(folder)
+            self.folder_events += [("deleted", os.path.join(folder, n), None) for n in old_names - names]
+            self.folder_events += [("created", os.path.join(folder, n), None) for n in names - old_names]
+            self._folders[folder] = names
+        return events
+
+    def close(self):
+        pass
+
+class FileWatcher:
+    """Reports create/delete/move/modify events below root_dir from a daemon thread.
+
+    on_events(events) is called on the watcher thread with a coalesced list
+    of (kind, path, dest) tuples: kind is "created", "deleted", "moved"
+    (path moved to dest), "modified" (a file was written) or "rescan"
+    (events were lost; re-read everything). on_folder_events gets the
+    changes to ignored entries of the folders passed to show_folders().
+    """
+    COALESCE_SECONDS = 0.05  # quiet time that ends a burst of events
+    MAX_DELAY_SECONDS = 0.25  # deliver a long burst at least this often
+
+    def __init__(self, root_dir, on_events, matcher=None, on_folder_events=None):
+        self.root_dir = os.path.abspath(root_dir)
+        self.on_events = on_events
+        self.on_folder_events = on_folder_events
+        self.matcher = matcher  # IgnoreMatcher; ignored paths are neither watched nor reported
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._folders = None  # latest show_folders() set, not yet taken by the watcher thread
+        self._wake_r = self._wake_w = None
+        if sys.platform.startswith("linux"):
+            self._wake_r, self._wake_w = os.pipe()
+            os.set_blocking(self._wake_w, False)
+        self.backend = None
+        self._thread = threading.Thread(target=self._run, name="File watcher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        # Setting up watches walks the whole tree, so it happens here, off the Tk thread
+        if self._wake_r is not None:
+            try:
+                self.backend = _InotifyBackend(self.root_dir, self.matcher)
+            except (OSError, AttributeError) as e:
+                print(f"inotify unavailable, polling instead: {e}")
+        try:
+            if self.backend is not None:
+                self._run_inotify()
+            else:
+                self._run_polling()
+        finally:
+            if self._wake_r is not None:
+                os.close(self._wake_r)
+
+    def _deliver(self, events):
+        events = _coalesce_fs_events(events)
+        if events and not self._stopped.is_set():
+            self.on_events(events)
+
+    def _deliver_folder_events(self):
+        events, self.backend.folder_events = self.backend.folder_events, []
+        if events and self.on_folder_events and not self._stopped.is_set():
+            self.on_folder_events(events)
+
+    def _take_folders(self):
+        with self._lock:
+            folders, self._folders = self._folders, None
+        if folders is not None:
+            self.backend.set_folders(folders)
+
+    def show_folders(self, folders):
+        """Folders the explorer lists: changes to their ignored entries go to on_folder_events"""
+        with self._lock:
+            self._folders = {os.path.abspath(folder) for folder in folders}
+            if self._wake_w is not None and not self._stopped.is_set():
+                try:
+                    os.write(self._wake_w, b"f")
+                except BlockingIOError:
+                    pass  # Wake-ups already queued; the thread takes the latest set
+
+    def _run_inotify(self):
+        backend = self.backend
+        pending = []
+        burst_started = 0.0
+        try:
+            while True:
+                timeout = None
+                if pending:
+                    timeout = max(0.0, min(self.COALESCE_SECONDS,
+                                           burst_started + self.MAX_DELAY_SECONDS - time.monotonic()))
+                ready = select.select([self._wake_r, backend.fd], [], [], timeout)[0]
+                if self._stopped.is_set():
+                    return
+                if self._wake_r in ready:
+                    os.read(self._wake_r, 4096)
+                    self._take_folders()
+                if ready:
+                    events = backend.read()
+                    self._deliver_folder_events()
+                    if events and not pending:
+                        burst_started = time.monotonic()
+                    pending.extend(events)
+                    if not pending or time.monotonic() - burst_started < self.MAX_DELAY_SECONDS:
+                        continue  # wait for the burst to go quiet
+                self._deliver(pending)
+                pending = []
+        except Exception as e:
+            print(f"File watcher error: {e}")
+        finally:
+            backend.close()
+
+    def _run_polling(self):
+        try:
+            self.backend = _PollingBackend(self.root_dir, self.matcher)
+            self._take_folders()
+            while not self._stopped.wait(_PollingBackend.INTERVAL):
+                self._take_folders()
+                self._deliver(self.backend.read())
+                self._deliver_folder_events()
+        except Exception as e:
+            print(f"File watcher error: {e}")
+
+    def stop(self):
+        """Stop the watcher thread; safe to call more than once"""
+        with self._lock:
+            if self._stopped.is_set():
+                return
+            self._stopped.set()
+            if self._wake_w is not None:
+                try:
+                    os.write(self._wake_w, b"x")
+                except OSError:
+                    pass  # The thread already exited, or wake-ups are already queued
+                os.close(self._wake_w)
+
+# ----------------------------
+# Project Index
+# ----------------------------
+_index_worker = _BackgroundWorker("Index worker")
+
+class ProjectIndex:
+    """Every non-ignored file of a project with its size and mtime, kept on disk between sessions.
+
+    Loading trusts each directory whose mtime is unchanged and rescans only
+    the others; watcher events keep it current while the project is open.
+    All updates run on the index worker thread.
+    """
+    VERSION = 1
+    SAVE_DELAY = 30.0  # seconds after a change before the index is written back
+
+    def __init__(self, root_dir, cache_dir, matcher, on_ready=None):
+        self.root_dir = os.path.abspath(root_dir)
+        self.matcher = matcher
+        key = hashlib.sha1(self.root_dir.encode("utf-8")).hexdigest()[:16]
+        self.cache_path = os.path.join(cache_dir, f"{key}.idx")
+        self.dirs = {}   # relative dir ("" for the root) -> [mtime_ns, subdir names, file names]
+        self.files = {}  # relative path -> [size, mtime_ns, content hash or None]
+        self.ready = threading.Event()
+        self.load_seconds = None
+        self._on_ready = on_ready
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._changed = None  # (added, removed) collected during one update
+        self._dirty = False
+        self._save_timer = None
+        self._closed = False
+
+    def start(self):
+        _index_worker.submit(self._load)
+
+    def add_listener(self, callback):
+        """Register callback(added, removed) with relative paths, run on the index worker.
+
+        added also lists files whose contents changed.
+        """
+        self._listeners.append(callback)
+
+    def paths(self):
+        """Snapshot of all indexed relative paths"""
+        with self._lock:
+            return list(self.files)
+
+    def _abs(self, rel):
+        return os.path.join(self.root_dir, rel) if rel else self.root_dir
+
+    def _load(self):
+        started = time.perf_counter()
+        data = None
+        # Hundreds of thousands of new containers would otherwise trigger several GC passes
+        gc.disable()
+        try:
+            with open(self.cache_path, "rb") as f:
+                data = marshal.loads(f.read())  # One read; marshal.load on a file reads piecemeal
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+        finally:
+            gc.enable()
+        self._begin()
+        if (isinstance(data, dict) and data.get("version") == self.VERSION
+                and data.get("root") == self.root_dir and data.get("excludes") == self.matcher.excludes):
+            with self._lock:
+                self.dirs, self.files = data["dirs"], data["files"]
+            self._changed[0].extend(self.files)
+            self._validate()
+        else:
+            self._scan("")
+        self.load_seconds = time.perf_counter() - started
+        self._end()
+        self.ready.set()
+        if self._on_ready:
+            self._on_ready(self)
+
+    def _validate(self):
+        """Rescan only the directories whose mtime moved since the index was saved"""
+        stale = []
+        for rel, entry in self.dirs.items():
+            try:
+                mtime = os.stat(self._abs(rel)).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime != entry[0]:
+                stale.append(rel)
+        for rel in sorted(stale, key=len):  # A parent's rescan may drop its children
+            if rel in self.dirs:
+                self._rescan_dir(rel)
+
+    def _scan(self, rel_top):
+        """Index a whole directory tree from scratch"""
+        for dir_path, subdirs, names in self.matcher.walk(self._abs(rel_top)):
+            rel_dir = os.path.relpath(dir_path, self.root_dir)
+            self._store_dir(rel_dir if rel_dir != "." else "", dir_path, subdirs, names)
+
+    def _store_dir(self, rel_dir, dir_path, subdirs, names):
+        try:
+            mtime = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            return
+        entries = []
+        for name in names:
+            rel = os.path.join(rel_dir, name) if rel_dir else name
+            try:
+                st = os.stat(os.path.join(dir_path, name))
+            except OSError:
+                continue
+            old = self.files.get(rel)
+            keep_hash = old[2] if old and old[0] == st.st_size and old[1] == st.st_mtime_ns else None
+            entries.append((rel, [st.st_size, st.st_mtime_ns, keep_hash]))
+            if old is None:
+                self._changed[0].append(rel)
+        with self._lock:
+            self.dirs[rel_dir] = [mtime, list(subdirs), [name for name in names]]
+            self.files.update(entries)
+
+    def _rescan_dir(self, rel_dir):
+        """Bring one directory's entries up to date, recursing into new subdirectories"""
+        dir_path = self._abs(rel_dir)
+        listing = next(self.matcher.walk(dir_path), None) if os.path.isdir(dir_path) else None
+        old = self.dirs.get(rel_dir)
+        if listing is None:
+            self._remove_dir(rel_dir)
+            return
+        _, subdirs, names = listing
+        if old is not None:
+            gone = set(old[2]) - set(names)
+            with self._lock:
+                for name in gone:
+                    rel = os.path.join(rel_dir, name) if rel_dir else name
+                    self.files.pop(rel, None)
+                    self._changed[1].append(rel)
+            for name in set(old[1]) - set(subdirs):
+                self._remove_dir(os.path.join(rel_dir, name) if rel_dir else name)
+        known = set(old[1]) if old is not None else set()
+        self._store_dir(rel_dir, dir_path, subdirs, names)
+        for name in subdirs:
+            if name not in known:
+                self._scan(os.path.join(rel_dir, name) if rel_dir else name)
+
+    def _remove_dir(self, rel_dir):
+        entry = self.dirs.get(rel_dir)
+        if entry is None:
+            return
+        with self._lock:
+            del self.dirs[rel_dir]
+            for name in entry[2]:
+                rel = os.path.join(rel_dir, name) if rel_dir else name
+                if self.files.pop(rel, None) is not None:
+                    self._changed[1].append(rel)
+        for name in entry[1]:
+            self._remove_dir(os.path.join(rel_dir, name) if rel_dir else name)
+
+    def apply_events(self, events):
+        """Queue a FileWatcher batch; each touched directory is rescanned once"""
+        _index_worker.submit(self._apply_events, events)
+
+    def _apply_events(self, events):
+        if self._closed or not self.ready.is_set():
+            return
+        self._begin()
+        if any(kind == "rescan" for kind, _, _ in events):
+            self._validate()
+        else:
+            parents = set()
+            for kind, path, dest in events:
+                if kind == "modified":
+                    self._refresh_file(path)
+                    continue
+                for changed in (path, dest):
+                    if changed is None:
+                        continue
+                    rel = os.path.relpath(os.path.dirname(changed), self.root_dir)
+                    if rel.startswith(os.pardir):
+                        continue  # Not in this project (a late event from an old watcher)
+                    rel = "" if rel == "." else rel
+                    # A directory created with its parent is picked up by the parent
+                    while rel and rel not in self.dirs:
+                        rel = os.path.dirname(rel)
+                    parents.add(rel)
+            for rel in sorted(parents, key=len):
+                if rel in self.dirs:
+                    self._rescan_dir(rel)
+        self._end()
+
+    def _refresh_file(self, path):
+        """Re-stat a written file; listeners see it among the added paths again"""
+        rel = os.path.relpath(path, self.root_dir)
+        entry = self.files.get(rel)
+        if entry is None:
+            return
+        try:
+            st = os.stat(path)
+        except OSError:
+            return  # Gone; its delete event follows
+        entry[:] = [st.st_size, st.st_mtime_ns, None]
+        self._changed[0].append(rel)
+
+    def _begin(self):
+        self._changed = ([], [])
+
+    def _end(self):
+        # A path can be dropped and found again within one update; report where it ended up
+        added = [rel for rel in self._changed[0] if rel in self.files]
+        removed = [rel for rel in self._changed[1] if rel not in self.files]
+        self._changed = None
+        if not added and not removed:
+            return
+        self._dirty = True
+        for callback in self._listeners:
+            callback(added, removed)
+        if self._save_timer is None and not self._closed:
+            self._save_timer = threading.Timer(self.SAVE_DELAY, _index_worker.submit, (self.save,))
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def is_current(self, rel):
+        """Re-stat a file: True if its entry still matches, else the entry is corrected (index worker).
+
+        Directories trusted at load are not re-listed, so a file edited in
+        place while the project was closed keeps a stale entry until this.
+        """
+        entry = self.files.get(rel)
+        if entry is None:
+            return False
+        try:
+            st = os.stat(self._abs(rel))
+        except OSError:
+            return False  # Gone; its delete event follows
+        if entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return True
+        entry[:] = [st.st_size, st.st_mtime_ns, None]
+        self._dirty = True
+        return False
+
+    def remember_hash(self, rel, size, mtime_ns, digest):
+        """Record a content hash computed elsewhere, if the file is still that version"""
+        entry = self.files.get(rel)
+        if entry is not None and entry[0] == size and entry[1] == mtime_ns and entry[2] != digest:
+            entry[2] = digest
+            self._dirty = True
+
+    def content_hash(self, rel):
+        """BLAKE2 digest of a file, cached until its size or mtime changes"""
+        path = self._abs(rel)
+        st = os.stat(path)
+        entry = self.files.get(rel)
+        if entry is not None and entry[2] and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return entry[2]
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        value = digest.hexdigest()
+        if entry is not None:
+            entry[:] = [st.st_size, st.st_mtime_ns, value]
+        return value
+
+    def save(self):
+        """Write the index atomically (index worker thread)"""
+        self._save_timer = None
+        if not self._dirty or not self.ready.is_set():
+            return
+        data = {"version": self.VERSION, "root": self.root_dir, "excludes": self.matcher.excludes,
+                "dirs": self.dirs, "files": self.files}
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(marshal.dumps(data))
+            os.replace(tmp_path, self.cache_path)
+            self._dirty = False
+        except Exception as e:
+            print(f"Error saving project index: {e}")
+
+    def close(self, timeout=2.0):
+        """Save pending changes and stop taking events"""
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+        done = threading.Event()
+        def finish():
+            self.save()
+            self._closed = True
+            done.set()
+        _index_worker.submit(finish)
+        done.wait(timeout)
+
+# ----------------------------
+# Quick Open
+# ----------------------------
+_quick_open_worker = _BackgroundWorker("Quick open worker")
+
+_SCORE_MATCH = 16
+_SCORE_GAP_START = -3
+_SCORE_GAP_EXTENSION = -1
+_BONUS_BOUNDARY = 8
+_BONUS_CAMEL = 7
+_BONUS_CONSECUTIVE = 4
+_BOUNDARY_CHARS = "/\\_-. "
+
+def _fold_case(text):
+    """Lowercase text one character for one, so positions in it are positions in text.
+
+    A character whose lowercase is longer keeps only its first character, so
+    "\u0130" (dotted capital I, lowercased to "i" plus a combining dot) is "i".
+    """
+    lower = text.lower()
+    if len(lower) == len(text):
+        return lower
+    return "".join(ch.lower()[0] for ch in text)
+
+def _fuzzy_score(query, text, lower):
+    """fzf-style score of query as a subsequence of text, or None if it does not match.
+
+    lower is _fold_case(text), and query folded the same way.
+    """
+    # Forward pass finds where the first full match ends, backward pass the
+    # latest start for that end: the shortest window to score
+    end = 0
+    for ch in query:
+        end = lower.find(ch, end)
+        if end < 0:
+            return None
+        end += 1
+    start = end
+    for ch in reversed(query):
+        start = lower.rfind(ch, 0, start)
+    score = 0
+    qi = 0
+    in_gap = False
+    chunk_bonus = 0
+    consecutive = False
+    for i in range(start, end):
+        if qi < len(query) and lower[i] == query[qi]:
+            prev = text[i - 1] if i else "/"
+            if prev in _BOUNDARY_CHARS:
+                bonus = _BONUS_BOUNDARY
+            elif prev.islower() and text[i].isupper():
+                bonus = _BONUS_CAMEL
+            else:
+                bonus = 0
+            if consecutive:
+                # A run keeps the bonus of the boundary it started on
+                chunk_bonus = max(chunk_bonus, bonus, _BONUS_CONSECUTIVE)
+                bonus = chunk_bonus
+            else:
+                chunk_bonus = bonus
+            score += _SCORE_MATCH + (bonus * 2 if qi == 0 else bonus)
+            qi += 1
+            consecutive = True
+            in_gap = False
+        else:
+            score += _SCORE_GAP_EXTENSION if in_gap else _SCORE_GAP_START
+            consecutive = False
+            in_gap = True
+    return score
+
+class QuickOpenIndex:
+    """Project paths for the Go to File palette, prefiltered through a trigram index of path components.
+
+    Folder and file names repeat across a project, so trigrams are indexed
+    once per distinct component rather than once per path. Only the paths
+    under the postings of the query's rarest trigram that hold all of its
+    trigrams are scored. Every path is scanned with a subsequence regex only
+    when the query has no trigram within one component, or when no path
+    holds its trigrams (a scattered fuzzy query). The first ranking is
+    reported within FIRST_ANSWER_SECONDS and the complete one when scoring
+    finishes.
+    """
+    LIMIT = 50
+    FIRST_ANSWER_SECONDS = 0.008
+    BUILD_CHUNK = 5000
+    SCAN_CHUNK = 2048
+
+    def __init__(self):
+        self._paths = []            # id -> relative path, None once removed (ids are not reused)
+        self._lower = []            # id -> lowercase path, "" once removed
+        self._ids = {}
+        self._components = {}       # lowercase folder or file name -> component id
+        self._component_paths = []  # component id -> ids of paths containing it, stale ids included
+        self._trigrams = {}         # trigram -> ids of components containing it
+        self._removed = 0
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def __len__(self):
+        return len(self._ids)
+
+    def update(self, added, removed):
+        """ProjectIndex listener: apply a batch of relative paths"""
+        with self._lock:
+            for rel in removed:
+                path_id = self._ids.pop(rel, None)
+                if path_id is not None:
+                    self._paths[path_id] = None
+                    self._lower[path_id] = ""
+                    self._removed += 1
+            if self._removed > max(len(self._ids), self.BUILD_CHUNK):
+                self._compact()
+        for i in range(0, len(added), self.BUILD_CHUNK):
+            # Chunks let queries in while a large project is first loaded
+            with self._lock:
+                for rel in added[i:i + self.BUILD_CHUNK]:
+                    if rel not in self._ids:
+                        self._add(rel)
+
+    def _add(self, rel):
+        path_id = len(self._paths)
+        lower = _fold_case(rel)
+        self._paths.append(rel)
+        self._lower.append(lower)
+        self._ids[rel] = path_id
+        for part in set(re.split(r"[\\/]", lower)):
+            cid = self._components.get(part)
+            if cid is None:
+                cid = self._components[part] = len(self._component_paths)
+                self._component_paths.append(array.array("I"))
+                for trigram in {part[i:i + 3] for i in range(len(part) - 2)}:
+                    postings = self._trigrams.get(trigram)
+                    if postings is None:
+                        self._trigrams[trigram] = postings = array.array("I")
+                    postings.append(cid)
+            self._component_paths[cid].append(path_id)
+
+    def _compact(self):
+        """Rebuild without the slots of removed paths (lock held)"""
+        live = [rel for rel in self._paths if rel is not None]
+        self._paths, self._lower, self._ids = [], [], {}
+        self._components, self._component_paths, self._trigrams = {}, [], {}
+        self._removed = 0
+        for rel in live:
+            self._add(rel)
+
+    def next_generation(self):
+        """Start a new query; searches for older generations stop early"""
+        self.generation += 1
+        return self.generation
+
+    def search(self, query, generation, on_results):
+        """Worker: call on_results(paths, complete) with the best matches for query"""
+        started = time.perf_counter()
+        query = "".join(_fold_case(query).split())
+        if not query:
+            on_results([], True)
+            return
+        with self._lock:
+            # The lists only grow or get replaced wholesale, so the snapshot stays usable
+            paths, lowers = self._paths, self._lower
+            rarest = None
+            trigrams = set()
+            for i in range(len(query) - 2):
+                trigram = query[i:i + 3]
+                if "/" in trigram or "\\" in trigram:
+                    continue
+                trigrams.add(trigram)
+                cids = self._trigrams.get(trigram, ())
+                total = sum(len(self._component_paths[cid]) for cid in cids)
+                if rarest is None or total < rarest[0]:
+                    rarest = (total, [self._component_paths[cid] for cid in cids])
+
+        # "a[^b]*b[^c]*c" matches a subsequence without backtracking on failure
+        search = re.compile(re.escape(query[0]) + "".join(
+            f"[^{re.escape(ch)}]*{re.escape(ch)}" for ch in query[1:])).search
+        scored = {}
+        reported = False
+
+        def chunks():
+            if rarest is not None:
+                for postings in rarest[1]:
+                    for start in range(0, len(postings), self.SCAN_CHUNK):
+                        yield [path_id for path_id in postings[start:start + self.SCAN_CHUNK]
+                               if all(trigram in lowers[path_id] for trigram in trigrams)]
+                if scored:
+                    return
+            for start in range(0, len(lowers), self.SCAN_CHUNK):
+                end = min(start + self.SCAN_CHUNK, len(lowers))
+                yield itertools.compress(range(start, end), map(search, lowers[start:end]))
+
+        def report_first(reported):
+            if not reported and time.perf_counter() - started > self.FIRST_ANSWER_SECONDS:
+                on_results(best(), False)
+                return True
+            return reported
+
+        def best():
+            ranked = heapq.nlargest(self.LIMIT, scored.items(), key=lambda kv: (kv[1], -len(lowers[kv[0]])))
+            return [paths[path_id] for path_id, _ in ranked]
+
+        for ids in chunks():
+            if generation != self.generation:
+                return
+            for path_id in ids:
+                if path_id in scored:
+                    continue
+                lower = lowers[path_id]
+                text = paths[path_id]
+                if text is None or not search(lower):
+                    continue
+                score = _fuzzy_score(query, text, lower)
+                name_start = max(lower.rfind("/"), lower.rfind("\\")) + 1
+                if name_start and search(lower, name_start):
+                    # Matching within the file name beats matching across folders
+                    score = max(score, _fuzzy_score(query, text[name_start:], lower[name_start:]) + _BONUS_BOUNDARY * 2)
+                scored[path_id] = score
+                if len(scored) & 127 == 0:
+                    reported = report_first(reported)
+            reported = report_first(reported)
+        if generation == self.generation:
+            on_results(best(), True)
+
+# ----------------------------
+# Find in Files
+# ----------------------------
+_search_worker = _BackgroundWorker("Search worker")
+
+_SEARCH_MAX_FILE_BYTES = 8 * 1024 * 1024  # Bigger files are scanned on every search instead of indexed
+_SEARCH_SCAN = "scan"    # delta marker: no trigrams, verify on every search
+_SEARCH_SKIP = "skip"    # delta marker: binary or deleted, never a candidate
+_SEARCH_BINARY = 0xFFFFFFFF  # base file entry flag for binary files
+
+def _trigram_keys(data):
+    """24-bit keys of the lowercased byte trigrams of data"""
+    data = data.lower()
+    return {(a << 16) | (b << 8) | c for a, b, c in set(zip(data, data[1:], data[2:]))}
+
+def _file_trigram_keys(path):
+    """Trigram keys of a text file; None for binary files, _SEARCH_SCAN for big ones"""
+    with open(path, "rb") as f:
+        data = f.read(_SEARCH_MAX_FILE_BYTES + 1)
+    if len(data) > _SEARCH_MAX_FILE_BYTES:
+        return _SEARCH_SCAN
+    if b"\0" in data[:8192]:
+        return None
+    return _trigram_keys(data)
+
+def _required_literals(pattern):
+    """Literal runs that every match of a regex must contain, for index prefiltering"""
+    try:
+        parsed = _sre_parse.parse(pattern)
+    except Exception:
+        return []
+    runs = []
+
+    def walk(items):
+        current = []
+        for op, arg in items:
+            name = str(op)
+            if name == "LITERAL" and arg != 10:  # The index has no trigrams across lines
+                current.append(chr(arg))
+                continue
+            if name == "AT":
+                continue  # Anchors match no characters, so a run continues past them
+            runs.append("".join(current))
+            current = []
+            if name == "SUBPATTERN":
+                walk(arg[-1])
+            elif name in ("MAX_REPEAT", "MIN_REPEAT") and arg[0] >= 1:
+                walk(arg[2])
+        runs.append("".join(current))
+
+    walk(parsed)
+    return [run for run in runs if len(run) >= 3]
+
+def _build_search_index(root_dir, paths, out_path):
+    """Child process: write the trigram index of the relative paths to out_path.
+
+    Layout: header, postings (native uint32 file ids per trigram), a sorted
+    table of (key, offset, count) and a marshalled file list.
+    """
+    postings = {}
+    files = []
+    for rel in paths:
+        path = os.path.join(root_dir, rel)
+        try:
+            # Stamped before reading: a write during the read makes it look stale, not current
+            st = os.stat(path)
+            keys = _file_trigram_keys(path)
+        except OSError:
+            continue
+        size, mtime = st.st_size, st.st_mtime_ns
+        file_id = len(files)
+        if keys is None:
+            files.append((rel, size, mtime, _SEARCH_BINARY))
+            continue
+        files.append((rel, size, mtime, 0 if keys is _SEARCH_SCAN else len(keys)))
+        if keys is _SEARCH_SCAN:
+            continue
+        for key in keys:
+            ids = postings.get(key)
+            if ids is None:
+                postings[key] = ids = array.array("I")
+            ids.append(file_id)
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(bytes(_TrigramFile.HEADER.size))
+        table = bytearray()
+        offset = _TrigramFile.HEADER.size
+        for key in sorted(postings):
+            data = postings[key].tobytes()
+            table += _TrigramFile.ENTRY.pack(key, offset, len(postings[key]))
+            f.write(data)
+            offset += len(data)
+        f.write(table)
+        f.write(marshal.dumps(files))
+        f.seek(0)
+        f.write(_TrigramFile.HEADER.pack(_TrigramFile.MAGIC, len(postings), offset, offset + len(table)))
+    os.replace(tmp_path, out_path)
+
+class _TrigramFile:
+    """Read side of an on-disk trigram index: binary search over a memory-mapped table"""
+    MAGIC = b"ICETRG01"
+    HEADER = struct.Struct("<8sIQQ")  # magic, trigram count, table offset, file list offset
+    ENTRY = struct.Struct("<IQI")     # trigram key, postings offset, file count
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        try:
+            self.mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, self.count, self.table_offset, files_offset = self.HEADER.unpack_from(self.mm)
+            if magic != self.MAGIC:
+                raise ValueError("not a search index")
+            self.files = marshal.loads(self.mm[files_offset:])
+        except Exception:
+            self.close()
+            raise
+        self.ids = {entry[0]: file_id for file_id, entry in enumerate(self.files)}
+
+    def postings(self, key):
+        """Ids of the files containing trigram key"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found, offset, count = self.ENTRY.unpack_from(self.mm, self.table_offset + mid * self.ENTRY.size)
+            if found < key:
+                lo = mid + 1
+            elif found > key:
+                hi = mid
+            else:
+                ids = array.array("I")
+                ids.frombytes(self.mm[offset:offset + count * 4])
+                return ids
+        return array.array("I")
+
+    def close(self):
+        if getattr(self, "mm", None) is not None:
+            self.mm.close()
+            self.mm = None
+        self._file.close()
+
+class SearchIndex:
+    """Project-wide full-text search over an on-disk trigram index plus an in-memory delta.
+
+    A child process writes the base index; files changed since are
+    re-indexed into the delta on the index worker and shadow their base
+    entries. Candidates are verified with the regex against an mmap of each
+    file, and matches are streamed out in batches.
+    """
+    DELTA_LIMIT = 2000      # changed files kept in memory before the base is rebuilt
+    DELTA_INLINE = 200      # larger batches are marked for scanning instead of read right away
+    MATCH_LIMIT = 10000
+    LINE_CHARS = 300
+    BATCH_SECONDS = 0.05
+
+    def __init__(self, project_index):
+        self.project_index = project_index
+        self.root_dir = project_index.root_dir
+        self.path = os.path.splitext(project_index.cache_path)[0] + ".trg"
+        self._base = None
+        self._delta = {}  # relative path -> trigram keys, _SEARCH_SCAN or _SEARCH_SKIP
+        self._delta_seq = {}  # relative path -> update number that last changed it
+        self._seq = 0
+        self._building = None  # update number a running base build started at
+        self._rebuild_again = False
+        self._lock = threading.Lock()
+        self._closed = False
+        self.generation = 0
+        try:
+            self._base = _TrigramFile(self.path)
+        except (OSError, ValueError, EOFError, struct.error):
+            pass
+
+    def update(self, added, removed):
+        """ProjectIndex listener: shadow the base entries of changed files"""
+        files = self.project_index.files
+        base = self._base
+        changed = []
+        for rel in added:
+            entry = files.get(rel)
+            if entry is None:
+                continue
+            file_id = base.ids.get(rel) if base is not None else None
+            if (file_id is not None and rel not in self._delta and self.project_index.is_current(rel)
+                    and base.files[file_id][1:3] == (entry[0], entry[1])):
+                continue  # The base already has this version
+            changed.append(rel)
+        inline = len(changed) <= self.DELTA_INLINE
+        updates = {}
+        for rel in changed:
+            keys = _SEARCH_SCAN
+            if inline:
+                try:
+                    keys = _file_trigram_keys(os.path.join(self.root_dir, rel))
+                except OSError:
+                    pass
+            updates[rel] = _SEARCH_SKIP if keys is None else keys
+        updates.update((rel, _SEARCH_SKIP) for rel in removed)
+        if not updates:
+            return
+        with self._lock:
+            self._seq += 1
+            self._delta.update(updates)
+            self._delta_seq.update((rel, self._seq) for rel in updates)
+        if base is None or len(self._delta) > self.DELTA_LIMIT:
+            self.rebuild()
+
+    def rebuild(self):
+        """Rewrite the base index in a child process (index worker thread)"""
+        if self._closed:
+            return
+        if self._building is not None:
+            self._rebuild_again = True
+            return
+        paths = self.project_index.paths()
+        self._building = self._seq
+        self._rebuild_again = False
+        new_path = self.path + ".new"
+        process = multiprocessing.get_context("spawn").Process(
+            target=_build_search_index, args=(self.root_dir, paths, new_path),
+            name="Search index build", daemon=True)
+        process.start()
+
+        def wait():
+            process.join()
+            _index_worker.submit(self._swap_base, process.exitcode, new_path)
+
+        threading.Thread(target=wait, name="Search index wait", daemon=True).start()
+
+    def _swap_base(self, exitcode, new_path):
+        started_at, self._building = self._building, None
+        if self._closed:
+            return
+        if exitcode != 0:
+            print(f"Error building search index: exit code {exitcode}")
+            return
+        with self._lock:
+            # Closed first: Windows cannot replace a mapped file
+            if self._base is not None:
+                self._base.close()
+                self._base = None
+            try:
+                os.replace(new_path, self.path)
+                self._base = _TrigramFile(self.path)
+            except (OSError, ValueError, EOFError, struct.error) as e:
+                print(f"Error opening search index: {e}")
+            # Changes made after the build started may be newer than what it read
+            for rel, seq in list(self._delta_seq.items()):
+                if seq <= started_at:
+                    del self._delta_seq[rel]
+                    self._delta.pop(rel, None)
+        if self._rebuild_again:
+            self.rebuild()
+
+    def _candidates(self, keys):
+        """Relative paths that can contain every trigram in keys (lock held)"""
+        base = self._base
+        if base is None:
+            # No base yet: everything not known to be binary gets scanned
+            return [rel for rel in self.project_index.paths() if self._delta.get(rel) is not _SEARCH_SKIP]
+        ids = None
+        for postings in sorted((base.postings(key) for key in keys), key=len):
+            ids = set(postings) if ids is None else ids.intersection(postings)
+            if not ids:
+                break
+        if ids is None:
+            ids = range(len(base.files))
+        found = [base.files[file_id][0] for file_id in ids
+                 if base.files[file_id][3] != _SEARCH_BINARY]
+        # Files too big to index are verified every time
+        found += [rel for rel, _, _, count in base.files if count == 0]
+        found = [rel for rel in set(found) if rel not in self._delta]
+        for rel, value in self._delta.items():
+            if value is _SEARCH_SCAN or (value is not _SEARCH_SKIP and keys <= value):
+                found.append(rel)
+        return sorted(found)
+
+    def next_generation(self):
+        """Start a new search; older searches stop at the next file"""
+        self.generation += 1
+        return self.generation
+
+    def search(self, query, regex, match_case, generation, on_batch):
+        """Search worker: stream on_batch(matches, summary) with (rel, line, col, length, text) matches.
+
+        summary is None until the last call.
+        """
+        started = time.perf_counter()
+        source = query if regex else re.escape(query)
+        flags = re.MULTILINE | (0 if match_case else re.IGNORECASE)
+        compiled = re.compile(source.encode("utf-8"), flags)
+        keys = set()
+        for literal in (_required_literals(query) if regex else [query]):
+            data = literal.encode("utf-8")
+            # Only ASCII is case-folded in the index
+            runs = re.findall(rb"[\x00-\x7f]{3,}", data) if compiled.flags & re.IGNORECASE else [data]
+            for run in runs:
+                keys |= _trigram_keys(run)
+        with self._lock:
+            candidates = self._candidates(keys)
+
+        batch = []
+        last_sent = time.perf_counter()
+        total = files_matched = 0
+        for rel in candidates:
+            if generation != self.generation or self._closed:
+                return
+            try:
+                matches = self._scan_file(os.path.join(self.root_dir, rel), compiled,
+                                          self.MATCH_LIMIT - total)
+            except (OSError, ValueError):
+                continue
+            if matches:
+                files_matched += 1
+                total += len(matches)
+                batch.extend((rel,) + match for match in matches)
+            if batch and time.perf_counter() - last_sent > self.BATCH_SECONDS:
+                on_batch(batch, None)
+                batch = []
+                last_sent = time.perf_counter()
+            if total >= self.MATCH_LIMIT:
+                break
+        elapsed = (time.perf_counter() - started) * 1000
+        summary = (f"{total:,} matches in {files_matched:,} files"
+                   f"{' (limit reached)' if total >= self.MATCH_LIMIT else ''}"
+                   f" - {len(candidates):,} of {len(self.project_index.files):,} files read, {elapsed:.0f} ms")
+        on_batch(batch, summary)
+
+    def _scan_file(self, path, compiled, limit):
+        """(line, col, length, text) of the first match on each matching line"""
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm.find(b"\0", 0, 8192) >= 0:
+                    return []  # Binary
+                matches = []
+                line = 1
+                counted_to = 0
+                line_end = -1
+                for m in compiled.finditer(mm):
+                    start = m.start()
+                    if start <= line_end:
+                        continue  # One result per line
+                    line += mm[counted_to:start].count(b"\n")
+                    counted_to = start
+                    line_start = mm.rfind(b"\n", 0, start) + 1
+                    line_end = mm.find(b"\n", start)
+                    if line_end < 0:
+                        line_end = len(mm)
+                    text = mm[line_start:min(line_end, line_start + self.LINE_CHARS)].decode("utf-8", "replace")
+                    col = len(mm[line_start:start].decode("utf-8", "replace"))
+                    length = len(mm[start:m.end()].decode("utf-8", "replace"))
+                    matches.append((line, col, length, text))
+                    if len(matches) >= limit:
+                        break
+                return matches
+
+    def close(self):
+        """Stop searches and release the base index"""
+        self._closed = True
+        self.generation += 1
+        with self._lock:
+            if self._base is not None:
+                self._base.close()
+                self._base = None
+
+# ----------------------------
+# Symbol Index
+# ----------------------------
+_CONTAINER_KINDS = ("class", "struct", "impl", "type")
+_symbol_pool = None
+_symbol_pool_lock = threading.Lock()
+_worker_symbol_rules = {}  # language -> (lexer, [(kind, compiled regex)]) in a pool process
+
+def _blank_comments_and_strings(text, lexer):
+    """text with comment and string tokens replaced by spaces, keeping every offset and newline"""
+    tokens, _ = lexer.lex(text)
+    pieces = []
+    pos = 0
+    for tag, start, end, _ in tokens:
+        if tag == "comment" or tag == "string":
+            pieces.append(text[pos:start])
+            pieces.append(re.sub(r"[^\n]", " ", text[start:end]))
+            pos = end
+    pieces.append(text[pos:])
+    return "".join(pieces)
+
+def extract_symbols(text, lexer, patterns):
+    """Definitions in text as (name, kind, line, col, depth) tuples in file order.
+
+    Nesting comes from indentation; a function inside a class-like
+    definition is reported as a method.
+    """
+    masked = _blank_comments_and_strings(text, lexer)
+    found = {}
+    for kind, pattern in patterns:
+        for m in pattern.finditer(masked):
+            found.setdefault(m.start("name"), (m.group("name"), kind))
+    line_starts = [0] + [m.end() for m in re.finditer("\n", text)]
+    symbols = []
+    stack = []  # (indent, kind) of the enclosing definitions
+    for offset in sorted(found):
+        name, kind = found[offset]
+        line = bisect.bisect_right(line_starts, offset)
+        line_start = line_starts[line - 1]
+        indent = len(re.match(r"[ \t]*", text[line_start:offset]).group().expandtabs(4))
+        while stack and stack[-1][0] >= indent:
+            stack.pop()
+        if kind == "function" and stack and stack[-1][1] in _CONTAINER_KINDS:
+            kind = "method"
+        symbols.append((name, kind, line, offset - line_start, len(stack)))
+        stack.append((indent, kind))
+    return symbols
+
+def _init_symbol_worker(grammars):
+    """Pool process initializer: compile each language's lexer and symbol patterns once"""
+    for language, grammar in grammars.items():
+        patterns = [(kind, re.compile(regex, re.MULTILINE)) for kind, regex in grammar["symbols"]]
+        _worker_symbol_rules[language] = (Lexer(grammar), patterns)
+
+def _extract_file_symbols(root_dir, jobs):
+    """Pool process: [(rel, size, mtime_ns, content hash, symbols)] for [(rel, language)] jobs"""
+    results = []
+    for rel, language in jobs:
+        try:
+            with open(os.path.join(root_dir, rel), "rb") as f:
+                st = os.fstat(f.fileno())
+                data = f.read()
+        except OSError:
+            continue
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        lexer, patterns = _worker_symbol_rules[language]
+        symbols = extract_symbols(data.decode("utf-8", "replace"), lexer, patterns)
+        results.append((rel, st.st_size, st.st_mtime_ns, digest, symbols))
+    return results
+
+def _get_symbol_pool(grammars):
+    """Shared process pool for symbol extraction, started on first use"""
+    global _symbol_pool
+    with _symbol_pool_lock:
+        if _symbol_pool is None:
+            _symbol_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=max(1, min(4, (os.cpu_count() or 2) - 1)),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_symbol_worker, initargs=(grammars,))
+        return _symbol_pool
+
+def shutdown_symbol_pool():
+    """Drop queued extraction work and let the pool processes exit"""
+    global _symbol_pool
+    with _symbol_pool_lock:
+        if _symbol_pool is not None:
+            _symbol_pool.shutdown(wait=False, cancel_futures=True)
+            _symbol_pool = None
+
+class SymbolIndex:
+    """Definitions of every project source file, keyed by content hash.
+
+    A file is parsed only when its hash is new: unchanged files keep the
+    hash recorded in the ProjectIndex, and identical files share one entry.
+    Parsing runs in a process pool; results are merged on the index worker.
+    """
+    VERSION = 1
+    CHUNK = 64  # files per pool task
+    NOT_DEFINITIONS = ("impl",)  # listed in the outline but not go-to-definition targets
+
+    def __init__(self, project_index, grammars, on_change=None):
+        self.project_index = project_index
+        self.root_dir = project_index.root_dir
+        self.path = os.path.splitext(project_index.cache_path)[0] + ".sym"
+        self.by_hash = {}  # content hash -> symbols
+        self.files = {}    # relative path -> content hash
+        self._names = {}   # symbol name -> relative paths defining it
+        self._lock = threading.Lock()
+        self._on_change = on_change  # called with changed relative paths on the index worker
+        self._pending = 0
+        self._dirty = False
+        self._closed = False
+        # Grammars are plain data, so pool processes can build their own lexers
+        self._grammars = {}
+        for language in set(LANGUAGE_EXTENSIONS.values()):
+            grammar = grammars.load_grammar(language)
+            if grammar and grammar.get("symbols"):
+                self._grammars[language] = grammar
+        _index_worker.submit(self._load)  # Queued ahead of the project index's first update
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return
+        if not isinstance(data, dict) or data.get("version") != self.VERSION:
+            return
+        self.by_hash = data["by_hash"]
+        with self._lock:
+            for rel, digest in data["files"].items():
+                self._set(rel, digest)
+
+    def _set(self, rel, digest):
+        """Point rel at the symbols of digest (lock held)"""
+        old = self.files.get(rel)
+        if old == digest:
+            return False
+        if old is not None:
+            self._unname(rel, old)
+        self.files[rel] = digest
+        for symbol in self.by_hash[digest]:
+            self._names.setdefault(symbol[0], set()).add(rel)
+        return True
+
+    def _unname(self, rel, digest):
+        for symbol in self.by_hash.get(digest, ()):
+            paths = self._names.get(symbol[0])
+            if paths is not None:
+                paths.discard(rel)
+                if not paths:
+                    del self._names[symbol[0]]
+
+    def update(self, added, removed):
+        """ProjectIndex listener: reuse known hashes, send the rest to the pool"""
+        files = self.project_index.files
+        known = []
+        jobs = []
+        # Stat outside the lock; a cached hash counts only if the file is still that version
+        for rel in added:
+            language = LANGUAGE_EXTENSIONS.get(os.path.splitext(rel)[1].lower())
+            if language not in self._grammars:
+                continue
+            entry = files.get(rel)
+            digest = entry[2] if entry is not None else None
+            if digest is not None and digest in self.by_hash and self.project_index.is_current(rel):
+                known.append((rel, digest))
+            else:
+                jobs.append((rel, language))
+        changed = set()
+        with self._lock:
+            for rel in removed:
+                digest = self.files.pop(rel, None)
+                if digest is not None:
+                    self._unname(rel, digest)
+                    changed.add(rel)
+            for rel, digest in known:
+                if self._set(rel, digest):
+                    changed.add(rel)
+        if changed:
+            self._dirty = True
+            self._notify(changed)
+        if not jobs or self._closed:
+            return
+        try:
+            pool = _get_symbol_pool(self._grammars)
+            for i in range(0, len(jobs), self.CHUNK):
+                future = pool.submit(_extract_file_symbols, self.root_dir, jobs[i:i + self.CHUNK])
+                self._pending += 1
+                future.add_done_callback(lambda f: _index_worker.submit(self._merge, f))
+        except RuntimeError as e:
+            print(f"Error starting symbol indexer: {e}")  # Pool already shut down
+
+    def _merge(self, future):
+        self._pending -= 1
+        if self._closed or future.cancelled():
+            return
+        try:
+            results = future.result()
+        except Exception as e:
+            print(f"Error indexing symbols: {e}")
+            return
+        changed = set()
+        with self._lock:
+            for rel, size, mtime, digest, symbols in results:
+                if rel not in self.project_index.files:
+                    continue  # Deleted while it was being parsed
+                self.by_hash.setdefault(digest, symbols)
+                self.project_index.remember_hash(rel, size, mtime, digest)
+                if self._set(rel, digest):
+                    changed.add(rel)
+        if changed:
+            self._dirty = True
+            self._notify(changed)
+        if self._pending == 0:
+            self.save()
+
+    def _notify(self, changed):
+        if self._on_change is not None:
+            self._on_change(changed)
+
+    def definitions(self, name):
+        """[(rel, line, col, kind)] of the definitions of name"""
+        with self._lock:
+            found = []
+            for rel in self._names.get(name, ()):
+                for symbol in self.by_hash[self.files[rel]]:
+                    if symbol[0] == name and symbol[1] not in self.NOT_DEFINITIONS:
+                        found.append((rel, symbol[2], symbol[3], symbol[1]))
+            return sorted(found)
+
+    def outline(self, rel):
+        """Symbols of one file, or None if it is not indexed (yet)"""
+        with self._lock:
+            digest = self.files.get(rel)
+            return self.by_hash.get(digest) if digest is not None else None
+
+    def save(self):
+        """Write the index atomically, dropping symbols no file refers to (index worker)"""
+        if not self._dirty:
+            return
+        with self._lock:
+            live = set(self.files.values())
+            self.by_hash = {digest: symbols for digest, symbols in self.by_hash.items() if digest in live}
+            data = marshal.dumps({"version": self.VERSION, "by_hash": self.by_hash, "files": self.files})
+        try:
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except Exception as e:
+            print(f"Error saving symbol index: {e}")
+
+    def close(self, timeout=2.0):
+        """Save and ignore results still arriving from the pool"""
+        done = threading.Event()
+        def finish():
+            self.save()
+            self._closed = True
+            done.set()
+        _index_worker.submit(finish)
+        done.wait(timeout)
+
+# ----------------------------
+# Build Cache
+# ----------------------------
+_build_worker = _BackgroundWorker("Build worker")
+
+_C_INCLUDE_RE = re.compile(r'^[ \t]*#[ \t]*include[ \t]*"([^"]+)"', re.M)
+_RUST_MOD_RE = re.compile(r'^[ \t]*(?:pub(?:\([^)]*\))?[ \t]+)?mod[ \t]+(\w+)[ \t]*;', re.M)
+
+def _source_dependencies(path, language, include_dirs=()):
+    """Project files path pulls in: quoted #includes for C/C++, `mod x;` files for Rust"""
+    seen = set()
+    deps = []
+    stack = [os.path.abspath(path)]
+    while stack:
+        current = stack.pop()
+        try:
+            with open(current, "r", encoding="utf-8", errors="replace") as f:
+                text = f.read()
+        except OSError:
+            continue
+        base = os.path.dirname(current)
+        found = []
+        if language in ("c", "cpp"):
+            for name in _C_INCLUDE_RE.findall(text):
+                for folder in (base,) + tuple(include_dirs):
+                    candidate = os.path.normpath(os.path.join(folder, name))
+                    if os.path.isfile(candidate):
+                        found.append(candidate)
+                        break
+        elif language == "rust":
+            # Modules declared in main.rs/lib.rs/mod.rs live beside it, others in a folder named after the file
+            stem = os.path.splitext(os.path.basename(current))[0]
+            folder = base if stem in ("main", "lib", "mod") or current == os.path.abspath(path) \
+                else os.path.join(base, stem)
+            for name in _RUST_MOD_RE.findall(text):
+                for candidate in (os.path.join(folder, f"{name}.rs"), os.path.join(folder, name, "mod.rs")):
+                    if os.path.isfile(candidate):
+                        found.append(candidate)
+                        break
+        for dep in found:
+            if dep not in seen:
+                seen.add(dep)
+                deps.append(dep)
+                stack.append(dep)
+    return deps
+
+class BuildCache:
+    """Compiled binaries keyed by a hash of their sources, compiler, compiler version and flags.
+
+    Artifacts live in one folder per project; once it passes max_bytes the
+    least recently used ones are deleted.
+    """
+    def __init__(self, cache_dir, root_dir, max_bytes):
+        key = hashlib.sha1(os.path.abspath(root_dir).encode("utf-8")).hexdigest()[:16]
+        self.root_dir = os.path.abspath(root_dir)
+        self.dir = os.path.join(cache_dir, key)
+        self.max_bytes = max_bytes
+        self._versions = {}  # (compiler path, mtime_ns) -> version text
+        self._lock = threading.Lock()
+
+    def compiler_version(self, compiler):
+        """The compiler's --version output, cached until the executable changes"""
+        path = shutil.which(compiler) or compiler
+        try:
+            stamp = (os.path.realpath(path), os.stat(path).st_mtime_ns)
+        except OSError:
+            stamp = (path, None)
+        with self._lock:
+            version = self._versions.get(stamp)
+        if version is None:
+            try:
+                result = _subprocess_run([path, "--version"], capture_output=True, text=True,
+                                         errors="replace", timeout=30)
+                version = result.stdout + result.stderr
+            except (OSError, subprocess.SubprocessError) as e:
+                version = f"unknown: {e}"
+            with self._lock:
+                self._versions[stamp] = version
+        return stamp[0], version
+
+    def key(self, compiler, flags, sources):
+        """Cache key for building sources (the main file first) with compiler and flags"""
+        compiler_path, version = self.compiler_version(compiler)
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (compiler_path, version, "\0".join(flags)):
+            digest.update(part.encode("utf-8", "replace") + b"\0")
+        main_dir = os.path.dirname(os.path.abspath(sources[0]))
+        for source in sources:
+            # Relative names, so a moved include changes the key but moving the project doesn't
+            digest.update(os.path.relpath(source, main_dir).encode("utf-8", "replace") + b"\0")
+            with open(source, "rb") as f:
+                digest.update(hashlib.blake2b(f.read(), digest_size=16).digest())
+        return digest.hexdigest()
+
+    def artifact_path(self, key):
+        return os.path.join(self.dir, key + (".exe" if WINDOWS else ""))
+
+    def lookup(self, key):
+        """Path of the cached artifact, marked as just used, or None"""
+        path = self.artifact_path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def temp_path(self, key):
+        """Where to build an artifact before store() moves it into place"""
+        os.makedirs(self.dir, exist_ok=True)
+        return os.path.join(self.dir, f"{key}.{os.getpid()}.{threading.get_ident()}.tmp" +
+                            (".exe" if WINDOWS else ""))
+
+    def store(self, key, built_path):
+        """Move a freshly built artifact into the cache and evict down to max_bytes"""
+        path = self.artifact_path(key)
+        os.replace(built_path, path)
+        self._evict(keep=path)
+        return path
+
+    def _evict(self, keep):
+        entries = []
+        total = 0
+        with os.scandir(self.dir) as it:
+            for entry in it:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                if entry.name.endswith((".tmp", ".tmp.exe")):
+                    if time.time() - st.st_mtime > 3600:  # Left behind by a crashed build
+                        self._remove(entry.path)
+                    continue
+                total += st.st_size
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path != keep and self._remove(path):
+                total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+# ----------------------------
+# Project Build
+# ----------------------------
+_JAVA_PACKAGE_RE = re.compile(r'^[ \t]*package[ \t]+([\w.]+)[ \t]*;', re.M)
+_JAVA_IMPORT_RE = re.compile(r'^[ \t]*import[ \t]+(?:static[ \t]+)?([\w.]+?)(\.\*)?[ \t]*;', re.M)
+_JAVA_MAIN_RE = re.compile(r'\bstatic\b[^;{]*\bvoid[ \t]+main[ \t]*\(')
+_JAVA_TYPE_NAME_RE = re.compile(r'\b[A-Z]\w*')
+
+class ProjectBuild:
+    """Incremental build of a whole C/C++ or Java project.
+
+    C/C++: one object per translation unit, which remembers the (mtime_ns, size)
+    of its source and of every project header it includes. Only units where
+    one of those changed are recompiled, in parallel across a thread pool,
+    and the program is relinked when any object changed.
+    Java: files that changed, plus files that import or share a package with
+    and name a changed class, are recompiled together in one javac run.
+    """
+    VERSION = 1
+    C_EXTS = (".c",)
+    CPP_EXTS = (".cpp", ".cc", ".cxx")
+
+    def __init__(self, root_dir, build_dir):
+        self.root_dir = os.path.abspath(root_dir)
+        key = hashlib.sha1(self.root_dir.encode("utf-8")).hexdigest()[:16]
+        self.dir = os.path.join(build_dir, key)
+        self.manifest_path = os.path.join(self.dir, "manifest.json")
+        self.name = os.path.basename(self.root_dir) or "program"
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") == self.VERSION:
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {"version": self.VERSION, "native": {}, "java": {}}
+
+    def _save_manifest(self, manifest):
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            tmp = self.manifest_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            os.replace(tmp, self.manifest_path)
+        except OSError as e:
+            print(f"Error saving build manifest: {e}")
+
+    def _stamp(self, rel):
+        try:
+            st = os.stat(os.path.join(self.root_dir, rel))
+            return [rel, st.st_mtime_ns, st.st_size]
+        except OSError:
+            return [rel, None, None]
+
+    def build(self, sources, compilers, flags, report, jobs=None, prefer=None):
+        """Build on the calling thread; sources are project-relative paths.
+
+        report(line) receives progress. Returns the argv that runs the result,
+        or None when the build failed or produced nothing to run.
+        """
+        native = [rel for rel in sources if rel.lower().endswith(self.C_EXTS + self.CPP_EXTS)]
+        if native:
+            return self._build_native(sorted(native), compilers, flags, report, jobs or os.cpu_count() or 1)
+        java = [rel for rel in sources if rel.lower().endswith(".java")]
+        if java:
+            return self._build_java(sorted(java), compilers, flags, report, prefer)
+        report("Build: no C, C++ or Java sources in this project.\n")
+        return None
+
+    # C / C++
+    def _object_path(self, rel):
+        return os.path.join(self.dir, "obj", rel + ".o")
+
+    def _build_native(self, units, compilers, flags, report, jobs):
+        started = time.perf_counter()
+        manifest = self._load_manifest()
+        old = manifest["native"]
+        include_dirs = [self.root_dir] + [d for d in (os.path.join(self.root_dir, "include"),) if os.path.isdir(d)]
+        commands = {}
+        stale = []
+        for rel in units:
+            language = "cpp" if rel.lower().endswith(self.CPP_EXTS) else "c"
+            command = [compilers[language], "-c", *flags.get(language, []), *(f"-I{d}" for d in include_dirs)]
+            commands[rel] = (language, command)
+            entry = old.get(rel)
+            if (entry is None or entry["command"] != command or not os.path.exists(self._object_path(rel))
+                    or any(self._stamp(s[0]) != s for s in entry["stamps"])):
+                stale.append(rel)
+        for rel in set(old) - set(units):
+            BuildCache._remove(self._object_path(rel))
+            del old[rel]
+
+        def compile_unit(rel):
+            language, command = commands[rel]
+            source = os.path.join(self.root_dir, rel)
+            deps = _source_dependencies(source, language, include_dirs)
+            # Stamped before compiling, so an edit made mid-compile is picked up next time
+            stamps = [self._stamp(rel)] + [self._stamp(os.path.relpath(d, self.root_dir)) for d in deps]
+            obj = self._object_path(rel)
+            os.makedirs(os.path.dirname(obj), exist_ok=True)
+            tmp = f"{obj}.{threading.get_ident()}.tmp"
+            start = time.perf_counter()
+            try:
+                result = _subprocess_run(command + [source, "-o", tmp], cwd=self.root_dir,
+                                         capture_output=True, text=True, errors="replace")
+            except OSError as e:
+                return rel, False, f"{e}\n", 0.0, stamps
+            seconds = time.perf_counter() - start
+            if result.returncode != 0:
+                BuildCache._remove(tmp)
+                return rel, False, result.stdout + result.stderr, seconds, stamps
+            os.replace(tmp, obj)
+            return rel, True, result.stdout + result.stderr, seconds, stamps
+
+        timings = []
+        failed = []
+        if stale:
+            report(f"Build: {len(stale)} of {len(units)} units out of date, {min(jobs, len(stale))} jobs\n")
+            with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+                futures = [pool.submit(compile_unit, rel) for rel in stale]
+                for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                    rel, ok, output, seconds, stamps = future.result()
+                    timings.append((seconds, rel))
+                    mark = "" if ok else "  FAILED"
+                    report(f"{output}[{done}/{len(stale)}] {rel}  {seconds:.2f}s{mark}\n")
+                    if ok:
+                        old[rel] = {"command": commands[rel][1], "stamps": stamps, "seconds": round(seconds, 3)}
+                    else:
+                        old.pop(rel, None)
+                        failed.append(rel)
+        self._save_manifest(manifest)
+        if failed:
+            report(f"Build failed: {len(failed)} unit(s) did not compile.\n")
+            return None
+
+        binary = os.path.join(self.dir, self.name + (".exe" if WINDOWS else ""))
+        objects = [self._object_path(rel) for rel in units]
+        link_seconds = None
+        if (stale or not os.path.exists(binary) or manifest.get("linked") != objects):
+            linker_language = "cpp" if any(commands[rel][0] == "cpp" for rel in units) else "c"
+            start = time.perf_counter()
+            try:
+                result = _subprocess_run([compilers[linker_language], *objects, "-o", binary,
+                                          *flags.get("link", [])], cwd=self.root_dir,
+                                         capture_output=True, text=True, errors="replace")
+            except OSError as e:
+                report(f"Link error: {e}\n")
+                return None
+            link_seconds = time.perf_counter() - start
+            if result.returncode != 0:
+                report(result.stdout + result.stderr + "Build failed: link error.\n")
+                manifest.pop("linked", None)
+                self._save_manifest(manifest)
+                return None
+            manifest["linked"] = objects
+            self._save_manifest(manifest)
+
+        wall = time.perf_counter() - started
+        if not stale and link_seconds is None:
+            report(f"Build: {len(units)} units up to date ({wall:.2f}s)\n")
+        else:
+            timings.sort(reverse=True)
+            slowest = ", ".join(f"{rel} {seconds:.2f}s" for seconds, rel in timings[:5])
+            report(f"Build finished in {wall:.2f}s: {len(stale)}/{len(units)} units compiled "
+                   f"({sum(t for t, _ in timings):.2f}s of compiler time)"
+                   + (f", link {link_seconds:.2f}s" if link_seconds is not None else "")
+                   + (f"; slowest: {slowest}" if slowest else "") + "\n")
+        return [binary]
+
+    # Java
+    def _parse_java(self, rel):
+        try:
+            with open(os.path.join(self.root_dir, rel), "r", encoding="utf-8", errors="replace") as f:
+                text = f.read()
+        except OSError:
+            text = ""
+        match = _JAVA_PACKAGE_RE.search(text)
+        package = match.group(1) if match else ""
+        imports = []
+        wildcards = []
+        for name, star in _JAVA_IMPORT_RE.findall(text):
+            (wildcards if star else imports).append(name)
+        stem = os.path.splitext(os.path.basename(rel))[0]
+        return {"stamp": self._stamp(rel), "package": package,
+                "fqn": f"{package}.{stem}" if package else stem,
+                "imports": imports, "wildcards": wildcards,
+                "names": sorted(set(_JAVA_TYPE_NAME_RE.findall(text))),
+                "main": bool(_JAVA_MAIN_RE.search(text))}
+
+    def _build_java(self, units, compilers, flags, report, prefer):
+        started = time.perf_counter()
+        manifest = self._load_manifest()
+        old = manifest["java"]
+        classes = os.path.join(self.dir, "classes")
+        command = [compilers["java"], *flags.get("java", [])]
+        rebuild_all = manifest.get("javac") != command or not os.path.isdir(classes)
+        info = {}
+        changed = set()
+        for rel in units:
+            entry = old.get(rel)
+            if rebuild_all or entry is None or entry["stamp"] != self._stamp(rel):
+                info[rel] = self._parse_java(rel)
+                changed.add(rel)
+            else:
+                info[rel] = entry
+        removed = set(old) - set(units)
+        for rel in removed:
+            # Drop the class files of deleted sources, nested classes included
+            folder = os.path.join(classes, *old[rel]["package"].split(".")) if old[rel]["package"] else classes
+            stem = os.path.splitext(os.path.basename(rel))[0]
+            try:
+                for name in os.listdir(folder):
+                    if name == f"{stem}.class" or name.startswith(f"{stem}$"):
+                        BuildCache._remove(os.path.join(folder, name))
+            except OSError:
+                pass
+        touched = {(old[rel] if rel in removed else info[rel])["fqn"] for rel in changed | removed}
+        stale = set(changed)
+        for rel, entry in info.items():
+            if rel in stale:
+                continue
+            names = set(entry["names"])
+            for fqn in touched:
+                package, _, simple = fqn.rpartition(".")
+                if (fqn in entry["imports"] or
+                        (simple in names and (package == entry["package"] or package in entry["wildcards"]))):
+                    stale.add(rel)
+                    break
+
+        if stale:
+            # Source roots let javac find classes it has not compiled yet
+            roots = set()
+            for rel in stale:
+                depth = info[rel]["package"].count(".") + 1 if info[rel]["package"] else 0
+                folder = os.path.dirname(os.path.join(self.root_dir, rel))
+                for _ in range(depth):
+                    folder = os.path.dirname(folder)
+                roots.add(folder)
+            os.makedirs(classes, exist_ok=True)
+            report(f"Build: {len(stale)} of {len(units)} Java files out of date "
+                   f"({len(changed)} changed, {len(stale) - len(changed)} dependents)\n")
+            start = time.perf_counter()
+            try:
+                result = _subprocess_run(command + ["-d", classes, "-cp", classes, "-sourcepath",
+                                                    os.pathsep.join(sorted(roots))]
+                                         + [os.path.join(self.root_dir, rel) for rel in sorted(stale)],
+                                         cwd=self.root_dir, capture_output=True, text=True, errors="replace")
+            except OSError as e:
+                report(f"Build error: {e}\n")
+                return None
+            seconds = time.perf_counter() - start
+            report(result.stdout + result.stderr)
+            if result.returncode != 0:
+                for rel in stale:
+                    old.pop(rel, None)
+                self._save_manifest(manifest)
+                report(f"Build failed: javac exited with code {result.returncode} after {seconds:.2f}s.\n")
+                return None
+            report(f"[javac] {len(stale)} files  {seconds:.2f}s\n")
+        manifest["java"] = {rel: info[rel] for rel in units}
+        manifest["javac"] = command
+        self._save_manifest(manifest)
+
+        wall = time.perf_counter() - started
+        if stale:
+            report(f"Build finished in {wall:.2f}s\n")
+        else:
+            report(f"Build: {len(units)} Java files up to date ({wall:.2f}s)\n")
+        mains = [rel for rel in units if info[rel]["main"]]
+        if not mains:
+            report("Build: no class with a main method to run.\n")
+            return None
+        main_rel = prefer if prefer in mains else mains[0]
+        return [shutil.which("java") or "java", "-cp", classes, info[main_rel]["fqn"]]
+
+# ----------------------------
+# Run Benchmarks
+# ----------------------------
+def _percentile(values, q):
+    """q-th percentile (0-100) of sorted values, linearly interpolated"""
+    pos = (len(values) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+def _median_ci(values, confidence=0.95):
+    """Distribution-free confidence interval for the median of sorted values, from order statistics.
+
+    [values[j], values[n-1-j]] covers the median with probability 1 - 2*P(B <= j)
+    for B ~ Binomial(n, 1/2); the narrowest such interval that still reaches
+    confidence is returned, or None with too few samples (under 6 at 95%).
+    """
+    n = len(values)
+    best = None
+    below = 0.0  # P(B <= j)
+    for j in range(n // 2):
+        below += math.comb(n, j) / 2 ** n
+        if 1 - 2 * below < confidence:
+            break
+        best = j
+    return None if best is None else (values[best], values[n - 1 - best])
+
+def _mann_whitney_p(a, b):
+    """Two-sided Mann-Whitney U p-value for samples a and b (normal approximation, tie-corrected)"""
+    n1, n2 = len(a), len(b)
+    combined = sorted([(value, 0) for value in a] + [(value, 1) for value in b])
+    n = n1 + n2
+    rank_sum = 0.0  # of a
+    ties = 0
+    i = 0
+    while i < n:
+        j = i
+        while j < n and combined[j][0] == combined[i][0]:
+            j += 1
+        rank_sum += (i + j + 1) / 2 * sum(1 for _, group in combined[i:j] if group == 0)
+        ties += (j - i) ** 3 - (j - i)
+        i = j
+    u = rank_sum - n1 * (n1 + 1) / 2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0  # Every sample identical
+    z = max(abs(u - n1 * n2 / 2) - 0.5, 0) / math.sqrt(variance)
+    return min(1.0, 2 * (1 - statistics.NormalDist().cdf(z)))
+
+def _version_digest(paths):
+    """Hash of the contents of paths (the file first, then what it includes)"""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                digest.update(hashlib.blake2b(f.read(), digest_size=16).digest())
+        except OSError:
+            digest.update(b"missing")
+    return digest.hexdigest()
+
+class BenchmarkHistory:
+    """Benchmark samples per file and content hash, oldest first, in one JSON file"""
+    MAX_PER_FILE = 50
+
+    def __init__(self, path):
+        self.path = path
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
+
+    def previous(self, file_path, digest):
+        """Newest result for file_path measured on a different version of it, or None"""
+        for entry in reversed(self._load().get(file_path, [])):
+            if entry["hash"] != digest:
+                return entry
+        return None
+
+    def add(self, file_path, digest, samples):
+        entries = self._load().setdefault(file_path, [])
+        entries.append({"hash": digest, "time": time.time(), "samples": samples})
+        del entries[:-self.MAX_PER_FILE]
+        try:
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._data, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving benchmark history: {e}")
+
+class RunBenchmark:
+    """Warmup runs, then measured runs of a program in its run tab, then statistics.
+
+    Setup steps (javac before java) run once; the last step is the one timed.
+    The results are stored in the history and compared with the newest ones
+    from a different version of the file: a metric is flagged as a regression
+    when its median grew by at least MIN_CHANGE and a Mann-Whitney U test
+    puts the difference below ALPHA.
+    """
+    METRICS = (("wall", "wall"), ("cpu", "cpu"), ("max_rss", "peak RSS"))
+    CONFIDENCE = 0.95
+    ALPHA = 0.05
+    MIN_CHANGE = 0.01
+
+    def __init__(self, panel, steps, cwd, title, history, file_path, digest, runs=10, warmup=2):
+        self.panel = panel
+        self.steps = steps
+        self.cwd = cwd
+        self.title = title
+        self.history = history
+        self.file_path = file_path
+        self.digest = digest
+        self.runs = max(1, runs)
+        self.warmup = max(0, warmup)
+        self.samples = {metric: [] for metric, _ in self.METRICS}
+        self.session = None
+        self._finished_runs = 0
+
+    def start(self):
+        self.session = self.panel.run_session(self.title)
+        self._emit(f"[Benchmark {os.path.basename(self.file_path)}: {self.warmup} warmup + "
+                   f"{self.runs} measured runs, version {self.digest[:8]}]\n")
+        setup = self.steps[:-1]
+        if setup:
+            self.session.run(setup, cwd=self.cwd, on_exit=self._setup_done)
+        else:
+            self._next_run()
+
+    def _emit(self, text, tag="run_ok"):
+        self.session._queue([(text, tag)])
+
+    def _setup_done(self, stats):
+        if stats["exit"] != 0:
+            self._emit("[Benchmark stopped: setup step failed]\n", "run_failed")
+            return
+        self._next_run()
+
+    def _next_run(self):
+        self.session.run([self.steps[-1]], cwd=self.cwd, on_exit=self._run_done)
+
+    def _run_done(self, stats):
+        if stats["exit"] != 0:
+            self._emit(f"[Benchmark stopped: run {self._finished_runs + 1} failed]\n", "run_failed")
+            return
+        self._finished_runs += 1
+        if self._finished_runs > self.warmup:
+            for metric, _ in self.METRICS:
+                if stats[metric] is not None:
+                    self.samples[metric].append(stats[metric])
+        if self._finished_runs < self.warmup + self.runs:
+            self._next_run()
+        else:
+            self._report()
+
+    @staticmethod
+    def _format(metric, value):
+        return f"{value / (1024 * 1024):.1f} MB" if metric == "max_rss" else f"{value:.4f}s"
+
+    def _report(self):
+        for metric, label in self.METRICS:
+            values = sorted(self.samples[metric])
+            if not values:
+                continue
+            fmt = lambda value: self._format(metric, value)
+            ci = _median_ci(values, self.CONFIDENCE)
+            ci_text = f"{fmt(ci[0])}..{fmt(ci[1])}" if ci else "n/a (too few runs)"
+            spread = f" ± {fmt(statistics.stdev(values))}" if len(values) > 1 else ""
+            self._emit(f"  {label:<9} median {fmt(statistics.median(values))}  "
+                       f"{self.CONFIDENCE:.0%} CI {ci_text}  p5 {fmt(_percentile(values, 5))}  "
+                       f"p95 {fmt(_percentile(values, 95))}  mean {fmt(statistics.fmean(values))}{spread}\n", "")
+
+        previous = self.history.previous(self.file_path, self.digest)
+        if previous is not None:
+            parts = []
+            regressed = False
+            for metric, label in self.METRICS:
+                old, new = previous["samples"].get(metric) or [], self.samples[metric]
+                if not old or not new:
+                    continue
+                old_median, new_median = statistics.median(old), statistics.median(new)
+                change = (new_median - old_median) / old_median if old_median else 0.0
+                p = _mann_whitney_p(old, new)
+                flag = p < self.ALPHA and change >= self.MIN_CHANGE
+                regressed |= flag
+                parts.append(f"{label} {change:+.1%} (p={p:.3f}){' REGRESSION' if flag else ''}")
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(previous["time"]))
+            self._emit(f"  vs version {previous['hash'][:8]} ({when}): {', '.join(parts)}\n",
+                       "run_failed" if regressed else "run_ok")
+        self.history.add(self.file_path, self.digest, self.samples)
+
+# ----------------------------
+# Warm Python Runs
+# ----------------------------
+# Runs under the user's interpreter: preloads modules, then forks one child per
+# run that sets itself up like a fresh `python script.py` on the pty it is sent.
+_WARM_PYTHON_SERVER = r"""
+import array, builtins, importlib, importlib.machinery, json, os, selectors, signal, socket, sys, types
+
+sock_path = sys.argv[1]
+failed = []
+for name in sys.argv[2:]:
+    try:
+        importlib.import_module(name)
+    except BaseException as e:
+        failed.append("%s (%s: %s)" % (name, type(e).__name__, e))
+
+listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+listener.bind(sock_path)
+listener.listen(16)
+wake_r, wake_w = os.pipe()
+os.set_blocking(wake_w, False)
+signal.set_wakeup_fd(wake_w)
+signal.signal(signal.SIGCHLD, lambda *args: None)
+selector = selectors.DefaultSelector()
+selector.register(listener, selectors.EVENT_READ)
+selector.register(wake_r, selectors.EVENT_READ)
+selector.register(0, selectors.EVENT_READ)  # EOF once the IDE is gone
+runs = {}  # child pid -> connection that gets its exit status
+
+def receive(conn):
+    data, ancdata, _, _ = conn.recvmsg(65536, socket.CMSG_SPACE(array.array("i").itemsize))
+    fds = array.array("i")
+    for level, kind, payload in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(payload[:len(payload) - len(payload) % fds.itemsize])
+    while not data.endswith(b"\n"):
+        chunk = conn.recv(65536)
+        if not chunk:
+            raise EOFError("request cut short")
+        data += chunk
+    return json.loads(data.decode("utf-8")), list(fds)
+
+def become_child(request, tty_fd, conn):
+    # Drop everything of the server and take over the pty, cwd and environment of the run
+    signal.set_wakeup_fd(-1)
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    selector.close()
+    listener.close()
+    conn.close()
+    for other in runs.values():
+        other.close()
+    runs.clear()
+    os.close(wake_r)
+    os.close(wake_w)
+    os.setsid()
+    for target in (0, 1, 2):
+        os.dup2(tty_fd, target)
+    os.close(tty_fd)
+    try:
+        import fcntl, termios
+        fcntl.ioctl(0, termios.TIOCSCTTY, 0)
+    except (ImportError, OSError):
+        pass
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["env"])
+    # sys.std* already sit on fds 0-2; buffer them the way a fresh interpreter on a tty does
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(line_buffering=sys.stdout.isatty())
+        sys.stderr.reconfigure(line_buffering=True)
+
+def run_script(request):
+    # Run the script as __main__ and leave through the interpreter's normal shutdown, which
+    # joins threads, runs atexit, finalizes objects, flushes files and sets the exit status
+    interpreter, script = request["argv"][:2]
+    sys.argv = [script] + request["argv"][2:]
+    sys.path[0] = os.path.dirname(script)
+    if "numpy.random" in sys.modules:
+        sys.modules["numpy.random"].seed()  # The global generator would otherwise repeat across runs
+    main = types.ModuleType("__main__")
+    main.__dict__.update(__file__=script, __cached__=None, __builtins__=builtins,
+                         __loader__=importlib.machinery.SourceFileLoader("__main__", script))
+    sys.modules["__main__"] = main
+
+    def excepthook(etype, value, tb):
+        while tb is not None and tb.tb_frame.f_code.co_filename != script:
+            tb = tb.tb_next  # Drop this server's frames, which a cold traceback does not have
+        sys.__excepthook__(etype, value.with_traceback(tb), tb)
+    sys.excepthook = excepthook
+
+    try:
+        with open(script, "rb") as f:
+            source = f.read()
+    except OSError as e:
+        sys.stderr.write("%s: can't open file %r: [Errno %d] %s\n" % (interpreter, script, e.errno, e.strerror))
+        sys.exit(2)
+    exec(compile(source, script, "exec", dont_inherit=True), main.__dict__)
+    sys.exit(0)
+
+def accept():
+    conn, _ = listener.accept()
+    try:
+        request, fds = receive(conn)
+    except (OSError, ValueError, EOFError):
+        conn.close()
+        return
+    pid = os.fork()
+    if pid == 0:
+        try:
+            become_child(request, fds[0], conn)
+        except BaseException as e:
+            os.write(2, ("Warm run could not start: %s\n" % (e,)).encode("utf-8", "replace"))
+            os._exit(1)  # Nothing of the script has run yet
+        run_script(request)
+    for fd in fds:
+        os.close(fd)
+    runs[pid] = conn
+    try:
+        conn.sendall(json.dumps({"pid": pid}).encode("utf-8") + b"\n")
+    except OSError:
+        pass
+
+def reap():
+    while runs:
+        try:
+            pid, status, usage = os.wait4(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+        conn = runs.pop(pid, None)
+        if conn is not None:
+            report = {"status": status, "user": usage.ru_utime, "sys": usage.ru_stime, "max_rss": usage.ru_maxrss}
+            try:
+                conn.sendall(json.dumps(report).encode("utf-8") + b"\n")
+            except OSError:
+                pass
+            conn.close()
+
+sys.stdout.write(json.dumps({"failed": failed}) + "\n")
+sys.stdout.flush()
+while True:
+    for key, _ in selector.select():
+        if key.fileobj is listener:
+            accept()
+        elif key.fileobj == wake_r:
+            os.read(wake_r, 512)
+            reap()
+        elif not os.read(0, 512):
+            sys.exit(0)
+"""
+
+_PYTHON_NAME_RE = re.compile(r'^python[\d.]*$')
+
+_RunUsage = collections.namedtuple("_RunUsage", "ru_utime ru_stime ru_maxrss")
+
+class _WarmProcess:
+    """Popen stand-in for a warm server's child; its exit status arrives over the socket"""
+    def __init__(self, pid, sock, reader):
+        self.pid = pid
+        self.returncode = None
+        self._sock = sock
+        self._reader = reader
+
+    def wait_usage(self):
+        """Block until the server reports the exit; returns its resource usage, or None if the server died"""
+        try:
+            line = self._reader.readline()
+        finally:
+            self._reader.close()
+            self._sock.close()
+        try:
+            report = json.loads(line)
+        except ValueError:
+            return None
+        self.returncode = os.waitstatus_to_exitcode(report["status"])
+        return _RunUsage(report["user"], report["sys"], report["max_rss"])
+
+    def poll(self):
+        return self.returncode
+
+    def terminate(self):
+        os.kill(self.pid, signal.SIGTERM)
+
+    def kill(self):
+        os.kill(self.pid, signal.SIGKILL)
+
+class _WarmPython:
+    """Fork server for one interpreter: preloaded modules, a fresh forked child per run"""
+    CONNECT_TIMEOUT = 5
+
+    def __init__(self, interpreter, modules):
+        self.interpreter = interpreter
+        self.ready = threading.Event()
+        self._dir = tempfile.mkdtemp(prefix="iceide-warm-")  # Private (0700), like the socket in it
+        self.socket_path = os.path.join(self._dir, "server")
+        self.process = _subprocess_popen(
+            [interpreter, "-c", _WARM_PYTHON_SERVER, self.socket_path, *modules],
+            cwd=os.path.expanduser("~"),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+        threading.Thread(target=self._wait_ready, name="Warm Python start", daemon=True).start()
+
+    def _wait_ready(self):
+        line = self.process.stdout.readline()
+        try:
+            failed = json.loads(line)["failed"]
+        except (ValueError, KeyError, TypeError):
+            print(f"Error starting warm Python for {self.interpreter}: server exited")
+            return
+        for failure in failed:
+            print(f"Warm Python could not preload {failure}")
+        self.ready.set()
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def spawn(self, argv, cwd, env, tty_fd):
+        """Have the server fork a child running argv on tty_fd; returns its _WarmProcess"""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(self.CONNECT_TIMEOUT)
+            sock.connect(self.socket_path)
+            payload = json.dumps({"argv": argv, "cwd": cwd, "env": env}).encode("utf-8") + b"\n"
+            sent = sock.sendmsg([payload], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", [tty_fd]).tobytes())])
+            sock.sendall(payload[sent:])
+            reader = sock.makefile("rb")
+            reply = json.loads(reader.readline())
+            sock.settimeout(None)
+        except Exception:
+            sock.close()
+            raise
+        return _WarmProcess(reply["pid"], sock, reader)
+
+    def close(self):
+        try:
+            self.process.stdin.close()  # The server exits on EOF
+            self.process.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+class WarmPythonPool:
+    """Opt-in warm servers for `python script.py` runs, one per interpreter (so per venv).
+
+    A run only goes warm once its interpreter's server has finished preloading;
+    until then it starts cold, so enabling this never makes a run slower.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.modules = []
+        self._servers = {}  # interpreter path -> _WarmPython
+
+    def configure(self, enabled, modules):
+        """Apply settings; servers preloaded with a different module list are shut down"""
+        modules = [str(name) for name in modules]
+        if not enabled or modules != self.modules:
+            self.shutdown()
+        self.enabled = bool(enabled) and not WINDOWS  # Needs fork
+        self.modules = modules
+
+    def prewarm(self, interpreter):
+        if self.enabled and interpreter:
+            self._server(interpreter)
+
+    def _server(self, interpreter):
+        key = os.path.abspath(shutil.which(interpreter) or interpreter)  # Not realpath: venvs symlink their python
+        server = self._servers.get(key)
+        if server is None or not server.alive:
+            if server is not None:
+                server.close()
+            try:
+                server = self._servers[key] = _WarmPython(key, self.modules)
+            except OSError as e:
+                print(f"Error starting warm Python for {key}: {e}")
+                return None
+        return server
+
+    def server_for(self, argv):
+        """The ready server that can run argv (an interpreter and a .py file), or None to run it cold"""
+        if (not self.enabled or len(argv) != 2 or not argv[1].lower().endswith(".py")
+                or not _PYTHON_NAME_RE.match(os.path.basename(argv[0]))):
+            return None
+        server = self._server(argv[0])
+        return server if server is not None and server.ready.is_set() and server.alive else None
+
+    def shutdown(self):
+        for server in self._servers.values():
+            server.close()
+        self._servers.clear()
+
+_warm_python = WarmPythonPool()
+
 # ----------------------------
 # Terminal
 # ----------------------------
+class _TerminalDecoder:
+    """Incremental bytes -> text for terminal output, with CRLF folded to LF"""
+    def __init__(self, encoding):
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self._held_cr = ""  # A "\r" at a chunk end may be the first half of "\r\n"
+
+    def feed(self, data, final=False):
+        text = self._held_cr + self._decoder.decode(data, final)
+        self._held_cr = ""
+        if text.endswith("\r") and not final:
+            self._held_cr = "\r"
+            text = text[:-1]
+        return text.replace("\r\n", "\n")
+
+# VS Code's terminal palette for the 16 basic colours
+_ANSI_COLORS = ("#000000", "#cd3131", "#0dbc79", "#e5e510", "#2472c8", "#bc3fbc", "#11a8cd", "#e5e5e5",
+                "#666666", "#f14c4c", "#23d18b", "#f5f543", "#3b8eea", "#d670d6", "#29b8db", "#ffffff")
+_XTERM_STEPS = (0, 95, 135, 175, 215, 255)
+
+def _xterm_color(n):
+    """Hex colour for an xterm 256-colour index"""
+    if n < 16:
+        return _ANSI_COLORS[n]
+    if n < 232:
+        n -= 16
+        return "#%02x%02x%02x" % (_XTERM_STEPS[n // 36], _XTERM_STEPS[n // 6 % 6], _XTERM_STEPS[n % 6])
+    level = 8 + (n - 232) * 10
+    return "#%02x%02x%02x" % (level, level, level)
+
+def _nearest_xterm_color(r, g, b):
+    """Hex colour of the xterm 256-colour entry closest to a 24-bit colour"""
+    cube = tuple(min(_XTERM_STEPS, key=lambda step: abs(step - v)) for v in (r, g, b))
+    level = 8 + 10 * min(23, max(0, (r + g + b) // 3 - 3) // 10)
+    if sum((c - v) ** 2 for c, v in zip(cube, (r, g, b))) > sum((level - v) ** 2 for v in (r, g, b)):
+        cube = (level, level, level)
+    return "#%02x%02x%02x" % cube
+
+class _AnsiParser:
+    """Streaming VT/ANSI parser: text in, (text, tag) runs out, with SGR state folded into tag names
+
+    A None in the output stands for a bare carriage return. Escapes other than SGR
+    (cursor movement, erase, window titles) are dropped. 24-bit colours are mapped
+    to the 256-colour palette, so the set of tag names stays bounded.
+    """
+    # CSI, OSC, DCS/PM/APC strings, two-byte escapes, and the C0 controls other than \t and \n
+    _TOKEN = re.compile(r"\x1b(?:\[([0-?]*)[ -/]*([@-~])|\][^\x07\x1b]*(?:\x07|\x1b\\)"
+                        r"|[PX^_][^\x1b]*\x1b\\|[ -/]*[0-OQ-WYZ\\`-~])|[\x00-\x08\x0b-\x1a\x1c-\x1f\x7f]")
+    # Characters that need the token scan, likeliest first; any other text is emitted as is
+    _CONTROLS = "\x1b\r\b" + "".join(chr(c) for c in range(32) if c not in (8, 9, 10, 13, 27)) + "\x7f"
+    MAX_HELD = 4096  # an unfinished escape longer than this is shown as text
+    DEFAULT = (None, None, False, False, False, False)  # fg, bg, bold, italic, underline, inverse
+
+    def __init__(self):
+        self._held = ""
+        self._state = self.DEFAULT
+        self._tag = ""
+
+    def feed(self, text):
+        text = self._held + text
+        self._held = ""
+        out = []
+        if not any(c in text for c in self._CONTROLS):
+            # Plain output, by far the common case; substring checks beat the regex scan
+            if text:
+                self._emit(out, text)
+            return out
+        pos = 0
+        for m in self._TOKEN.finditer(text):
+            if m.start() > pos:
+                self._emit(out, text[pos:m.start()])
+            pos = m.end()
+            token = m.group(0)
+            if token == "\r":
+                out.append(None)
+            elif token == "\b":
+                if out and out[-1] is not None and out[-1][0] and out[-1][0][-1] != "\n":
+                    out[-1] = (out[-1][0][:-1], out[-1][1])
+            elif m.group(2) == "m" and m.group(1)[:1] not in ("<", "=", ">", "?"):
+                self._sgr(m.group(1))
+        tail = text[pos:]
+        esc = tail.find("\x1b")
+        if esc >= 0 and len(tail) - esc < self.MAX_HELD:
+            self._held = tail[esc:]
+            tail = tail[:esc]
+        if tail:
+            self._emit(out, tail)
+        return out
+
+    def _emit(self, out, text):
+        text = text.replace("\x1b", "")
+        if out and out[-1] is not None and out[-1][1] == self._tag:
+            out[-1] = (out[-1][0] + text, self._tag)
+        else:
+            out.append((text, self._tag))
+
+    def _sgr(self, params):
+        codes = [int(p) if p.isdigit() else 0 for p in params.replace(":", ";").split(";")]
+        fg, bg, bold, italic, underline, inverse = self._state
+        i = 0
+        while i < len(codes):
+            code = codes[i]
+            if code == 0:
+                fg, bg, bold, italic, underline, inverse = self.DEFAULT
+            elif code == 1:
+                bold = True
+            elif code == 3:
+                italic = True
+            elif code == 4:
+                underline = True
+            elif code == 7:
+                inverse = True
+            elif code == 22:
+                bold = False
+            elif code == 23:
+                italic = False
+            elif code == 24:
+                underline = False
+            elif code == 27:
+                inverse = False
+            elif 30 <= code <= 37 or 90 <= code <= 97:
+                fg = _ANSI_COLORS[code - 30 if code < 90 else code - 82]
+            elif 40 <= code <= 47 or 100 <= code <= 107:
+                bg = _ANSI_COLORS[code - 40 if code < 100 else code - 92]
+            elif code == 39:
+                fg = None
+            elif code == 49:
+                bg = None
+            elif code in (38, 48) and i + 1 < len(codes):
+                color = None
+                if codes[i + 1] == 5 and i + 2 < len(codes):
+                    color = _xterm_color(codes[i + 2] & 255)
+                    i += 2
+                elif codes[i + 1] == 2 and i + 4 < len(codes):
+                    color = _nearest_xterm_color(*(min(255, v) for v in codes[i + 2:i + 5]))
+                    i += 4
+                if color is not None:
+                    if code == 38:
+                        fg = color
+                    else:
+                        bg = color
+            i += 1
+        state = (fg, bg, bold, italic, underline, inverse)
+        if state != self._state:
+            self._state = state
+            self._tag = "" if state == self.DEFAULT else "sgr_%s_%s_%d%d%d%d" % (
+                fg or "", bg or "", bold, italic, underline, inverse)
+
+    @staticmethod
+    def style(tag):
+        """SGR state a tag name stands for"""
+        _, fg, bg, flags = tag.split("_")
+        return (fg or None, bg or None) + tuple(flag == "1" for flag in flags)
+
+class _TerminalIO:
+    """One thread that reads every terminal session's pipes and ptys through a selector
+
+    Callbacks run on this thread: callback(data) per read, then callback(b"") once
+    the descriptor reaches EOF or fails. Windows cannot select on pipes, so there
+    each descriptor gets a blocking reader thread instead.
+    """
+    READ_CHUNK = 65536
+
+    def __init__(self):
+        self._selector = None if WINDOWS else selectors.DefaultSelector()
+        self._changes = queue.SimpleQueue()  # (fd, callback) to add, (fd, None) to drop
+        if self._selector is not None:
+            self._wake_r, self._wake_w = os.pipe()
+            os.set_blocking(self._wake_r, False)
+            self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+            threading.Thread(target=self._run, name="terminal-io", daemon=True).start()
+
+    def register(self, fd, callback):
+        if self._selector is None:
+            threading.Thread(target=self._read_blocking, args=(fd, callback), daemon=True).start()
+            return
+        self._changes.put((fd, callback))
+        self._wake()
+
+    def unregister(self, fd):
+        """Stop reading fd without calling its callback again"""
+        if self._selector is not None:
+            self._changes.put((fd, None))
+            self._wake()
+
+    def _wake(self):
+        try:
+            os.write(self._wake_w, b"x")
+        except BlockingIOError:
+            pass  # Already pending
+
+    def _apply_changes(self):
+        while True:
+            try:
+                fd, callback = self._changes.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                if callback is None:
+                    self._selector.unregister(fd)
+                else:
+                    self._selector.register(fd, selectors.EVENT_READ, callback)
+            except (KeyError, ValueError, OSError) as e:
+                if callback is not None:
+                    print(f"Error watching terminal output: {e}")
+                    self._dispatch(callback, b"")
+
+    def _dispatch(self, callback, data):
+        try:
+            callback(data)
+        except Exception as e:
+            print(f"Error handling terminal output: {e}")
+
+    def _run(self):
+        while True:
+            for key, _ in self._selector.select():
+                if key.data is None:
+                    try:
+                        while os.read(self._wake_r, 4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    self._apply_changes()
+                    continue
+                if key.fd not in self._selector.get_map():
+                    continue  # Dropped by a change applied earlier in this round
+                try:
+                    data = os.read(key.fd, self.READ_CHUNK)
+                except OSError:
+                    data = b""  # EIO once the pty's last writer exits
+                if not data:
+                    self._selector.unregister(key.fd)
+                # One read per ready descriptor per round keeps busy sessions from starving quiet ones
+                self._dispatch(key.data, data)
+
+    def _read_blocking(self, fd, callback):
+        while True:
+            try:
+                data = os.read(fd, self.READ_CHUNK)
+            except OSError:
+                data = b""
+            self._dispatch(callback, data)
+            if not data:
+                return
+
+_terminal_io = None
+_terminal_io_lock = threading.Lock()
+
+def _get_terminal_io():
+    """The shared terminal I/O thread, started on first use"""
+    global _terminal_io
+    with _terminal_io_lock:
+        if _terminal_io is None:
+            _terminal_io = _TerminalIO()
+        return _terminal_io
+
+def _claim_controlling_tty():
+    """Runs in the shell's child process: make the pty on stdin its controlling terminal"""
+    try:
+        fcntl.ioctl(0, termios.TIOCSCTTY, 0)
+    except OSError:
+        pass
+
+def _peak_rss_until_exit(pid, interval=0.05):
+    """Block until pid exits, without reaping it; returns (sampled, highest VmHWM seen in bytes).
+
+    sampled is False where there is no pidfd, and the peak is None when the
+    program exited before the first sample. Linux starts a child's ru_maxrss
+    at the RSS of the process that forked it, so a program smaller than the
+    IDE would report the IDE's size. VmHWM belongs to the program's own
+    address space, and a pidfd wakes us as soon as the program exits.
+    Growth in the last interval before exit is missed, so callers still
+    prefer ru_maxrss once it exceeds the IDE's RSS at fork time.
+    """
+    if not hasattr(os, "pidfd_open"):
+        return False, None
+    try:
+        pidfd = os.pidfd_open(pid)
+    except OSError:
+        return False, None
+    peak = None
+    try:
+        while True:
+            try:
+                with open(f"/proc/{pid}/status", "rb") as f:
+                    for line in f:
+                        if line.startswith(b"VmHWM:"):
+                            # 0 once the exiting program has dropped its memory
+                            peak = max(peak or 0, int(line.split()[1]) * 1024) or None
+                            break
+            except (OSError, ValueError):
+                pass
+            if select.select([pidfd], [], [], interval)[0]:
+                return True, peak
+    finally:
+        os.close(pidfd)
+
+def _resident_bytes():
+    """This process's current RSS in bytes, or None without /proc"""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+class _ScrollbackLog:
+    """Rotating on-disk log of terminal lines trimmed from the widget"""
+    MAX_BYTES = 8 * 1024 * 1024
+    BACKUPS = 3  # rotated files kept besides the live one
+    STALE_SECONDS = 24 * 3600  # logs left behind by a crashed session
+
+    def __init__(self, log_dir, name):
+        os.makedirs(log_dir, exist_ok=True)
+        self._prune(log_dir)
+        self.path = os.path.join(log_dir, name)
+        self._lock = threading.Lock()
+        self._file = open(self.path, "w", encoding="utf-8", errors="replace")
+
+    def _prune(self, log_dir):
+        cutoff = time.time() - self.STALE_SECONDS
+        for entry in os.scandir(log_dir):
+            try:
+                if entry.name.startswith(("scrollback-", "flood-")) and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    def files(self):
+        """Existing log files, oldest first"""
+        candidates = [f"{self.path}.{i}" for i in range(self.BACKUPS, 0, -1)] + [self.path]
+        return [p for p in candidates if os.path.exists(p)]
+
+    def append(self, text):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(text)
+            self._file.flush()
+            if self._file.tell() >= self.MAX_BYTES:
+                self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.BACKUPS, 0, -1):
+            src = f"{self.path}.{i - 1}" if i > 1 else self.path
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i}")
+        self._file = open(self.path, "w", encoding="utf-8", errors="replace")
+
+    def search(self, regex, limit):
+        """Matching spilled lines as (line number, text), oldest first"""
+        hits = []
+        with self._lock:
+            number = 0
+            for path in self.files():
+                try:
+                    with open(path, "r", encoding="utf-8", errors="replace") as f:
+                        for line in f:
+                            number += 1
+                            if regex.search(line):
+                                hits.append((number, line.rstrip("\n")))
+                                if len(hits) >= limit:
+                                    return hits
+                except OSError as e:
+                    print(f"Error reading scrollback log: {e}")
+        return hits
+
+    def export(self, out):
+        """Copy every spilled line, oldest first, into an open text file"""
+        with self._lock:
+            for path in self.files():
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    shutil.copyfileobj(f, out)
+
+    def close(self):
+        """Close and delete the log files; the spill only lives as long as its terminal"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._file = None
+            for path in self.files():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
 class RealTerminal(tk.Frame):
-    def __init__(self, master, project_dir, root, height=10):
+    """One session: output pane, input row and the process behind them.
+
+    A shell session runs bash (cmd.exe on Windows). A run session, made with
+    run_title, has no shell: run() starts programs as managed children and
+    reports each one's exit status, wall time, CPU time and peak RSS.
+    """
+    FRAME_MS = 16  # queued output is drawn at most once per frame
+    SEARCH_LIMIT = 1000
+    STYLE_TAGS = 256  # past this many SGR tags, those no longer on any text are deleted
+    KILL_GRACE_MS = 2000  # after Stop's SIGTERM, SIGKILL if the program is still there
+    # Flood mode: past this rate (or this much text queued for one frame) output is
+    # recorded to disk and the widget only shows a status line and a sampled tail
+    FLOOD_RATE = 2 * 1024 * 1024  # chars per second
+    FLOOD_PENDING_CHARS = 1024 * 1024
+    RATE_WINDOW = 0.25
+    FLOOD_TICK_MS = 250
+    FLOOD_CALM_SECONDS = 1.0  # under a quarter of FLOOD_RATE this long ends it
+    FLOOD_TAIL_CHARS = 16384
+    FLOOD_TAIL_LINES = 30
+
+    def __init__(self, master, project_dir, root, height=10, scrollback=10000, log_dir=None, run_title=None):
         super().__init__(master, bg="#1e1e1e")
         self.root = root
         self.project_dir = project_dir if project_dir else os.path.expanduser("~")
+        self.run_title = run_title
+        self.process = None
+        self.last_run = None  # stats of the last program a run session finished
+        self._run = None  # (steps, cwd, on_exit) of a run session
+        self._run_step = 0
+        self._run_active = False
+        self._stopping = False
+        self._restart_pending = False
+        self._streams_closed = threading.Event()
         self._running = True
+        self._out_lock = threading.Lock()
+        self._out_pending = []  # (text, tag) runs, or None for a carriage return, waiting for the next frame
+        self._flush_scheduled = False
+        self._pty_fd = None  # master side when the process runs on a pty
+        self._pty_size = (120, 24)  # columns, rows the output pane fits
+        self._pty_applied = None
+        self._tag_fonts = {}  # (bold, italic) -> font for SGR tags
+        self._configured_tags = set()
+        self._style_tag_limit = self.STYLE_TAGS
+        self._streams = set()  # descriptors still being read on the I/O thread
+        # Output rate, measured in RATE_WINDOW slices under _out_lock
+        self._pending_chars = 0
+        self._rate = 0.0
+        self._rate_start = time.monotonic()
+        self._rate_chars = 0
+        self._calm_since = None
+        self._flooding = False
+        self._flood_file = None
+        self._flood_path = None
+        self._flood_count = 0
+        # Lines kept in the widget; once it holds a batch more, the oldest go to the spill log
+        self.set_scrollback(scrollback)
+        self._log_dir = log_dir or os.path.join(tempfile.gettempdir(), "iceide-terminal")
+        self._spill = None
+        self._spilled_lines = 0
+        try:
+            self._spill = _ScrollbackLog(self._log_dir, f"scrollback-{os.getpid()}-{id(self):x}.log")
+        except OSError as e:
+            print(f"Error creating scrollback log: {e}")
 
         # Configure the main frame to expand properly
         self.pack_propagate(False)
 
-        # Terminal header - part of the same resizable element
-        header_frame = tk.Frame(self, bg="#1e1e1e", height=25)
-        header_frame.pack(fill=tk.X, padx=0, pady=0)
-        header_frame.pack_propagate(False)
-
-        terminal_label = tk.Label(header_frame, text="TERMINAL", bg="#1e1e1e", fg="#888888",
-                                 font=("Segoe UI", 9, "bold"), anchor='w')
-        terminal_label.pack(fill=tk.X, padx=8, pady=6)
-
         # Main content area that contains both output and input
         content_frame = tk.Frame(self, bg="#1e1e1e")
         content_frame.pack(fill=tk.BOTH, expand=True, padx=0, pady=0)
@@ -269,6 +4516,10 @@ class RealTerminal(tk.Frame):
 
         # Make output text read-only
         self.output.text.config(state='disabled')
+        self.output.text.tag_configure("flood_status", foreground="#e5e510")
+        self.output.text.tag_configure("run_ok", foreground="#23d18b")
+        self.output.text.tag_configure("run_failed", foreground="#f14c4c")
+        self.output.text.bind("<Configure>", self._on_output_configure, add="+")
 
         # Input area - connected visually and functionally
         input_frame = tk.Frame(content_frame, bg="#1e1e1e", height=30)
@@ -284,6 +4535,7 @@ class RealTerminal(tk.Frame):
                                     font=("Consolas", 10))
         self.input_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
         self.input_entry.bind("<Return>", self._on_enter)
+        self.input_entry.bind("<Control-c>", self._send_interrupt)
         self.input_entry.focus_set()
 
         self._content_frame = content_frame
@@ -302,8 +4554,9 @@ class RealTerminal(tk.Frame):
 
         content_frame.bind("<Configure>", _on_content_configure)
 
-        # Start real terminal process
-        self.start_terminal_process()
+        # Start real terminal process; a run session waits for run()
+        if run_title is None:
+            self.start_terminal_process()
 
     def start_terminal_process(self):
         """Start a real terminal process"""
@@ -312,6 +4565,7 @@ class RealTerminal(tk.Frame):
             if os.name == 'nt':
                 oem_cp = ctypes.windll.kernel32.GetOEMCP()
                 encoding = f'cp{oem_cp}'
+            self._encoding = encoding
             if os.name == 'nt':  # Windows
                 # Use wrapper that prevents creating a separate visible console window
                 self.process = _subprocess_popen(
@@ -325,7 +4579,7 @@ class RealTerminal(tk.Frame):
                     errors='replace',
                     bufsize=1
                 )
-            else:  # Linux/Mac
+            elif termios is None or not self._start_pty_shell():  # Linux/Mac without a pty
                 self.process = _subprocess_popen(
                     ['bash'],
                     cwd=self.project_dir,
@@ -338,49 +4592,569 @@ class RealTerminal(tk.Frame):
                     bufsize=1
                 )
 
-            # Start threads to read output
-            self._stdout_t = threading.Thread(target=self._read_stdout, daemon=True)
-            self._stderr_t = threading.Thread(target=self._read_stderr, daemon=True)
-            self._stdout_t.start()
-            self._stderr_t.start()
+            # Hand the output descriptors to the shared I/O thread
+            if self._pty_fd is not None:
+                self._watch(self._pty_fd)
+            else:
+                self._watch(self.process.stdout.fileno())
+                self._watch(self.process.stderr.fileno())
+
+            self._print(f"Terminal started in: {self.project_dir}\n")
+            self._print(f"Type commands below...\n{'='*50}\n")
+        except Exception as e:
+            # If starting the shell failed, print error to embedded terminal area
+            self._print(f"Failed to start terminal process: {e}\n")
+
+    def _start_pty_shell(self):
+        """Run bash on a pseudo-terminal so programs see a TTY; False if no pty is available"""
+        # --noediting: no readline, whose own echo would duplicate the command
+        return self._start_pty_process(['bash', '--noediting', '-i'], self.project_dir)
+
+    def _start_pty_process(self, argv, cwd, warm=None):
+        """Start argv as its own session on a new pseudo-terminal; False if no pty is available
+
+        With a warm server the child is forked from it instead, falling back to
+        a cold start if the server cannot be reached.
+        """
+        try:
+            master_fd, slave_fd = os.openpty()
+        except OSError as e:
+            print(f"Error opening pty, using pipes: {e}")
+            return False
+        try:
+            attrs = termios.tcgetattr(slave_fd)
+            attrs[3] &= ~termios.ECHO  # The input row echoes commands itself
+            termios.tcsetattr(slave_fd, termios.TCSANOW, attrs)
+            env = dict(os.environ, TERM="xterm-256color")
+            self.process = None
+            if warm is not None:
+                try:
+                    self.process = warm.spawn(argv, cwd, env, slave_fd)
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"Error starting warm run, running cold: {e}")
+            self.process = self.process or _subprocess_popen(
+                argv,
+                cwd=cwd,
+                stdin=slave_fd,
+                stdout=slave_fd,
+                stderr=slave_fd,
+                env=env,
+                start_new_session=True,
+                preexec_fn=_claim_controlling_tty
+            )
+        except Exception:
+            os.close(master_fd)
+            raise
+        finally:
+            os.close(slave_fd)
+        self._pty_fd = master_fd
+        self._pty_applied = None
+        self._resize_pty(*self._pty_size)
+        return True
+
+    def _resize_pty(self, cols, rows):
+        self._pty_size = (cols, rows)  # Also used for ptys opened later
+        if self._pty_fd is None or self._pty_applied == (cols, rows):
+            return
+        self._pty_applied = (cols, rows)
+        try:
+            fcntl.ioctl(self._pty_fd, termios.TIOCSWINSZ, struct.pack("HHHH", rows, cols, 0, 0))
+        except OSError:
+            pass
 
-            self._print(f"Terminal started in: {self.project_dir}\n")
-            self._print(f"Type commands below...\n{'='*50}\n")
-        except Exception as e:
-            # If starting the shell failed, print error to embedded terminal area
-            self._print(f"Failed to start terminal process: {e}\n")
+    def _on_output_configure(self, event):
+        """Keep the pty's window size in step with the output pane"""
+        font = self._tag_fonts.get((False, False))
+        if font is None:
+            font = self._tag_fonts[(False, False)] = tkfont.Font(font=self.output.text.cget("font"))
+        self._resize_pty(max(20, event.width // max(1, font.measure("0"))),
+                         max(5, event.height // max(1, font.metrics("linespace"))))
+
+    def _send_interrupt(self, event):
+        """Ctrl+C in the input row interrupts the running program unless text is selected"""
+        if self.input_entry.selection_present() or self._pty_fd is None:
+            return None
+        try:
+            os.write(self._pty_fd, b"\x03")
+        except OSError:
+            pass
+        return "break"
 
-    def _read_stdout(self):
-        """Read stdout from terminal process"""
-        while self._running:
-            try:
-                char = self.process.stdout.read(1)
-                if char:
-                    self.root.after(0, self._print, char)
-            except:
-                break
+    def _watch(self, fd):
+        """Have the I/O thread decode and parse fd's output into this session's queue"""
+        decoder = _TerminalDecoder(self._encoding)
+        parser = _AnsiParser()
+        owned = fd == self._pty_fd  # A pty master is ours to close; pipes belong to their Popen
 
-    def _read_stderr(self):
-        """Read stderr from terminal process"""
-        while self._running:
-            try:
-                char = self.process.stderr.read(1)
-                if char:
-                    self.root.after(0, self._print, char)
-            except:
-                break
+        def on_data(data):
+            if data:
+                self._queue(parser.feed(decoder.feed(data)))
+                return
+            self._queue(parser.feed(decoder.feed(b"", final=True)))
+            self._streams.discard(fd)
+            if owned:
+                if self._pty_fd == fd:
+                    self._pty_fd = None
+                os.close(fd)
+            if not self._streams:
+                self._streams_closed.set()
+                if self._running and self.run_title is None:
+                    code = self.process.poll() if self.process else None
+                    self._print(f"\n[Process exited{'' if code is None else f' with code {code}'}]\n")
+
+        self._streams_closed.clear()
+        self._streams.add(fd)
+        _get_terminal_io().register(fd, on_data)
 
     def _print(self, text):
-        """Print text to terminal output"""
+        """Queue plain text for the terminal output; safe to call from any thread"""
+        if text:
+            self._queue([(text, "")])
+
+    def _queue(self, runs):
+        """Queue parsed (text, tag) runs for the next frame, or record them while flooding
+
+        At most one after() is pending per session, however fast output arrives.
+        """
+        if not runs:
+            return
+        chars = sum(len(run[0]) for run in runs if run is not None)
+        with self._out_lock:
+            now = self._measure(chars)
+            if not self._flooding and (self._rate > self.FLOOD_RATE or
+                                       self._pending_chars + chars > self.FLOOD_PENDING_CHARS):
+                self._start_flood(now)
+            if self._flooding:
+                self._record_flood(runs)
+            else:
+                self._out_pending.extend(runs)
+                self._pending_chars += chars
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+            delay = self.FLOOD_TICK_MS if self._flooding else self.FRAME_MS
+        try:
+            self.root.after(delay, self._flush_output)
+        except RuntimeError:
+            pass  # Main loop already gone
+
+    def _measure(self, chars):
+        """Fold chars into the output rate; called under _out_lock"""
+        now = time.monotonic()
+        self._rate_chars += chars
+        elapsed = now - self._rate_start
+        if elapsed >= self.RATE_WINDOW:
+            self._rate = self._rate_chars / elapsed
+            self._rate_start, self._rate_chars = now, 0
+            if self._rate >= self.FLOOD_RATE / 4:
+                self._calm_since = None
+            elif self._calm_since is None:
+                self._calm_since = now
+        return now
+
+    def _start_flood(self, now):
+        """Switch to flood mode; called under _out_lock"""
+        self._flooding = True
+        self._flood_started = now
+        self._flood_chars = 0
+        self._flood_tail = ""
+        self._calm_since = None
+        self._flood_count += 1
+        self._flood_path = os.path.join(self._log_dir,
+                                        f"flood-{os.getpid()}-{id(self):x}-{self._flood_count}.log")
+        try:
+            os.makedirs(self._log_dir, exist_ok=True)
+            self._flood_file = open(self._flood_path, "w", encoding="utf-8", errors="replace")
+        except OSError as e:
+            print(f"Error creating flood recording: {e}")
+            self._flood_file = self._flood_path = None
+
+    def _record_flood(self, runs):
+        """Write runs to the recording and keep the tail; called under _out_lock"""
+        text = "".join("\r" if run is None else run[0] for run in runs)
+        self._flood_chars += len(text)
+        self._flood_tail = (self._flood_tail + text)[-self.FLOOD_TAIL_CHARS:]
+        if self._flood_file is not None:
+            try:
+                self._flood_file.write(text)
+            except (OSError, ValueError) as e:
+                print(f"Error writing flood recording: {e}")
+                self._flood_file = None
+
+    def _end_flood(self):
+        """Leave flood mode; called under _out_lock"""
+        self._flooding = False
+        if self._flood_file is not None:
+            try:
+                self._flood_file.close()
+            except OSError:
+                pass
+            self._flood_file = None
+
+    @staticmethod
+    def _collapse_runs(runs):
+        """Merge queued runs into insert() arguments, applying carriage returns
+
+        Returns (args, erase): alternating text/tag arguments, and whether the
+        widget's last line must be cleared first because a carriage return
+        reached back past everything queued.
+        """
+        args = []
+        erase = False
+        for run in runs:
+            if run is None:
+                # Carriage return: drop what was queued since the last newline
+                while args:
+                    cut = args[-2].rfind("\n")
+                    if cut >= 0:
+                        args[-2] = args[-2][:cut + 1]
+                        break
+                    del args[-2:]
+                else:
+                    erase = True
+            elif args and args[-1] == run[1]:
+                args[-2] += run[0]
+            elif run[0]:
+                args += [run[0], run[1]]
+        return args, erase
+
+    def _configure_tag(self, tag):
+        """Create the Text tag for an SGR state the first time it is used"""
+        fg, bg, bold, italic, underline, inverse = _AnsiParser.style(tag)
+        if inverse:
+            fg, bg = bg or "#1e1e1e", fg or "#d4d4d4"
+        options = {"underline": underline}
+        if fg:
+            options["foreground"] = fg
+        if bg:
+            options["background"] = bg
+        if bold or italic:
+            font = self._tag_fonts.get((bold, italic))
+            if font is None:
+                font = tkfont.Font(font=self.output.text.cget("font"))
+                font.configure(weight="bold" if bold else "normal", slant="italic" if italic else "roman")
+                self._tag_fonts[(bold, italic)] = font
+            options["font"] = font
+        self.output.text.tag_configure(tag, **options)
+        self.output.text.tag_raise("sel")
+        self._configured_tags.add(tag)
+
+    def _drop_unused_tags(self):
+        """Delete SGR tags that no longer style any text (scrolled out or erased)"""
+        text = self.output.text
+        for tag in list(self._configured_tags):
+            if not text.tag_nextrange(tag, "1.0"):
+                text.tag_delete(tag)
+                self._configured_tags.discard(tag)
+        # Tags still in use set the next threshold, so a colourful screen is not swept every frame
+        self._style_tag_limit = max(self.STYLE_TAGS, 2 * len(self._configured_tags))
+
+    def _flush_output(self):
+        """Draw everything queued since the last frame with one insert and one scroll"""
+        flood = None
+        with self._out_lock:
+            runs, self._out_pending = self._out_pending, []
+            self._pending_chars = 0
+            self._flush_scheduled = False
+            if self._flooding:
+                now = self._measure(0)
+                ending = self._calm_since is not None and now - self._calm_since >= self.FLOOD_CALM_SECONDS
+                flood = (self._flood_chars, now - self._flood_started, self._rate, self._flood_tail,
+                         self._flood_path, ending)
+                if ending:
+                    self._end_flood()
+                else:
+                    self._flush_scheduled = True  # Keep sampling until the flood is over
+        if flood is not None and not flood[-1]:
+            self.root.after(self.FLOOD_TICK_MS, self._flush_output)
+        args, erase = self._collapse_runs(runs)
         try:
+            for tag in args[1::2]:
+                if tag and tag not in self._configured_tags:
+                    self._configure_tag(tag)
             # Enable text widget to insert, then disable again
             self.output.text.config(state='normal')
-            self.output.text.insert(tk.END, text)
+            if erase:
+                self.output.text.delete('end-1c linestart', 'end-1c')
+            if args:
+                self.output.text.insert(tk.END, *args)
+            if flood is not None:
+                self._draw_flood(*flood)
+            self._trim_scrollback()
+            if len(self._configured_tags) > self._style_tag_limit:
+                self._drop_unused_tags()
             self.output.text.config(state='disabled')
             self.output.text.see(tk.END)
         except tk.TclError:
             pass
 
+    def _draw_flood(self, chars, seconds, rate, tail, path, ending):
+        """Replace the flood view (everything after the "flood" mark) with a status line and the tail"""
+        text = self.output.text
+        if "flood" not in text.mark_names():
+            if text.compare("end-1c", "!=", "end-1c linestart"):
+                text.insert(tk.END, "\n")  # Start the view on its own line
+            text.mark_set("flood", "end-1c")
+            text.mark_gravity("flood", "left")
+        # A carriage return rewrites its line, so only what follows the last one shows
+        lines = [line.rsplit("\r", 1)[-1] for line in tail.split("\n")]
+        if len(tail) == self.FLOOD_TAIL_CHARS:
+            lines = lines[1:]  # Cut mid-line
+        shown = "\n".join(lines[-self.FLOOD_TAIL_LINES:])
+        if shown and not shown.endswith("\n"):
+            shown += "\n"
+        mb = chars / (1024 * 1024)
+        saved = f"full output saved to {path}" if path else "recording failed"
+        text.delete("flood", tk.END)
+        if ending:
+            status = f"[Flood mode ended: {mb:.1f} MB in {seconds:.1f}s; {saved}]\n"
+            text.insert(tk.END, shown, "", status, "flood_status")
+            text.mark_unset("flood")
+        else:
+            status = (f"[Flood mode: {rate / (1024 * 1024):.1f} MB/s, {mb:.1f} MB so far; "
+                      f"showing the last lines, {saved}]\n")
+            text.insert(tk.END, status, "flood_status", shown, "")
+
+    def set_scrollback(self, lines):
+        """Change the number of lines kept in the widget"""
+        self.scrollback = max(100, int(lines))
+        self._trim_batch = max(100, self.scrollback // 10)
+
+    def _trim_scrollback(self):
+        """Move the oldest lines to the spill log once the widget holds a batch over the cap"""
+        text = self.output.text
+        lines = int(text.index('end-1c').split('.')[0])
+        if lines <= self.scrollback + self._trim_batch:
+            return
+        cut = f"{lines - self.scrollback + 1}.0"
+        if self._spill is not None:
+            self._spill.append(text.get('1.0', cut))
+        text.delete('1.0', cut)
+        self._spilled_lines += lines - self.scrollback
+
+    def show_search(self):
+        """Search the whole scrollback, spilled lines included"""
+        win = tk.Toplevel(self.root)
+        win.title("Search Terminal")
+        win.configure(bg="#1e1e1e")
+        win.geometry("700x400")
+
+        entry = tk.Entry(win, bg="#2d2d2d", fg="white", insertbackground="white",
+                         relief=tk.FLAT, font=("Consolas", 11))
+        entry.pack(fill=tk.X, padx=8, pady=(8, 4), ipady=4)
+        results = tk.Listbox(win, bg="#1e1e1e", fg="#d4d4d4", selectbackground="#094771",
+                             relief=tk.FLAT, font=("Consolas", 10), activestyle='none')
+        results.pack(fill=tk.BOTH, expand=True, padx=8)
+        status = tk.Label(win, text="Regex; spilled lines are marked 'log'", anchor='w',
+                          bg="#1e1e1e", fg="#888888", font=("Arial", 9))
+        status.pack(fill=tk.X, padx=8, pady=(2, 6))
+        targets = []  # listbox row -> widget line, or None for spilled lines
+
+        def run(event=None):
+            try:
+                regex = re.compile(entry.get())
+            except re.error as e:
+                status.config(text=f"Invalid pattern: {e}")
+                return
+            live = self.output.text.get('1.0', 'end-1c').split("\n")
+            spill = self._spill
+            status.config(text="Searching...")
+
+            def work():
+                hits = [("log", n, line) for n, line in spill.search(regex, self.SEARCH_LIMIT)] if spill else []
+                for n, line in enumerate(live, 1):
+                    if len(hits) >= self.SEARCH_LIMIT:
+                        break
+                    if regex.search(line):
+                        hits.append(("", n, line))
+                try:
+                    self.root.after(0, show, hits)
+                except RuntimeError:
+                    pass  # Main loop already gone
+
+            threading.Thread(target=work, daemon=True).start()
+
+        def show(hits):
+            if not win.winfo_exists():
+                return
+            results.delete(0, tk.END)
+            targets.clear()
+            for where, n, line in hits:
+                results.insert(tk.END, f"{where or n:>6}  {line[:300]}")
+                targets.append(None if where else n)
+            more = "+" if len(hits) >= self.SEARCH_LIMIT else ""
+            status.config(text=f"{len(hits)}{more} matching lines")
+
+        def jump(event=None):
+            selection = results.curselection()
+            if not selection or targets[selection[0]] is None:
+                return
+            index = f"{targets[selection[0]]}.0"
+            self.output.text.tag_remove('sel', '1.0', tk.END)
+            self.output.text.tag_add('sel', index, f"{index} lineend")
+            self.output.text.see(index)
+
+        entry.bind("<Return>", run)
+        results.bind("<Double-Button-1>", jump)
+        results.bind("<Return>", jump)
+        win.bind("<Escape>", lambda e: win.destroy())
+        entry.focus_set()
+
+    def export_scrollback(self):
+        """Save the whole scrollback, spilled lines first, to a file"""
+        path = filedialog.asksaveasfilename(initialdir=self.project_dir, defaultextension=".log",
+                                            initialfile="terminal.log",
+                                            filetypes=[("Log files", "*.log"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            with open(path, "w", encoding="utf-8", errors="replace") as out:
+                if self._spill is not None:
+                    self._spill.export(out)
+                out.write(self.output.text.get('1.0', 'end-1c'))
+        except OSError as e:
+            messagebox.showerror("Export Error", f"Could not export terminal output: {e}")
+
+    def run(self, steps, cwd=None, on_exit=None):
+        """Run each argv in steps after the previous one succeeds (e.g. compile, then run).
+
+        A program already running here is stopped first. on_exit(stats) gets the
+        last step's stats: argv, exit code, wall, cpu, user, sys (seconds) and
+        max_rss (bytes, None where unavailable).
+        """
+        self._run = (steps, cwd or self.project_dir, on_exit)
+        if self._run_active:
+            self._restart_pending = True
+            self.stop()
+        else:
+            self._start_run()
+
+    def restart(self):
+        """Run the last steps again, stopping the current program first"""
+        if self._run is not None:
+            self.run(*self._run)
+
+    def stop(self):
+        """Stop the program (SIGTERM to its process group, then SIGKILL); a shell gets Ctrl+C"""
+        process = self.process
+        if self.run_title is None:
+            if self._pty_fd is not None:
+                self._send_interrupt(None)
+            return
+        if not self._run_active or process is None:
+            return
+        self._stopping = True
+        self._signal_run(process)
+
+        def kill():
+            if self._run_active and self.process is process:
+                self._signal_run(process, kill=True)
+        self.root.after(self.KILL_GRACE_MS, kill)
+
+    @staticmethod
+    def _signal_run(process, kill=False):
+        """SIGTERM (or SIGKILL) the program's process group, which includes any children it started"""
+        try:
+            if WINDOWS:
+                process.kill() if kill else process.terminate()
+            else:
+                os.killpg(process.pid, signal.SIGKILL if kill else signal.SIGTERM)
+        except OSError:
+            pass
+
+    def _start_run(self):
+        self._run_step = 0
+        self._stopping = False
+        self._start_step()
+
+    def _start_step(self):
+        steps, cwd, _ = self._run
+        argv = [str(arg) for arg in steps[self._run_step]]
+        self._print(f"$ {subprocess.list2cmdline(argv) if WINDOWS else ' '.join(shlex.quote(a) for a in argv)}\n")
+        try:
+            self._encoding = f'cp{ctypes.windll.kernel32.GetOEMCP()}' if WINDOWS else 'utf-8'
+            fork_rss = _resident_bytes()
+            started = time.perf_counter()
+            warm = _warm_python.server_for(argv) if termios is not None else None
+            if termios is None or not self._start_pty_process(argv, cwd, warm):
+                self.process = _subprocess_popen(argv, cwd=cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                                 stderr=subprocess.PIPE, text=True, encoding=self._encoding,
+                                                 errors='replace', bufsize=1, start_new_session=not WINDOWS)
+        except Exception as e:
+            self._print(f"Failed to start {argv[0]}: {e}\n")
+            return
+        self._run_active = True
+        if isinstance(self.process, _WarmProcess):
+            fork_rss = None  # Forked from the server, whose preloaded modules a cold run would load too
+        if self._pty_fd is not None:
+            self._watch(self._pty_fd)
+        else:
+            self._watch(self.process.stdout.fileno())
+            self._watch(self.process.stderr.fileno())
+        threading.Thread(target=self._wait_run, args=(self.process, argv, started, fork_rss),
+                         name="run waiter", daemon=True).start()
+
+    def _wait_run(self, process, argv, started, fork_rss):
+        """Waiter thread: reap the program with its resource usage, then report on the main loop"""
+        usage = None
+        sampled, peak = _peak_rss_until_exit(process.pid)
+        if isinstance(process, _WarmProcess):
+            usage = process.wait_usage()
+        elif hasattr(os, "wait4"):
+            try:
+                _, status, usage = os.wait4(process.pid, 0)
+                process.returncode = os.waitstatus_to_exitcode(status)
+            except ChildProcessError:
+                process.wait()  # Reaped elsewhere first; exit code only
+        else:
+            process.wait()
+        wall = time.perf_counter() - started
+        self._streams_closed.wait(2.0)  # Let the last output reach the queue first
+        stats = {"argv": argv, "exit": process.returncode, "wall": wall, "warm": isinstance(process, _WarmProcess),
+                 "cpu": None, "user": None, "sys": None, "max_rss": None}
+        if usage is not None:
+            max_rss = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+            # Above the forked copy of the IDE (plus pages touched before exec), it is the program's own peak
+            if sampled and fork_rss is not None and max_rss <= fork_rss * 1.1:
+                max_rss = peak
+            stats.update(user=usage.ru_utime, sys=usage.ru_stime, cpu=usage.ru_utime + usage.ru_stime,
+                         max_rss=max_rss)
+        try:
+            self.root.after(0, self._run_finished, process, stats)
+        except RuntimeError:
+            pass  # Main loop already gone
+
+    def _run_finished(self, process, stats):
+        if process is not self.process or not self._running:
+            return
+        self._run_active = False
+        self.last_run = stats
+        code = stats["exit"]
+        if code is not None and code < 0 and not WINDOWS:
+            try:
+                outcome = f"killed by {signal.Signals(-code).name}"
+            except ValueError:
+                outcome = f"killed by signal {-code}"
+        else:
+            outcome = f"exit code {code}"
+        parts = [f"{os.path.basename(stats['argv'][0])}{' (warm)' if stats['warm'] else ''}: {outcome}",
+                 f"wall {stats['wall']:.3f}s"]
+        if stats["cpu"] is not None:
+            parts.append(f"cpu {stats['cpu']:.3f}s (user {stats['user']:.3f}s, sys {stats['sys']:.3f}s)")
+        if stats["max_rss"] is not None:
+            parts.append(f"peak RSS {stats['max_rss'] / (1024 * 1024):.1f} MB")
+        self._queue([(f"[{' | '.join(parts)}]\n", "run_ok" if code == 0 else "run_failed")])
+
+        steps, _, on_exit = self._run
+        if self._restart_pending:
+            self._restart_pending = False
+            self._start_run()
+        elif code == 0 and not self._stopping and self._run_step + 1 < len(steps):
+            self._run_step += 1
+            self._start_step()
+        elif on_exit is not None:
+            on_exit(stats)
+
     def _on_enter(self, event):
         """Handle command input"""
         cmd = self.input_entry.get().strip()
@@ -388,36 +5162,169 @@ class RealTerminal(tk.Frame):
             return
 
         # Echo the command
-        self._print(f"> {cmd}\n")
+        self._echo(cmd)
 
         # Send to process
         try:
-            self.process.stdin.write(cmd + "\n")
-            self.process.stdin.flush()
+            self._write_input(cmd + "\n")
         except Exception as e:
             self._print(f"Error sending command: {e}\n")
 
         self.input_entry.delete(0, tk.END)
 
+    def _echo(self, cmd):
+        # A pty shell has already printed its prompt in front of the command
+        self._print(f"{cmd}\n" if self._pty_fd is not None else f"> {cmd}\n")
+
+    def _write_input(self, text):
+        if self._pty_fd is not None:
+            os.write(self._pty_fd, text.encode(self._encoding, "replace"))
+        else:
+            self.process.stdin.write(text)
+            self.process.stdin.flush()
+
     def send_command(self, cmd):
         """Send a command to the terminal"""
         try:
-            self.process.stdin.write(cmd + "\n")
-            self.process.stdin.flush()
-            self._print(f"> {cmd}\n")
+            self._write_input(cmd + "\n")
+            self._echo(cmd)
         except Exception as e:
             self._print(f"Error sending command: {e}\n")
 
     def shutdown(self):
-        """Shutdown terminal process"""
+        """Shutdown terminal process; its descriptors close once the I/O thread sees EOF"""
         self._running = False
+        self._restart_pending = False
+        self._stopping = True  # A run session starts no further steps
+        if self._spill is not None:
+            self._spill.close()
+        with self._out_lock:
+            self._end_flood()
         try:
             if self.process and (self.process.poll() is None):
-                self.process.terminate()
+                if self._pty_fd is not None:
+                    # An interactive bash ignores SIGTERM; hang up its session like a closed window
+                    os.killpg(self.process.pid, signal.SIGHUP)
+                else:
+                    self.process.terminate()
         except:
             pass
 
 
+class TerminalPanel(tk.Frame):
+    """Terminal tabs; each tab is a RealTerminal session and all of them share one I/O thread"""
+    def __init__(self, master, project_dir, root, scrollback=10000, log_dir=None):
+        super().__init__(master, bg="#1e1e1e")
+        self.root = root
+        self.project_dir = project_dir
+        self.scrollback = scrollback
+        self.log_dir = log_dir
+        self._session_count = 0
+
+        # Configure the main frame to expand properly
+        self.pack_propagate(False)
+
+        # Terminal header - part of the same resizable element
+        header_frame = tk.Frame(self, bg="#1e1e1e", height=25)
+        header_frame.pack(fill=tk.X, padx=0, pady=0)
+        header_frame.pack_propagate(False)
+
+        for text, command in (("Export", lambda: self.active.export_scrollback()),
+                              ("Search", lambda: self.active.show_search()),
+                              ("Close", self.close_session), ("New", self.new_session),
+                              ("Restart", lambda: self.active.restart()), ("Stop", lambda: self.active.stop())):
+            tk.Button(header_frame, text=text, command=command, bg="#1e1e1e", fg="#888888",
+                      activebackground="#2d2d2d", activeforeground="white", relief=tk.FLAT,
+                      bd=0, font=("Segoe UI", 8)).pack(side=tk.RIGHT, padx=(0, 6))
+
+        terminal_label = tk.Label(header_frame, text="TERMINAL", bg="#1e1e1e", fg="#888888",
+                                 font=("Segoe UI", 9, "bold"), anchor='w')
+        terminal_label.pack(fill=tk.X, padx=8, pady=6)
+
+        self.notebook = ttk.Notebook(self)
+        self.notebook.pack(fill=tk.BOTH, expand=True)
+        self.new_session()
+
+    @property
+    def sessions(self):
+        return [self.notebook.nametowidget(tab) for tab in self.notebook.tabs()]
+
+    @property
+    def active(self):
+        return self.notebook.nametowidget(self.notebook.select())
+
+    @property
+    def shell(self):
+        """The showing session if it is a shell, else the newest shell tab (opened if none is left)"""
+        if self.active.run_title is None:
+            return self.active
+        shells = [session for session in self.sessions if session.run_title is None]
+        return shells[-1] if shells else self.new_session()
+
+    def new_session(self, project_dir=None):
+        """Open another shell in a new tab and switch to it"""
+        project_dir = project_dir or self.project_dir
+        session = RealTerminal(self.notebook, project_dir, self.root,
+                               scrollback=self.scrollback, log_dir=self.log_dir)
+        self._session_count += 1
+        name = os.path.basename(os.path.normpath(session.project_dir)) or session.project_dir
+        self.notebook.add(session, text=f"{self._session_count}: {name}")
+        self.notebook.select(session)
+        session.input_entry.focus_set()
+        return session
+
+    def run_session(self, title="Run"):
+        """Show the run tab called title, opening it if needed"""
+        for session in self.sessions:
+            if session.run_title == title:
+                break
+        else:
+            session = RealTerminal(self.notebook, self.project_dir, self.root, scrollback=self.scrollback,
+                                   log_dir=self.log_dir, run_title=title)
+            self.notebook.add(session, text=title)
+        self.notebook.select(session)
+        return session
+
+    def run(self, steps, cwd=None, title="Run", on_exit=None):
+        """Run steps (argv lists) in the run tab called title, replacing whatever it ran before"""
+        session = self.run_session(title)
+        session.run(steps, cwd=cwd, on_exit=on_exit)
+        return session
+
+    def close_session(self):
+        """End the active session; the panel always keeps one open"""
+        session = self.active
+        session.shutdown()
+        self.notebook.forget(session)
+        session.destroy()
+        if not self.notebook.tabs():
+            self.new_session()
+
+    def set_project_dir(self, project_dir):
+        """Open a session in the new folder; sessions already running keep going"""
+        self.project_dir = project_dir
+        self.new_session()
+
+    def set_scrollback(self, lines):
+        self.scrollback = lines
+        for session in self.sessions:
+            session.set_scrollback(lines)
+
+    # The IDE prints to whichever session is showing and types commands into a shell
+    def _print(self, text):
+        self.active._print(text)
+
+    def send_command(self, cmd):
+        session = self.shell
+        self.notebook.select(session)
+        session.send_command(cmd)
+
+    def shutdown(self):
+        """Shutdown every session"""
+        for session in self.sessions:
+            session.shutdown()
+
+
 # ----------------------------
 # Advanced Debugger
 # ----------------------------
@@ -576,10 +5483,46 @@ class DebugPanel(tk.Frame):
             file_path, line_num = bp
             self.bp_listbox.insert(tk.END, f"{os.path.basename(file_path)}:{line_num}")
 
+# ----------------------------
+# Tab Hibernation
+# ----------------------------
+class HibernatedTab:
+    """What a tab needs to rebuild its editor after the widget was destroyed"""
+    __slots__ = ("content", "compressed", "cursor", "yview", "modified", "breakpoints", "highlight")
+
+    def __init__(self, ds):
+        text = ds.text
+        content = text.get("1.0", "end-1c")
+        self.modified = bool(text.edit_modified())
+        # Saved text is compressed; unsaved edits stay as they are
+        self.compressed = not self.modified
+        self.content = zlib.compress(content.encode("utf-8")) if self.compressed else content
+        self.cursor = text.index("insert")
+        self.yview = text.yview()[0]
+        self.breakpoints = [str(index) for index in text.tag_ranges("breakpoint")]
+        highlighter = getattr(text, "_highlighter", None)
+        self.highlight = highlighter.snapshot() if highlighter is not None else None
+
+    def restore(self, ds):
+        """Fill a freshly built editor with the saved text, view and highlighting"""
+        text = ds.text
+        content = zlib.decompress(self.content).decode("utf-8") if self.compressed else self.content
+        text.insert("1.0", content)
+        highlighter = getattr(text, "_highlighter", None)
+        if highlighter is not None and self.highlight is not None:
+            highlighter.restore(self.highlight)
+        if self.breakpoints:
+            text.tag_add("breakpoint", *self.breakpoints)
+        text.mark_set("insert", self.cursor)
+        text.yview_moveto(self.yview)
+        text.edit_modified(self.modified)
+
 # ----------------------------
 # IceIDE with Terminal
 # ----------------------------
 class IceIDE:
+    TREE_PAGE = 500  # explorer rows materialized per folder page
+
     def __init__(self, root):
         self.root = root
         self.root.title("Ice IDE")
@@ -619,14 +5562,27 @@ class IceIDE:
         
         # Config setup (replaces .env)
         self.setup_config()
+
+        # Syntax grammars: user overrides first, then ones bundled with the app
+        self.grammars = GrammarRegistry([os.path.join(self.config_dir, "grammars"),
+                                         resource_path("grammars")])
         
         # Initialize debugger
         self.debugger = AdvancedDebugger(self)
         self.debug_panel_visible = False
 
         # File system monitoring
-        self._file_monitor_running = False
-        self._last_tree_state = set()
+        self._file_watcher = None
+        self.ignore_matcher = None
+        self.project_index = None
+        self.quick_open_index = None
+        self._quick_open_window = None
+        self.search_index = None
+        self._find_window = None
+        self.symbol_index = None
+        self.build_cache = None
+        self.project_build = None
+        self.benchmark_history = None
 
         # theme
         self.style = ttkb.Style(theme="darkly")
@@ -648,12 +5604,19 @@ class IceIDE:
         # keybindings
         self.root.bind_all("<Control-s>", self._on_ctrl_s)
         self.root.bind_all("<F5>", self._on_f5)
+        self.root.bind_all("<Shift-F5>", self.benchmark_run)
         self.root.bind_all("<F4>", self._on_f4)
         self.root.bind_all("<F9>", self._toggle_breakpoint)
+        self.root.bind_all("<Control-p>", self.show_quick_open)
+        self.root.bind_all("<Control-Shift-F>", self.show_find_in_files)
+        self.root.bind_all("<F12>", self.go_to_definition)
+        self.root.bind_all("<Control-Shift-B>", self.build_project)
         
         # Load config and initialize Groq (after UI elements are created)
         self.load_config()
         self.auto_detect_interpreters()
+        if _warm_python.enabled:
+            _warm_python.prewarm(self.get_current_interpreter('python'))
         
         # Check if API key is available
         if not self.groq_api_key:
@@ -678,6 +5641,16 @@ class IceIDE:
         """Load configuration from JSON"""
         self.groq_api_key = ""
         self.ai_model_name = "moonshotai/kimi-k2-instruct-0905"  # Default
+        self.large_file_mb = 20  # Files at least this big open in the paged read-only viewer
+        self.max_live_tabs = 10  # Editors kept alive; older background tabs hibernate
+        self.exclude_patterns = list(DEFAULT_EXCLUDES)  # gitignore-style, skipped by project scans
+        self.terminal_scrollback = 10000  # Terminal lines kept on screen; older ones spill to disk
+        self.build_cache_mb = 512  # Compiled binaries kept per project, least recently run evicted first
+        self.build_flags = {}  # language -> extra compiler flags, e.g. {"cpp": ["-O2"]}
+        self.benchmark_runs = 10  # Measured runs per Benchmark Run
+        self.benchmark_warmup = 2  # Runs before those, not measured
+        self.python_warm_run = False  # Fork .py runs from a warm interpreter (Linux/Mac)
+        self.python_preload = []  # Modules the warm interpreter imports up front, e.g. ["numpy", "pandas"]
         if os.path.exists(self.config_path):
             try:
                 with open(self.config_path, "r") as f:
@@ -685,8 +5658,22 @@ class IceIDE:
                     self.groq_api_key = config.get("GROQ_API_KEY", "")
                     self.ai_model_name = config.get("AI_MODEL_NAME", self.ai_model_name)
                     self.interpreters = config.get("interpreters", self.interpreters)
+                    self.large_file_mb = config.get("LARGE_FILE_MB", self.large_file_mb)
+                    self.max_live_tabs = config.get("MAX_LIVE_TABS", self.max_live_tabs)
+                    self.exclude_patterns = config.get("EXCLUDE", self.exclude_patterns)
+                    self.terminal_scrollback = config.get("TERMINAL_SCROLLBACK", self.terminal_scrollback)
+                    self.build_cache_mb = config.get("BUILD_CACHE_MB", self.build_cache_mb)
+                    self.build_flags = config.get("BUILD_FLAGS", self.build_flags)
+                    self.benchmark_runs = config.get("BENCHMARK_RUNS", self.benchmark_runs)
+                    self.benchmark_warmup = config.get("BENCHMARK_WARMUP", self.benchmark_warmup)
+                    self.python_warm_run = config.get("PYTHON_WARM_RUN", self.python_warm_run)
+                    self.python_preload = config.get("PYTHON_PRELOAD", self.python_preload)
             except Exception as e:
                 print(f"Error loading config: {e}")
+        if hasattr(self, 'terminal'):
+            self.terminal.set_scrollback(self.terminal_scrollback)
+        _warm_python.configure(self.python_warm_run, self.python_preload)
+        self.warm_run_var.set(_warm_python.enabled)
         self.update_interpreter_display()
 
     def save_config(self):
@@ -694,6 +5681,16 @@ class IceIDE:
         config = {
             "GROQ_API_KEY": self.groq_api_key,
             "AI_MODEL_NAME": self.ai_model_name,
+            "LARGE_FILE_MB": self.large_file_mb,
+            "MAX_LIVE_TABS": self.max_live_tabs,
+            "EXCLUDE": self.exclude_patterns,
+            "TERMINAL_SCROLLBACK": self.terminal_scrollback,
+            "BUILD_CACHE_MB": self.build_cache_mb,
+            "BUILD_FLAGS": self.build_flags,
+            "BENCHMARK_RUNS": self.benchmark_runs,
+            "BENCHMARK_WARMUP": self.benchmark_warmup,
+            "PYTHON_WARM_RUN": self.python_warm_run,
+            "PYTHON_PRELOAD": self.python_preload,
             "interpreters": self.interpreters
         }
         try:
@@ -760,7 +5757,10 @@ class IceIDE:
         terminal_frame = ttk.Frame(self.main_paned)
         
         # The entire terminal (including header) is now one resizable unit
-        self.terminal = RealTerminal(terminal_frame, self.project_dir, self.root)
+        self.terminal = TerminalPanel(terminal_frame, self.project_dir, self.root,
+                                      log_dir=os.path.join(self.config_dir, "terminal"))
+        if hasattr(self, 'terminal_scrollback'):  # Config is loaded after the first terminal
+            self.terminal.set_scrollback(self.terminal_scrollback)
         self.terminal.pack(fill=tk.BOTH, expand=True)
         
         return terminal_frame
@@ -822,37 +5822,72 @@ class IceIDE:
                     continue
 
     def _start_file_monitor(self):
-        """Start monitoring file system for changes"""
-        self._file_monitor_running = True
-        self._monitor_files()
+        """Watch the project folder for changes, replacing any previous watcher"""
+        if self._file_watcher is not None:
+            self._file_watcher.stop()
+            self._file_watcher = None
+        if self.search_index is not None:
+            self.search_index.close()
+            self.search_index = None
+        if self.symbol_index is not None:
+            self.symbol_index.close()
+            self.symbol_index = None
+        if self.project_index is not None:
+            self.project_index.close()
+            self.project_index = None
+        self.ignore_matcher = None
+        self.quick_open_index = None
+        if self.project_dir and os.path.isdir(self.project_dir):
+            # Shared by every project scan so .gitignore files are read once
+            self.ignore_matcher = IgnoreMatcher(self.project_dir, self.exclude_patterns)
+            self.project_index = ProjectIndex(self.project_dir, os.path.join(self.config_dir, "index"),
+                                              self.ignore_matcher, on_ready=self._on_project_indexed)
+            self.quick_open_index = QuickOpenIndex()
+            self.project_index.add_listener(self.quick_open_index.update)
+            self.search_index = SearchIndex(self.project_index)
+            self.project_index.add_listener(self.search_index.update)
+            self.symbol_index = SymbolIndex(self.project_index, self.grammars, on_change=self._on_symbols_changed)
+            self.project_index.add_listener(self.symbol_index.update)
+            self.project_index.start()
+            self._file_watcher = FileWatcher(self.project_dir, self._on_fs_events, self.ignore_matcher,
+                                             on_folder_events=self._on_folder_fs_events)
+            self._file_watcher.show_folders(self._tree_loaded)
+
+    def _on_project_indexed(self, index):
+        """Index worker: report how long the project index took to become usable"""
+        try:
+            self.root.after(0, self._flash_status,
+                            f"Indexed {len(index.files):,} files in {index.load_seconds * 1000:.0f} ms", 2000)
+        except RuntimeError:
+            pass
 
-    def _monitor_files(self):
-        """Monitor files for changes and update treeview"""
-        if not self._file_monitor_running:
-            return
-            
+    def _on_fs_events(self, events):
+        """Watcher thread: hand a batch of changes to the index and the Tk thread"""
+        if self.project_index is not None:
+            self.project_index.apply_events(events)
+        try:
+            self.root.after(0, self._apply_fs_events, events)
+        except RuntimeError:
+            pass  # Main loop already gone
+
+    def _on_folder_fs_events(self, events):
+        """Watcher thread: changes to ignored entries, which only the explorer shows"""
         try:
-            current_files = set()
-            if self.project_dir:
-                for root_dir, dirs, files in os.walk(self.project_dir):
-                    for file in files:
-                        rel_path = os.path.relpath(os.path.join(root_dir, file), self.project_dir)
-                        current_files.add(rel_path)
-                    for dir_name in dirs:
-                        rel_path = os.path.relpath(os.path.join(root_dir, dir_name), self.project_dir)
-                        current_files.add(rel_path + os.sep)  # Mark directories with separator
-
-            # Check if tree needs updating
-            if current_files != self._last_tree_state:
+            self.root.after(0, self._apply_fs_events, events)
+        except RuntimeError:
+            pass  # Main loop already gone
+
+    def _apply_fs_events(self, events):
+        """Update the explorer for a batch of filesystem changes"""
+        for kind, path, dest in events:
+            if kind == "rescan":
                 self._load_project_tree()
-                self._last_tree_state = current_files
-                
-        except Exception as e:
-            print(f"File monitoring error: {e}")
-            
-        # Schedule next check
-        if self._file_monitor_running:
-            self.root.after(1000, self._monitor_files)
+                return
+            if kind == "modified":
+                continue  # Contents only; the tree is unchanged
+            self._tree_path_changed(path)
+            if dest is not None:
+                self._tree_path_changed(dest)
 
     def _setup_styles(self):
         s = ttk.Style()
@@ -917,6 +5952,9 @@ class IceIDE:
         # Run button
         self.run_btn = ttk.Button(self.topbar, text="Run", style="Topbar.TButton", command=self.run_code)
         self.run_btn.pack(side=tk.RIGHT, padx=8, pady=6)
+        self.benchmark_btn = ttk.Button(self.topbar, text="Benchmark", style="Topbar.TButton",
+                                        command=self.benchmark_run)
+        self.benchmark_btn.pack(side=tk.RIGHT, padx=4, pady=6)
 
         # Interpreter selector
         self.interpreter_btn = ttk.Button(self.topbar, text="Python: System", style="Topbar.TButton", 
@@ -934,6 +5972,8 @@ class IceIDE:
                                  activebackground="#333333", activeforeground="#ffffff")
         self.file_menu.add_command(label="New File", command=self.new_file_dialog)
         self.file_menu.add_command(label="Open File...", command=self.open_file_dialog)
+        self.file_menu.add_command(label="Go to File...", accelerator="Ctrl+P", command=self.show_quick_open)
+        self.file_menu.add_command(label="Find in Files...", accelerator="Ctrl+Shift+F", command=self.show_find_in_files)
         self.file_menu.add_command(label="Save", command=self.save_current_tab)
         self.file_menu.add_separator()
         self.file_menu.add_command(label="Open Folder...", command=self.open_folder_dialog)
@@ -948,6 +5988,11 @@ class IceIDE:
                                   activebackground="#333333", activeforeground="#ffffff")
         self.tools_menu.add_command(label="Create Venv", command=self.create_venv)
         self.tools_menu.add_command(label="Select Interpreter", command=self.select_interpreter)
+        self.tools_menu.add_command(label="Build Project", accelerator="Ctrl+Shift+B", command=self.build_project)
+        self.tools_menu.add_command(label="Benchmark Run", accelerator="Shift+F5", command=self.benchmark_run)
+        self.warm_run_var = tk.BooleanVar(value=False)
+        self.tools_menu.add_checkbutton(label="Warm Python Runs", variable=self.warm_run_var,
+                                        command=self._toggle_warm_run)
         self.tools_menu.add_separator()
         self.tools_menu.add_command(label="Toggle Debug Panel", command=self.toggle_debug_panel)
         self.tools_menu.add_command(label="Advanced Debug Tools", command=self.show_advanced_debug)
@@ -984,9 +6029,18 @@ class IceIDE:
         explorer_label.pack(fill=tk.X, padx=8, pady=(8,4))
         
         self.tree = ttk.Treeview(self.file_frame, style="Custom.Treeview", show="tree")
+        self.tree_scrollbar = ttk.Scrollbar(self.file_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.configure(yscrollcommand=self._on_tree_scroll)
+        self.tree.tag_configure("load_more", foreground="#569cd6")
         self.tree.pack(fill=tk.BOTH, expand=True, padx=0, pady=0)
         self.tree.bind("<Double-1>", self._on_tree_double)
         self.tree.bind("<Button-1>", self._on_tree_click)
+        self._tree_loaded = set()  # folders whose children are in the tree
+        self._tree_shown = {}  # folder -> number of its entries materialized as rows
+        self._tree_listings = {}  # loaded folder -> sorted (name, is_dir) listing
+        self._tree_dirty = {}  # folder -> names of its entries to re-check on the next frame
+        self._tree_flush_id = None
 
         # add right-click menu for tree
         self.tree_menu = tk.Menu(self.root, tearoff=0, bg="#1e1e1e", fg="#ffffff")
@@ -995,6 +6049,25 @@ class IceIDE:
         self.tree_menu.add_command(label="Delete", command=self._delete_tree_selection)
         self.tree.bind("<Button-3>", self._on_tree_right_click)
 
+        # Outline of the current file, filled from the symbol index
+        self.outline_frame = ttk.Frame(self.left_paned, style="Topbar.TFrame")
+        self.left_paned.add(self.outline_frame, weight=1)
+        outline_label = tk.Label(self.outline_frame, text="OUTLINE", bg="#1e1e1e", fg="#888888",
+                                 font=("Segoe UI", 9, "bold"), anchor='w')
+        outline_label.pack(fill=tk.X, padx=8, pady=(8,4))
+        self.outline_tree = ttk.Treeview(self.outline_frame, style="Custom.Treeview", show="tree")
+        outline_scrollbar = ttk.Scrollbar(self.outline_frame, orient=tk.VERTICAL, command=self.outline_tree.yview)
+        outline_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.outline_tree.configure(yscrollcommand=outline_scrollbar.set)
+        self.outline_tree.pack(fill=tk.BOTH, expand=True)
+        for kind, color in (("class", "#4ec9b0"), ("struct", "#4ec9b0"), ("type", "#4ec9b0"),
+                            ("impl", "#c586c0"), ("function", "#dcdcaa"), ("method", "#dcdcaa"),
+                            ("macro", "#569cd6")):
+            self.outline_tree.tag_configure(kind, foreground=color)
+        self.outline_tree.bind("<ButtonRelease-1>", self._on_outline_click)
+        self.outline_tree.bind("<Return>", lambda e: self._on_outline_click())
+        self._outline_rows = {}  # outline row -> (line, col, length)
+
         # Debug panel (initially hidden)
         self.debug_panel_frame = ttk.Frame(self.left_paned, style="Topbar.TFrame")
         self.debug_panel = DebugPanel(self.debug_panel_frame, self.debugger)
@@ -1005,6 +6078,7 @@ class IceIDE:
         self.editor_paned.add(self.notebook, weight=4)
         self.tab_files = {}
         self.tab_widgets = {}
+        self._tab_lru = []  # tab ids, most recently selected last
         self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
 
     def _on_tree_right_click(self, event):
@@ -1015,8 +6089,8 @@ class IceIDE:
 
     def _delete_tree_selection(self):
         sel = self.tree.selection()
-        if not sel:
-            return
+        if not sel or not self.tree.item(sel[0], "values"):
+            return  # Nothing, or a placeholder / "load more" row
         path = self.tree.item(sel[0], "values")[0]
         if messagebox.askyesno("Delete", f"Are you sure you want to delete {os.path.basename(path)}?"):
             try:
@@ -1024,57 +6098,201 @@ class IceIDE:
                     os.remove(path)
                 else:
                     shutil.rmtree(path)
-                self._load_project_tree()
+                self._tree_path_changed(path)
             except Exception as e:
                 messagebox.showerror("Delete Error", str(e))
 
     def _load_project_tree(self):
-        """Load project tree with real-time updates"""
+        """Rebuild the explorer from disk, keeping expanded folders and the selection"""
+        opened = [d for d in self._tree_loaded if self.tree.exists(d) and self.tree.item(d, "open")]
+        selection = self.tree.selection()
         for item in self.tree.get_children():
             self.tree.delete(item)
+        self._tree_loaded = set()
+        self._tree_shown = {}
+        self._tree_listings = {}
+        self._tree_dirty = {}
         if not self.project_dir:
             return
         try:
-            self._populate_folder("", self.project_dir)
-            # Store current state for monitoring
-            self._last_tree_state = self._get_current_tree_state()
+            self._populate_folder("", os.path.abspath(self.project_dir))
+            for folder in sorted(opened, key=len):  # Parents before their children
+                if self.tree.exists(folder):
+                    self._populate_folder(folder, folder)
+                    self.tree.item(folder, open=True)
+            self.tree.selection_set([iid for iid in selection if self.tree.exists(iid)])
         except Exception as e:
             print(f"Error loading project tree: {e}")
 
-    def _get_current_tree_state(self):
-        """Get current tree state for monitoring"""
-        current_state = set()
-        for root_dir, dirs, files in os.walk(self.project_dir):
-            for file in files:
-                rel_path = os.path.relpath(os.path.join(root_dir, file), self.project_dir)
-                current_state.add(rel_path)
-            for dir_name in dirs:
-                rel_path = os.path.relpath(os.path.join(root_dir, dir_name), self.project_dir)
-                current_state.add(rel_path + os.sep)
-        return current_state
-
-    def _populate_folder(self, parent_iid, folder_path):
-        """Populate folder in treeview"""
-        try:
-            for entry in sorted(os.listdir(folder_path)):
-                # Skip venv directory unless specifically requested
-                if entry == 'venv' and parent_iid == "":
-                    continue
-                    
-                full = os.path.join(folder_path, entry)
-                iid = f"{parent_iid}/{entry}" if parent_iid else entry
-                self.tree.insert(parent_iid, tk.END, iid=iid, text=entry, values=(full,))
-                if os.path.isdir(full) and entry != 'venv':  # Don't auto-expand venv
-                    self.tree.insert(iid, tk.END)  # Add dummy to make expandable
-        except Exception as e:
-            print(f"Error populating folder: {e}")
+    def _populate_folder(self, parent_iid, folder_path, rescan=True):
+        """Make a folder's children in the tree match the disk, touching only what changed.
+
+        Only the first pages of a big folder become rows; a trailing "load
+        more" row brings in the next TREE_PAGE entries when clicked or
+        scrolled into view. rescan=False reuses the last listing.
+        """
+        listing = None if rescan else self._tree_listings.get(folder_path)
+        if listing is None:
+            try:
+                # scandir's cached entry type saves a stat() per entry
+                with os.scandir(folder_path) as it:
+                    listing = sorted((entry.name, entry.is_dir()) for entry in it)
+            except Exception as e:
+                print(f"Error populating folder: {e}")
+                return
+            # Skip venv directory unless specifically requested
+            if parent_iid == "":
+                listing = [item for item in listing if item[0] != 'venv']
+        shown = max(self.TREE_PAGE, self._tree_shown.get(folder_path, 0))
+        page = [(os.path.join(folder_path, name), name, is_dir) for name, is_dir in listing[:shown]]
+        more_iid = f"more:{folder_path}"
+        keep = {full for full, _, _ in page}
+        keep.add(more_iid)
+        for child in self.tree.get_children(parent_iid):
+            if child not in keep:
+                # Stale entry, or the placeholder that made the folder expandable
+                self.tree.delete(child)
+                self._forget_tree_folder(child)
+        for index, (full, entry, is_dir) in enumerate(page):
+            if not self.tree.exists(full):
+                self._insert_tree_row(parent_iid, index, full, entry, is_dir)
+        self._update_more_row(parent_iid, folder_path, len(listing) - len(page))
+        self._tree_shown[folder_path] = len(page)
+        if folder_path not in self._tree_loaded:
+            self._tree_loaded.add(folder_path)
+            self._show_tree_folders()
+        self._tree_listings[folder_path] = listing
+
+    def _insert_tree_row(self, parent_iid, index, full, entry, is_dir):
+        # Items are keyed by absolute path so watcher events map straight to them
+        self.tree.insert(parent_iid, index, iid=full, text=entry, values=(full,))
+        if is_dir and entry != 'venv':  # Don't auto-expand venv
+            self.tree.insert(full, tk.END)  # Add dummy to make expandable
+
+    def _update_more_row(self, parent_iid, folder_path, remaining):
+        more_iid = f"more:{folder_path}"
+        if remaining > 0:
+            text = f"Load more... ({remaining:,} more)"
+            if self.tree.exists(more_iid):
+                self.tree.item(more_iid, text=text)
+                self.tree.move(more_iid, parent_iid, tk.END)
+            else:
+                self.tree.insert(parent_iid, tk.END, iid=more_iid, text=text, tags=("load_more",))
+        elif self.tree.exists(more_iid):
+            self.tree.delete(more_iid)
+
+    def _update_folder_entries(self, parent_iid, folder_path, names):
+        """Apply changes to some entries of a loaded folder to its listing and rows.
+
+        Each name is looked up on disk, so a burst of events for it collapses
+        to its final state; the rest of the folder is not listed again.
+        """
+        listing = self._tree_listings.get(folder_path)
+        if listing is None:
+            self._populate_folder(parent_iid, folder_path)
+            return
+        shown = page = self._tree_shown.get(folder_path, 0)
+        for name in sorted(names):
+            if parent_iid == "" and name == 'venv':
+                continue  # Hidden like in _populate_folder
+            full = os.path.join(folder_path, name)
+            exists = os.path.lexists(full)
+            is_dir = exists and os.path.isdir(full)
+            index = bisect.bisect_left(listing, (name,))
+            if index < len(listing) and listing[index][0] == name:
+                if exists and listing[index][1] == is_dir:
+                    continue  # Contents changed only
+                del listing[index]
+                if index < shown:
+                    shown -= 1
+                    if self.tree.exists(full):
+                        self.tree.delete(full)
+                        self._forget_tree_folder(full)
+            if not exists:
+                continue
+            listing.insert(index, (name, is_dir))
+            # Rows are listing[:shown]; an entry past them waits behind "load more"
+            if index < shown or shown == len(listing) - 1:
+                shown += 1
+                if not self.tree.exists(full):
+                    self._insert_tree_row(parent_iid, index, full, name, is_dir)
+        # Removals must not shrink the page: entries behind "load more" move up
+        for index in range(shown, min(len(listing), max(self.TREE_PAGE, page))):
+            name, is_dir = listing[index]
+            full = os.path.join(folder_path, name)
+            if not self.tree.exists(full):
+                self._insert_tree_row(parent_iid, index, full, name, is_dir)
+            shown += 1
+        self._tree_shown[folder_path] = shown
+        self._update_more_row(parent_iid, folder_path, len(listing) - shown)
+
+    def _load_more(self, more_iid):
+        """Materialize the next page of a big folder"""
+        folder_path = more_iid[len("more:"):]
+        self._tree_shown[folder_path] = self._tree_shown.get(folder_path, 0) + self.TREE_PAGE
+        root_dir = os.path.abspath(self.project_dir) if self.project_dir else None
+        self._populate_folder("" if folder_path == root_dir else folder_path, folder_path, rescan=False)
+
+    def _on_tree_scroll(self, first, last):
+        """Load the next page of any folder whose "load more" row came into view"""
+        self.tree_scrollbar.set(first, last)
+        for more_iid in self.tree.tag_has("load_more"):
+            if self.tree.bbox(more_iid):
+                self.root.after_idle(self._load_more, more_iid)
+                break
+
+    def _forget_tree_folder(self, folder_path):
+        """Drop a removed folder and everything below it from the loaded set"""
+        prefix = folder_path + os.sep
+        loaded = len(self._tree_loaded)
+        self._tree_loaded = {d for d in self._tree_loaded
+                             if d != folder_path and not d.startswith(prefix)}
+        self._tree_shown = {d: n for d, n in self._tree_shown.items()
+                            if d != folder_path and not d.startswith(prefix)}
+        self._tree_listings = {d: l for d, l in self._tree_listings.items()
+                               if d != folder_path and not d.startswith(prefix)}
+        if len(self._tree_loaded) != loaded:
+            self._show_tree_folders()
+
+    def _show_tree_folders(self):
+        """Have the watcher report changes in every listed folder, ignored ones included"""
+        if self._file_watcher is not None:
+            self._file_watcher.show_folders(self._tree_loaded)
+
+    def _tree_path_changed(self, path):
+        """Queue a refresh of the entry at path, applied once per frame"""
+        path = os.path.abspath(path)
+        self._tree_dirty.setdefault(os.path.dirname(path), set()).add(os.path.basename(path))
+        if self._tree_flush_id is None:
+            self._tree_flush_id = self.root.after(16, self._flush_tree_updates)
+
+    def _flush_tree_updates(self):
+        """Re-sync every entry touched since the last frame"""
+        self._tree_flush_id = None
+        dirty, self._tree_dirty = self._tree_dirty, {}
+        if not self.project_dir:
+            return
+        root_dir = os.path.abspath(self.project_dir)
+        for folder in sorted(dirty, key=len):
+            if folder == root_dir:
+                self._update_folder_entries("", folder, dirty[folder])
+            elif not self.tree.exists(folder):
+                continue  # Inside a folder that was never expanded
+            elif folder in self._tree_loaded:
+                self._update_folder_entries(folder, folder, dirty[folder])
 
     def _on_tree_click(self, event):
         item = self.tree.identify_row(event.y)
         if not item:
             return
-        path = self.tree.item(item, "values")[0]
-        if os.path.isdir(path):
+        if item.startswith("more:"):
+            self._load_more(item)
+            return
+        vals = self.tree.item(item, "values")
+        if not vals:
+            return
+        path = vals[0]
+        if path not in self._tree_loaded and os.path.isdir(path):
             self._populate_folder(item, path)
 
     def _on_tree_double(self, event):
@@ -1087,13 +6305,14 @@ class IceIDE:
             return
         path = vals[0]
         if os.path.isdir(path):
-            self._populate_folder(iid, path)
+            if path not in self._tree_loaded:
+                self._populate_folder(iid, path)
         else:
             self.open_file_in_tab(path)
 
     def _open_tree_selection(self):
         sel = self.tree.selection()
-        if not sel:
+        if not sel or not self.tree.item(sel[0], "values"):
             return
         path = self.tree.item(sel[0], "values")[0]
         if os.path.isfile(path):
@@ -1110,7 +6329,50 @@ class IceIDE:
                 return
 
         tab_frame = ttk.Frame(self.notebook)
-        
+        ds = self._create_editor(tab_frame)
+
+        large_file = None
+        try:
+            if os.path.getsize(abs_path) >= self.large_file_mb * 1024 * 1024:
+                # Too big for one Text widget: page lines in from a memory map
+                large_file = LargeFileView(ds.ln_text, abs_path,
+                                           on_indexed=lambda n: self._flash_status(f"Indexed {n:,} lines", 2000))
+            else:
+                with open(abs_path, "r", encoding="utf-8") as f:
+                    content = f.read()
+        except Exception as e:
+            messagebox.showerror("Open file error", str(e))
+            return
+
+        if large_file is None:
+            # Tracks edited lines so each keystroke only re-tokenizes what changed
+            lexer = self.grammars.lexer_for(self.detect_language_from_file(abs_path))
+            ds.text._highlighter = SyntaxHighlighter(ds.ln_text, lexer)
+            ds.text.insert("1.0", content)
+            ds.text.edit_modified(False)
+        else:
+            ds.text.bind("<Control-f>", lambda e, v=large_file: self._find_in_large_file(v))
+            ds.text.bind("<F3>", lambda e, v=large_file: self._find_in_large_file(v, v.last_query))
+
+        tab_text = os.path.basename(path)
+        if large_file is not None:
+            tab_text += " (read-only)"
+        self.notebook.add(tab_frame, text=tab_text)
+        tabs = self.notebook.tabs()
+        if not tabs:
+            return
+        tab_id = tabs[-1]
+        self.tab_files[tab_id] = abs_path
+        self.tab_widgets[tab_id] = tab_frame
+        tab_frame._ds = ds
+        tab_frame._large_file = large_file
+        self.notebook.select(tab_id)
+        self._apply_syntax_highlighting_for_widget(ds.text)
+        self._tree_path_changed(abs_path)  # Show the file if it is new
+        self.update_interpreter_button()
+
+    def _create_editor(self, tab_frame):
+        """Build a tab's editor widget with its highlight tags and bindings"""
         # Create editor with line numbers
         ds = DarkScrolledText(tab_frame, wrap="word")
         ds.pack(fill=tk.BOTH, expand=True)
@@ -1128,32 +6390,12 @@ class IceIDE:
         ds.text.tag_configure("datatype", foreground="#4ec9b0")      # aqua (types)
         ds.text.tag_configure("function", foreground="#dcdcaa")      # yellow-ish (functions)
         ds.text.tag_configure("comment", foreground="#6a9955")       # green (comments)
+        ds.text.tag_configure("search_match", background="#515c6a")  # Find in Files jump target
 
 # Re-run highlighting on typing and clicking
         ds.text.bind("<KeyRelease>", lambda e, tw=ds.text: self._apply_syntax_highlighting_for_widget(tw))
         ds.text.bind("<Button-1>", self._on_text_click)
-
-        try:
-            with open(abs_path, "r", encoding="utf-8") as f:
-                content = f.read()
-        except Exception as e:
-            messagebox.showerror("Open file error", str(e))
-            return
-        ds.text.insert("1.0", content)
-
-        tab_text = os.path.basename(path)
-        self.notebook.add(tab_frame, text=tab_text)
-        tabs = self.notebook.tabs()
-        if not tabs:
-            return
-        tab_id = tabs[-1]
-        self.tab_files[tab_id] = abs_path
-        self.tab_widgets[tab_id] = tab_frame
-        tab_frame._ds = ds
-        self.notebook.select(tab_id)
-        self._apply_syntax_highlighting_for_widget(ds.text)
-        self._load_project_tree()  # Refresh tree to show any new files
-        self.update_interpreter_button()
+        return ds
 
     def _on_text_click(self, event):
         """Handle text click for breakpoint toggling"""
@@ -1168,6 +6410,15 @@ class IceIDE:
         else:
             text_widget.tag_add("breakpoint", line_start, line_start + " lineend")
 
+    def _find_in_large_file(self, view, query=None):
+        """Search a large file's memory map and jump to the next match"""
+        if not query:
+            query = tkinter.simpledialog.askstring("Find", "Find:", initialvalue=view.last_query,
+                                                   parent=self.root)
+        if query:
+            view.search(query, lambda found: found or self._flash_status(f"Not found: {query}", 2000))
+        return "break"
+
     def _toggle_breakpoint(self, event=None):
         """Toggle breakpoint at current line"""
         sel = self.notebook.select()
@@ -1193,7 +6444,7 @@ class IceIDE:
                                          filetypes=[("Gust files", "*.gust"), ("All files", "*.*")])
         if p:
             open(p, "w").close()
-            self._load_project_tree()  # Refresh to show new file
+            self._tree_path_changed(p)  # Refresh to show new file
             self.open_file_in_tab(p)
 
     def open_file_dialog(self):
@@ -1201,6 +6452,301 @@ class IceIDE:
         if p:
             self.open_file_in_tab(p)
 
+    def show_quick_open(self, event=None):
+        """Ctrl+P: fuzzy-find a project file by path and open it"""
+        if self.quick_open_index is None:
+            self._flash_status("Open a folder to use Go to File", 2000)
+            return "break"
+        win = self._quick_open_window
+        if win is not None and win.winfo_exists():
+            win.lift()
+            win._entry.focus_set()
+            return "break"
+        win = tk.Toplevel(self.root)
+        win.title("Go to File")
+        win.configure(bg="#1e1e1e")
+        win.transient(self.root)
+        self._set_window_icon(win)
+        width, height = 640, 380
+        x = self.root.winfo_rootx() + max(0, (self.root.winfo_width() - width) // 2)
+        y = self.root.winfo_rooty() + 60
+        win.geometry(f"{width}x{height}+{x}+{y}")
+
+        entry = tk.Entry(win, bg="#2d2d2d", fg="white", insertbackground="white",
+                         relief=tk.FLAT, font=("Consolas", 11))
+        entry.pack(fill=tk.X, padx=8, pady=(8, 4), ipady=4)
+        listbox = tk.Listbox(win, bg="#1e1e1e", fg="white", selectbackground="#094771",
+                             relief=tk.FLAT, highlightthickness=0, activestyle="none",
+                             font=("Consolas", 10))
+        listbox.pack(fill=tk.BOTH, expand=True, padx=8)
+        status = tk.Label(win, text=f"{len(self.quick_open_index):,} files", anchor='w',
+                          bg="#1e1e1e", fg="#888888", font=("Arial", 9))
+        status.pack(fill=tk.X, padx=8, pady=(2, 6))
+        win._entry, win._listbox, win._status = entry, listbox, status
+        win._results = []
+        win._query = ""
+        self._quick_open_window = win
+
+        def move(step):
+            if not win._results:
+                return "break"
+            current = listbox.curselection()
+            index = min(max((current[0] if current else 0) + step, 0), len(win._results) - 1)
+            listbox.selection_clear(0, tk.END)
+            listbox.selection_set(index)
+            listbox.see(index)
+            return "break"
+
+        def on_key(event=None):
+            query = entry.get()
+            if query != win._query:
+                win._query = query
+                self._quick_open_query(query)
+
+        entry.bind("<KeyRelease>", on_key)
+        entry.bind("<Down>", lambda e: move(1))
+        entry.bind("<Up>", lambda e: move(-1))
+        entry.bind("<Return>", lambda e: self._quick_open_accept())
+        listbox.bind("<Double-Button-1>", lambda e: self._quick_open_accept())
+        win.bind("<Escape>", lambda e: win.destroy())
+        entry.focus_set()
+        return "break"
+
+    def _quick_open_query(self, query):
+        """Run a palette query on the worker; only the newest query's results are shown"""
+        index = self.quick_open_index
+        generation = index.next_generation()
+
+        def on_results(paths, complete):
+            try:
+                self.root.after(0, self._show_quick_open_results, index, generation, paths, complete)
+            except RuntimeError:
+                pass  # Main loop already gone
+
+        _quick_open_worker.submit(index.search, query, generation, on_results)
+
+    def _show_quick_open_results(self, index, generation, paths, complete):
+        win = self._quick_open_window
+        if win is None or not win.winfo_exists() or index is not self.quick_open_index or generation != index.generation:
+            return
+        listbox = win._listbox
+        listbox.delete(0, tk.END)
+        for rel in paths:
+            folder, name = os.path.split(rel)
+            listbox.insert(tk.END, f"{name}    {folder}" if folder else name)
+        win._results = paths
+        if paths:
+            listbox.selection_set(0)
+        win._status.config(text=f"{len(paths)} matches" + ("" if complete else " (searching...)"))
+
+    def _quick_open_accept(self):
+        """Open the selected palette entry"""
+        win = self._quick_open_window
+        if win is None or not win._results:
+            return "break"
+        current = win._listbox.curselection()
+        rel = win._results[current[0] if current else 0]
+        win.destroy()
+        self.open_file_in_tab(os.path.join(self.project_dir, rel))
+        return "break"
+
+    def show_find_in_files(self, event=None):
+        """Ctrl+Shift+F: search the contents of every project file"""
+        if self.search_index is None:
+            self._flash_status("Open a folder to use Find in Files", 2000)
+            return "break"
+        win = self._find_window
+        if win is not None and win.winfo_exists():
+            win.lift()
+            win._entry.focus_set()
+            win._entry.select_range(0, tk.END)
+            return "break"
+        win = tk.Toplevel(self.root)
+        win.title("Find in Files")
+        win.configure(bg="#1e1e1e")
+        win.geometry("760x480")
+        self._set_window_icon(win)
+
+        top = tk.Frame(win, bg="#1e1e1e")
+        top.pack(fill=tk.X, padx=8, pady=(8, 4))
+        entry = tk.Entry(top, bg="#2d2d2d", fg="white", insertbackground="white",
+                         relief=tk.FLAT, font=("Consolas", 11))
+        entry.pack(side=tk.LEFT, fill=tk.X, expand=True, ipady=4)
+        regex_var = tk.BooleanVar(value=False)
+        case_var = tk.BooleanVar(value=False)
+        for text, var in (("Regex", regex_var), ("Match case", case_var)):
+            tk.Checkbutton(top, text=text, variable=var, bg="#1e1e1e", fg="white", selectcolor="#2d2d2d",
+                           activebackground="#1e1e1e", activeforeground="white").pack(side=tk.LEFT, padx=(8, 0))
+        ttk.Button(top, text="Search", command=lambda: self._find_in_files_run()).pack(side=tk.LEFT, padx=(8, 0))
+
+        tree_frame = tk.Frame(win, bg="#1e1e1e")
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=8)
+        tree = ttk.Treeview(tree_frame, show="tree")
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview, style="Vertical.TScrollbar")
+        tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        status = tk.Label(win, text="", anchor='w', bg="#1e1e1e", fg="#888888", font=("Arial", 9))
+        status.pack(fill=tk.X, padx=8, pady=(2, 6))
+
+        win._entry, win._tree, win._status = entry, tree, status
+        win._regex, win._case = regex_var, case_var
+        win._results = {}  # tree row -> (relative path, line, col, length)
+        win._file_rows = {}
+        self._find_window = win
+
+        entry.bind("<Return>", lambda e: self._find_in_files_run())
+        tree.bind("<Double-Button-1>", lambda e: self._open_find_result())
+        tree.bind("<Return>", lambda e: self._open_find_result())
+        win.bind("<Escape>", lambda e: win.destroy())
+        entry.focus_set()
+        return "break"
+
+    def _find_in_files_run(self):
+        """Start a search; results from an older search are dropped"""
+        win = self._find_window
+        query = win._entry.get()
+        if not query or self.search_index is None:
+            return "break"
+        regex, match_case = win._regex.get(), win._case.get()
+        if regex:
+            try:
+                re.compile(query)
+            except re.error as e:
+                win._status.config(text=f"Invalid regex: {e}")
+                return "break"
+        win._tree.delete(*win._tree.get_children())
+        win._results.clear()
+        win._file_rows.clear()
+        win._status.config(text="Searching...")
+        index = self.search_index
+        generation = index.next_generation()
+
+        def on_batch(matches, summary):
+            try:
+                self.root.after(0, self._show_find_results, index, generation, matches, summary)
+            except RuntimeError:
+                pass  # Main loop already gone
+
+        _search_worker.submit(index.search, query, regex, match_case, generation, on_batch)
+        return "break"
+
+    def _show_find_results(self, index, generation, matches, summary):
+        win = self._find_window
+        if win is None or not win.winfo_exists() or index is not self.search_index or generation != index.generation:
+            return
+        tree = win._tree
+        for rel, line, col, length, text in matches:
+            parent = win._file_rows.get(rel)
+            if parent is None:
+                parent = tree.insert("", "end", text=rel, open=True)
+                win._file_rows[rel] = parent
+            row = tree.insert(parent, "end", text=f"{line}: {text.strip()}")
+            win._results[row] = (rel, line, col, length)
+        if summary is not None:
+            win._status.config(text=summary)
+        elif matches:
+            win._status.config(text=f"Searching... {len(win._results):,} matches")
+
+    def _open_find_result(self):
+        """Open the selected match in the editor"""
+        win = self._find_window
+        selection = win._tree.selection() if win is not None else ()
+        if not selection or selection[0] not in win._results:
+            return "break"
+        rel, line, col, length = win._results[selection[0]]
+        self._goto_file_line(os.path.join(self.project_dir, rel), line, col, length)
+        return "break"
+
+    def _goto_file_line(self, path, line, col=0, length=0):
+        """Open path and put the cursor on 1-based line, highlighting length characters"""
+        self.open_file_in_tab(path)
+        tab_id = self.notebook.select()
+        if self.tab_files.get(tab_id) != os.path.abspath(path):
+            return  # Could not be opened
+        self._wake_tab(tab_id)
+        frame = self.tab_widgets[tab_id]
+        large_file = getattr(frame, "_large_file", None)
+        if large_file is not None:
+            large_file.goto_line(max(0, line - 6))
+            return
+        text = frame._ds.text
+        text.mark_set("insert", f"{line}.{col}")
+        text.tag_remove("search_match", "1.0", "end")
+        if length:
+            text.tag_add("search_match", f"{line}.{col}", f"{line}.{col + length}")
+        text.see("insert")
+        text.focus_set()
+
+    def _on_symbols_changed(self, changed):
+        """Index worker: refresh the outline if the current file's symbols changed"""
+        try:
+            self.root.after(0, self._refresh_outline, changed)
+        except RuntimeError:
+            pass  # Main loop already gone
+
+    def _current_rel_path(self):
+        """Project-relative path of the selected tab's file, or None"""
+        path = self.tab_files.get(self.notebook.select())
+        if not path or not self.project_dir:
+            return None
+        rel = os.path.relpath(path, self.project_dir)
+        return None if rel.startswith(os.pardir) else rel
+
+    def _refresh_outline(self, changed=None):
+        """Show the symbols of the current file in the outline pane"""
+        rel = self._current_rel_path()
+        if changed is not None and rel not in changed:
+            return
+        tree = self.outline_tree
+        tree.delete(*tree.get_children())
+        self._outline_rows = {}
+        symbols = self.symbol_index.outline(rel) if self.symbol_index is not None and rel else None
+        parents = []  # row of the last symbol at each depth
+        for name, kind, line, col, depth in symbols or ():
+            del parents[depth:]
+            row = tree.insert(parents[-1] if parents else "", "end", text=name, open=True, tags=(kind,))
+            parents.append(row)
+            self._outline_rows[row] = (line, col, len(name))
+
+    def _on_outline_click(self, event=None):
+        row = self.outline_tree.identify_row(event.y) if event is not None else self.outline_tree.focus()
+        target = self._outline_rows.get(row)
+        path = self.tab_files.get(self.notebook.select())
+        if target is not None and path:
+            self._goto_file_line(path, *target)
+
+    def go_to_definition(self, event=None):
+        """F12: jump to where the word under the cursor is defined"""
+        frame = self.tab_widgets.get(self.notebook.select())
+        if frame is None or not hasattr(frame, "_ds"):
+            return "break"
+        if self.symbol_index is None:
+            self._flash_status("Open a folder to use Go to Definition", 2000)
+            return "break"
+        text = frame._ds.text
+        word = text.get("insert wordstart", "insert wordend").strip()
+        if not re.fullmatch(r"[\w$]+", word):
+            return "break"
+        found = self.symbol_index.definitions(word)
+        if not found:
+            self._flash_status(f"No definition found for {word}", 2000)
+            return "break"
+        current = self._current_rel_path()
+        found.sort(key=lambda d: d[0] != current)  # Definitions in this file first
+        if len(found) == 1:
+            rel, line, col, _ = found[0]
+            self._goto_file_line(os.path.join(self.project_dir, rel), line, col, len(word))
+            return "break"
+        menu = tk.Menu(self.root, tearoff=0, bg="#1e1e1e", fg="#ffffff")
+        for rel, line, col, kind in found[:40]:
+            menu.add_command(label=f"{rel}:{line}  ({kind})",
+                             command=lambda r=rel, l=line, c=col: self._goto_file_line(
+                                 os.path.join(self.project_dir, r), l, c, len(word)))
+        bbox = text.bbox("insert") or (0, 0, 0, 0)
+        menu.tk_popup(text.winfo_rootx() + bbox[0], text.winfo_rooty() + bbox[1] + bbox[3])
+        return "break"
+
     def save_current_tab(self):
         sel = self.notebook.select()
         if not sel:
@@ -1215,11 +6761,15 @@ class IceIDE:
         if not frame or not hasattr(frame, "_ds"):
             messagebox.showerror("Save", "Editor not found")
             return
+        if getattr(frame, "_large_file", None) is not None:
+            messagebox.showinfo("Save", "Large files are opened read-only.")
+            return
         try:
             with open(path, "w", encoding="utf-8") as f:
                 f.write(frame._ds.text.get("1.0", tk.END).rstrip() + "\n")
+            frame._ds.text.edit_modified(False)
             self._flash_status(f"Saved {os.path.basename(path)}")
-            self._load_project_tree()  # Refresh tree after save
+            self._tree_path_changed(path)  # Refresh tree after save
         except Exception as e:
             messagebox.showerror("Save error", str(e))
 
@@ -1233,12 +6783,22 @@ class IceIDE:
     def _close_tab_by_id(self, tab_id):
         if tab_id in self.tab_files:
             del self.tab_files[tab_id]
-        if tab_id in self.tab_widgets:
-            del self.tab_widgets[tab_id]
+        if tab_id in self._tab_lru:
+            self._tab_lru.remove(tab_id)
+        frame = self.tab_widgets.pop(tab_id, None)
+        if frame is not None:
+            if getattr(frame, "_large_file", None) is not None:
+                frame._large_file.close()
+            if hasattr(frame, "_ds"):
+                highlighter = getattr(frame._ds.text, "_highlighter", None)
+                if highlighter is not None:
+                    highlighter.stop()
         try:
             self.notebook.forget(tab_id)
         except Exception:
             pass
+        if frame is not None:
+            frame.destroy()  # forget() alone keeps the editor alive
 
     def close_all_tabs(self):
         for tab_id in list(self.notebook.tabs()):
@@ -1248,59 +6808,63 @@ class IceIDE:
         sel = self.notebook.select()
         if not sel:
             self.current_file = None
+            self._refresh_outline()
             self.update_interpreter_button()
             return
         tab_id = sel
         self.current_file = self.tab_files.get(tab_id, None)
+        self._wake_tab(tab_id)
+        if tab_id in self._tab_lru:
+            self._tab_lru.remove(tab_id)
+        self._tab_lru.append(tab_id)
+        self._enforce_tab_budget()
         frame = self.tab_widgets.get(tab_id)
         if frame and hasattr(frame, "_ds"):
             self._apply_syntax_highlighting_for_widget(frame._ds.text)
+        self._refresh_outline()
         self.update_interpreter_button()
 
+    def _enforce_tab_budget(self):
+        """Hibernate the least recently used editors beyond max_live_tabs"""
+        selected = self.notebook.select()
+        live = [tab_id for tab_id in self._tab_lru
+                if hasattr(self.tab_widgets.get(tab_id), "_ds")
+                and getattr(self.tab_widgets[tab_id], "_large_file", None) is None]
+        for tab_id in live[:max(0, len(live) - self.max_live_tabs)]:
+            if tab_id != selected:
+                self._hibernate_tab(tab_id)
+
+    def _hibernate_tab(self, tab_id):
+        """Destroy a background tab's editor, keeping a compact copy of its state"""
+        frame = self.tab_widgets.get(tab_id)
+        if not frame or not hasattr(frame, "_ds"):
+            return
+        try:
+            frame._hibernated = HibernatedTab(frame._ds)
+        except Exception as e:
+            print(f"Error hibernating tab: {e}")
+            return
+        frame._ds.destroy()
+        del frame._ds
+
+    def _wake_tab(self, tab_id):
+        """Rebuild a hibernated tab's editor from its saved state"""
+        frame = self.tab_widgets.get(tab_id)
+        state = getattr(frame, "_hibernated", None)
+        if state is None:
+            return
+        ds = self._create_editor(frame)
+        lexer = self.grammars.lexer_for(self.detect_language_from_file(self.tab_files[tab_id]))
+        ds.text._highlighter = SyntaxHighlighter(ds.ln_text, lexer)
+        state.restore(ds)
+        frame._ds = ds
+        frame._hibernated = None
+
     def _apply_syntax_highlighting_for_widget(self, text_widget):
-        content = text_widget.get("1.0", tk.END)
-
-    # Clear all old tags
-        for tag in ("parentheses", "number", "string", "true", "false", 
-                    "breakpoint", "keyword", "datatype", "function", "comment"):
-            text_widget.tag_remove(tag, "1.0", tk.END)
-
-    # Parentheses, brackets, braces
-        for m in re.finditer(r'[\(\)\<\>\[\]\{\}]', content):
-            text_widget.tag_add("parentheses", f"1.0+{m.start()}c", f"1.0+{m.end()}c")
-
-    # Numbers
-        for m in re.finditer(r'\b\d+(\.\d+)?\b', content):
-            text_widget.tag_add("number", f"1.0+{m.start()}c", f"1.0+{m.end()}c")
-
-    # Strings
-        for m in re.finditer(r'"[^"]*"|\'[^\']*\'', content):
-            text_widget.tag_add("string", f"1.0+{m.start()}c", f"1.0+{m.end()}c")
-
-    # Booleans
-        for m in re.finditer(r'\bTrue\b', content):
-            text_widget.tag_add("true", f"1.0+{m.start()}c", f"1.0+{m.end()}c")
-        for m in re.finditer(r'\bFalse\b', content):
-            text_widget.tag_add("false", f"1.0+{m.start()}c", f"1.0+{m.end()}c")
-
-    # Keywords
-        keywords = r"\b(def|class|if|else|elif|for|while|break|continue|return|yield|try|except|finally|with|as|import|from|pass|in|not|and|or|async|await|switch|case|default|throw|catch)\b"
-        for m in re.finditer(keywords, content):
-            text_widget.tag_add("keyword", f"1.0+{m.start()}c", f"1.0+{m.end()}c")
-
-    # Data types
-        datatypes = r"\b(int|float|double|char|bool|boolean|string|str|list|array|dict|map|set|tuple|object|null|None|undefined|NaN|void)\b"
-        for m in re.finditer(datatypes, content):
-            text_widget.tag_add("datatype", f"1.0+{m.start()}c", f"1.0+{m.end()}c")
-
-    # Common functions
-        functions = r"\b(print|input|len|range|open|read|write|append|insert|remove|replace|sort|filter|map|reduce|push|pop|join|split|format)\b"
-        for m in re.finditer(functions, content):
-            text_widget.tag_add("function", f"1.0+{m.start()}c", f"1.0+{m.end()}c")
-
-    # Comments
-        for m in re.finditer(r"#.*|//.*|/\*[\s\S]*?\*/", content):
-            text_widget.tag_add("comment", f"1.0+{m.start()}c", f"1.0+{m.end()}c")
+        """Ask the widget's highlighter for a (debounced) repaint of what changed"""
+        highlighter = getattr(text_widget, "_highlighter", None)
+        if highlighter is not None:
+            highlighter.schedule(highlighter.EDIT_DELAY_MS)
 
     def new_folder_dialog(self):
         folder = filedialog.askdirectory(initialdir=os.path.expanduser("~"))
@@ -1309,6 +6873,7 @@ class IceIDE:
         self.project_dir = folder
         os.makedirs(self.project_dir, exist_ok=True)
         self._load_project_tree()
+        self._start_file_monitor()
         self._reset_terminal()
         self._check_and_activate_venv()
 
@@ -1319,6 +6884,7 @@ class IceIDE:
         self.project_dir = folder
         os.makedirs(self.project_dir, exist_ok=True)
         self._load_project_tree()
+        self._start_file_monitor()
         self._reset_terminal()
         self._check_and_activate_venv()
 
@@ -1330,6 +6896,7 @@ class IceIDE:
         self.interpreters['python'] = sys.executable  # Reset to system python
         self.save_config()
         self._load_project_tree()
+        self._start_file_monitor()
         self.close_all_tabs()
         self._reset_terminal()
 
@@ -1354,53 +6921,10 @@ class IceIDE:
             self.update_indicator()
 
     def _reset_terminal(self):
-        """Reset terminal with the new project directory"""
+        """Give the terminal a session in the new project directory, keeping the others running"""
         try:
-            # Shutdown old terminal if it exists
-            if hasattr(self, 'terminal'):
-                try:
-                    self.terminal.shutdown()
-                except:
-                    pass
-            
-            # Find the terminal pane in the main paned window
-            panes = self.main_paned.panes()
-            terminal_pane_index = None
-            
-            for i, pane in enumerate(panes):
-                pane_widget = self.root.nametowidget(pane)
-                # Check if this pane contains a terminal
-                if hasattr(pane_widget, 'winfo_children') and pane_widget.winfo_children():
-                    for child in pane_widget.winfo_children():
-                        if hasattr(child, 'shutdown'):
-                            # Found the terminal pane
-                            terminal_pane_index = i
-                            break
-                if terminal_pane_index is not None:
-                    break
-            
-            # If we found a terminal pane, remove it
-            if terminal_pane_index is not None:
-                # Get the terminal frame before removing
-                terminal_frame = self.root.nametowidget(panes[terminal_pane_index])
-                
-                # Remove the terminal pane
-                self.main_paned.remove(terminal_frame)
-                
-                # Destroy the old terminal frame
-                terminal_frame.destroy()
-            
-            # Create new terminal area
-            new_terminal_frame = self._create_terminal_area()
-            
-            # Add the new terminal to the main paned window
-            self.main_paned.add(new_terminal_frame, weight=1)
-            
-            # Update the terminal reference
-            self.terminal = new_terminal_frame.winfo_children()[0]
-            
+            self.terminal.set_project_dir(self.project_dir)
             self.update_indicator()
-            
         except Exception as e:
             print(f"Error resetting terminal: {e}")
 
@@ -1431,30 +6955,14 @@ class IceIDE:
                 self.terminal.send_command('source venv/bin/activate')
             self.update_interpreter_display()
             messagebox.showinfo("Venv Created", "Virtual environment created and activated successfully!")
-            self._load_project_tree()  # Refresh to show venv folder
+            self._tree_path_changed(os.path.join(self.project_dir, "venv"))  # Refresh to show venv folder
         except Exception as e:
             messagebox.showerror("Venv error", str(e))
 
     def detect_language_from_file(self, file_path):
         """Detect programming language from file extension"""
         ext = os.path.splitext(file_path)[1].lower()
-        language_map = {
-            '.py': 'python',
-            '.js': 'javascript',
-            '.java': 'java',
-            '.cpp': 'cpp',
-            '.cc': 'cpp',
-            '.c': 'c',
-            '.rs': 'rust',
-            '.go': 'go',
-            '.rb': 'ruby',
-            '.php': 'php',
-            '.lua': 'lua',
-            '.html': 'html',
-            '.css': 'css',
-            '.gust': 'gust'
-        }
-        return language_map.get(ext, 'unknown')
+        return LANGUAGE_EXTENSIONS.get(ext, 'unknown')
 
     def get_current_interpreter(self, language):
         """Get the current interpreter for a specific language"""
@@ -1709,7 +7217,7 @@ class IceIDE:
             f.write(result)
         
         # Refresh tree to show new file
-        self._load_project_tree()
+        self._tree_path_changed(output_file)
         
         return output_file, target_language
 
@@ -1749,8 +7257,8 @@ class IceIDE:
         }
         return extensions.get(language.lower(), '.txt')
 
-    def run_code(self):
-        """Enhanced run code with Gust and AI features"""
+    def run_code(self, benchmark=False):
+        """Enhanced run code with Gust and AI features; benchmark=True times repeated runs instead"""
         sel = self.notebook.select()
         if not sel:
             messagebox.showerror("No file", "Open a file in a tab first.")
@@ -1767,6 +7275,9 @@ class IceIDE:
         if not frame or not hasattr(frame, "_ds"):
             messagebox.showerror("Run", "Editor widget missing.")
             return
+        if getattr(frame, "_large_file", None) is not None:
+            messagebox.showerror("Run", "Large files are opened read-only and cannot be run.")
+            return
         
         # Save current content
         try:
@@ -1798,12 +7309,8 @@ class IceIDE:
                 if not target_interpreter:
                     self.terminal._print(f"Error: Interpreter for {target_language} not found.\n")
                     return
-                if target_language in ['python', 'py']:
-                    self.terminal.send_command(f'"{target_interpreter}" "{abs_output_file}"')
-                elif target_language in ['javascript', 'js']:
-                    self.terminal.send_command(f'"{target_interpreter}" "{abs_output_file}"')
-                elif target_language in ['java']:
-                    self.terminal.send_command(f'"{target_interpreter}" "{abs_output_file}"')
+                if target_language in ['python', 'py', 'javascript', 'js', 'java']:
+                    self._run_program([[target_interpreter, abs_output_file]], abs_output_file, benchmark)
                 return
 
         # Check for ice.gust() debugging
@@ -1820,38 +7327,26 @@ class IceIDE:
                     f.write(fixed_code)
                 self.terminal._print("Code fixed successfully!")
                 content = fixed_code  # Use fixed code for execution
-                self._load_project_tree()  # Refresh tree
+                self._tree_path_changed(abs_file_path)  # Refresh tree
 
         # Regular code execution based on file type
         ext = os.path.splitext(file_path)[1].lower()
         
-        if ext == '.py':
-            self.terminal.send_command(f'"{interpreter}" "{abs_file_path}"')
-        elif ext == '.js':
-            self.terminal.send_command(f'"{interpreter}" "{abs_file_path}"')
+        if ext in ['.py', '.js', '.rb', '.php', '.lua']:
+            self._run_program([[interpreter, abs_file_path]], abs_file_path, benchmark)
         elif ext == '.java':
             # Compile then run
             class_name = os.path.basename(file_path).replace('.java', '')
-            self.terminal.send_command(f'"{interpreter}" "{abs_file_path}"')
-            self.terminal.send_command(f'java "{class_name}"')
-        elif ext in ['.cpp', '.cc', '.c']:
-            # Compile C/C++ then run
-            output_name = os.path.basename(file_path).replace(ext, '')
-            self.terminal.send_command(f'"{interpreter}" "{abs_file_path}" -o "{output_name}"')
-            self.terminal.send_command(f'./"{output_name}"')
-        elif ext == '.rs':
-            # Compile Rust then run
-            output_name = os.path.basename(file_path).replace('.rs', '')
-            self.terminal.send_command(f'"{interpreter}" "{abs_file_path}" -o "{output_name}"')
-            self.terminal.send_command(f'./"{output_name}"')
+            self._run_program([[interpreter, abs_file_path],
+                               [shutil.which("java") or "java", "-cp", os.path.dirname(abs_file_path), class_name]],
+                              abs_file_path, benchmark)
+        elif ext in ['.cpp', '.cc', '.c', '.rs']:
+            # Compile C/C++/Rust (unless the build cache has it) then run
+            self._build_and_run(language, interpreter, abs_file_path, benchmark)
         elif ext == '.go':
-            self.terminal.send_command(f'"{interpreter}" run "{abs_file_path}"')
-        elif ext == '.rb':
-            self.terminal.send_command(f'"{interpreter}" "{abs_file_path}"')
-        elif ext == '.php':
-            self.terminal.send_command(f'"{interpreter}" "{abs_file_path}"')
-        elif ext == '.lua':
-            self.terminal.send_command(f'"{interpreter}" "{abs_file_path}"')
+            self._run_program([[interpreter, "run", abs_file_path]], abs_file_path, benchmark)
+        elif benchmark:
+            self.terminal._print(f"Benchmark Run is not available for {ext or 'this'} files.\n")
         elif ext in ['.html', '.css']:
             if os.name == 'nt':
                 self.terminal.send_command(f'start "" "{abs_file_path}"')
@@ -1862,6 +7357,122 @@ class IceIDE:
         else:
             self.terminal._print(f"Unsupported file type: {ext}")
 
+    def _toggle_warm_run(self):
+        """Tools > Warm Python Runs: fork .py runs from an interpreter that has PYTHON_PRELOAD imported"""
+        if WINDOWS and self.warm_run_var.get():
+            self.warm_run_var.set(False)
+            messagebox.showinfo("Warm Python Runs", "Warm runs need fork() and are not available on Windows.")
+            return
+        self.python_warm_run = self.warm_run_var.get()
+        _warm_python.configure(self.python_warm_run, self.python_preload)
+        _warm_python.prewarm(self.get_current_interpreter('python'))
+        self.save_config()
+
+    def benchmark_run(self, event=None):
+        """Shift+F5: run the current file repeatedly and report timing statistics"""
+        self.run_code(benchmark=True)
+        return "break"
+
+    def _run_program(self, steps, file_path, benchmark=False):
+        """Run steps as a managed program in the file's run tab, from the project folder"""
+        cwd = self.project_dir or os.path.dirname(file_path)
+        title = f"Run: {os.path.basename(file_path)}"
+        if not benchmark:
+            self.terminal.run(steps, cwd=cwd, title=title)
+            return
+        if self.benchmark_history is None:
+            self.benchmark_history = BenchmarkHistory(os.path.join(self.config_dir, "benchmarks.json"))
+        language = self.detect_language_from_file(file_path)
+        digest = _version_digest([file_path] + _source_dependencies(file_path, language))
+        RunBenchmark(self.terminal, steps, cwd, title, self.benchmark_history, os.path.abspath(file_path), digest,
+                     runs=self.benchmark_runs, warmup=self.benchmark_warmup).start()
+
+    def _get_build_cache(self):
+        """Build cache of the open project, or of the home folder when none is open"""
+        root_dir = os.path.abspath(self.project_dir or os.path.expanduser("~"))
+        if self.build_cache is None or self.build_cache.root_dir != root_dir:
+            self.build_cache = BuildCache(os.path.join(self.config_dir, "build-cache"), root_dir, 0)
+        self.build_cache.max_bytes = self.build_cache_mb * 1024 * 1024
+        return self.build_cache
+
+    def _build_and_run(self, language, compiler, source, benchmark=False):
+        """Run the cached binary for source, compiling it on the build worker first on a miss"""
+        cache = self._get_build_cache()
+        flags = [str(flag) for flag in self.build_flags.get(language, [])]
+        name = os.path.basename(source)
+
+        def work():
+            try:
+                key = cache.key(compiler, flags, [source] + _source_dependencies(source, language))
+            except OSError as e:
+                self._after_build(f"Build error: {e}\n")
+                return
+            artifact = cache.lookup(key)
+            if artifact is not None:
+                self._after_build(f"[{name}: unchanged, running cached build]\n", [[artifact]], source, benchmark)
+                return
+            temp = cache.temp_path(key)
+            start = time.perf_counter()
+            try:
+                result = _subprocess_run([compiler, source, *flags, "-o", temp], cwd=os.path.dirname(source),
+                                         capture_output=True, text=True, errors="replace")
+            except OSError as e:
+                self._after_build(f"Build error: {e}\n")
+                return
+            output = result.stdout + result.stderr
+            if result.returncode != 0:
+                BuildCache._remove(temp)
+                self._after_build(f"{output}[{name}: build failed with exit code {result.returncode}]\n")
+                return
+            artifact = cache.store(key, temp)
+            self._after_build(f"{output}[{name}: built in {time.perf_counter() - start:.2f}s]\n", [[artifact]], source,
+                              benchmark)
+
+        self._flash_status(f"Building {name}...", 1500)
+        _build_worker.submit(work)
+
+    def _after_build(self, message, steps=None, file_path=None, benchmark=False):
+        """Hand build output from the build worker to the main loop, then run steps if given"""
+        def finish():
+            if message:
+                self.terminal._print(message)
+            if steps is not None:
+                self._run_program(steps, file_path, benchmark)
+        try:
+            self.root.after(0, finish)
+        except RuntimeError:
+            pass  # Main loop already gone
+
+    def build_project(self, event=None):
+        """Ctrl+Shift+B: incrementally build the open C/C++ or Java project, then run it"""
+        if not self.project_dir or not os.path.isdir(self.project_dir):
+            self._flash_status("Open a folder to build a project", 2000)
+            return "break"
+        root_dir = os.path.abspath(self.project_dir)
+        if self.project_build is None or self.project_build.root_dir != root_dir:
+            self.project_build = ProjectBuild(root_dir, os.path.join(self.config_dir, "build"))
+        build = self.project_build
+        compilers = {language: self.get_current_interpreter(language) for language in ("c", "cpp", "java")}
+        flags = {language: [str(flag) for flag in values] for language, values in self.build_flags.items()}
+        prefer = self._current_rel_path()
+        index = self.project_index
+        exclude = list(self.exclude_patterns)
+        self.terminal._print(f"Building {build.name}...\n")
+
+        def work():
+            if index is not None and index.ready.is_set():
+                sources = index.paths()
+            else:
+                matcher = IgnoreMatcher(root_dir, exclude)
+                sources = [os.path.relpath(os.path.join(folder, name), root_dir)
+                           for folder, _, files in matcher.walk() for name in files]
+            argv = build.build(sources, compilers, flags, self._after_build, prefer=prefer)
+            if argv is not None:
+                self._after_build("", [argv], root_dir)
+
+        _build_worker.submit(work)
+        return "break"
+
     def _flash_status(self, text, duration=1000):
         old = self.indicator_var.get()
         self.indicator_var.set(text)
@@ -1881,14 +7492,24 @@ class IceIDE:
 
     def __del__(self):
         """Cleanup when IDE is closed"""
-        self._file_monitor_running = False
+        if getattr(self, '_file_watcher', None) is not None:
+            self._file_watcher.stop()
+        if getattr(self, 'search_index', None) is not None:
+            self.search_index.close()
+        if getattr(self, 'symbol_index', None) is not None:
+            self.symbol_index.close()
+        shutdown_symbol_pool()
+        if getattr(self, 'project_index', None) is not None:
+            self.project_index.close()
         if hasattr(self, 'terminal'):
             self.terminal.shutdown()
+        _warm_python.shutdown()
 
 # ----------------------------
 # Run Ice IDE
 # ----------------------------
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # The search index is built in a child process
     root = ttkb.Window(themename="darkly")
     app = IceIDE(root)
     root.mainloop()